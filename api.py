@@ -0,0 +1,186 @@
+"""
+Versioned JSON API (/api/v1).
+
+Built on the same queries as all_achievements and teacher_dashboard and
+authenticated by the existing session login. Listing endpoints accept:
+
+    limit           page size (default 25, max 100)
+    after, before   cursors taken from a previous response
+    fields          comma-separated subset of API_FIELDS
+    type            achievement_type filter
+
+/search?q= ranks achievements by BM25 over the full-text index, matching
+each word as a prefix, and returns a highlighted snippet per hit.
+
+Every response carries a strong ETag built from data_version (bumped by
+triggers on every achievements/student write), the viewer and the request
+URL, so a client sending If-None-Match gets a 304 without the listing
+query being run.
+"""
+import datetime
+import hashlib
+
+from flask import Blueprint, abort, current_app, jsonify, request, session
+from werkzeug.exceptions import HTTPException
+
+import queries
+from db import get_db
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+
+@api.errorhandler(HTTPException)
+def json_error(e):
+    return jsonify(error=e.description), e.code
+
+
+def current_viewer():
+    """Return ("teacher"|"student", id) for the logged-in user, or abort 401."""
+    if session.get("logged_in"):
+        if session.get("teacher_id"):
+            return "teacher", session["teacher_id"]
+        if session.get("student_id"):
+            return "student", session["student_id"]
+    abort(401, description="Login required.")
+
+
+# Thumbnail and preview paths are filled in after the upload without
+# bumping data_version, so they would go stale behind a 304. Clients fetch
+# them from /certificates/<id>/thumb and /preview instead.
+DERIVATIVE_FIELDS = ("thumbnail_path", "preview_path")
+API_FIELDS = tuple(f for f in queries.ACHIEVEMENT_FIELDS if f not in DERIVATIVE_FIELDS)
+
+
+def requested_fields():
+    raw = request.args.get("fields")
+    if not raw:
+        return [f for f in queries.LISTING_COLUMNS if f in API_FIELDS]
+    fields = [f.strip() for f in raw.split(",") if f.strip()]
+    unknown = sorted(set(fields) - set(API_FIELDS))
+    if unknown:
+        abort(400, description=f"Unknown fields: {', '.join(unknown)}")
+    if "id" not in fields:
+        fields.insert(0, "id")
+    return fields
+
+
+def achievements_response(filters):
+    achievement_type = request.args.get("type")
+    if achievement_type:
+        if achievement_type not in queries.ACHIEVEMENT_TYPES:
+            abort(400, description=f"Unknown achievement type: {achievement_type}")
+        filters["achievement_type"] = achievement_type
+
+    limit = request.args.get("limit", queries.DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, queries.MAX_PAGE_SIZE))
+    fields = requested_fields()
+
+    def build(connection):
+        try:
+            rows, next_cursor, prev_cursor = queries.achievements_page(
+                connection, filters,
+                after=request.args.get("after"),
+                before=request.args.get("before"),
+                limit=limit,
+                columns=fields,
+            )
+        except ValueError as e:
+            abort(400, description=str(e))
+        return {
+            "data": [{f: row[f] for f in fields} for row in rows],
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        }
+
+    return conditional_json(build)
+
+
+def conditional_json(build, vary=""):
+    """
+    Answer with build(connection) as JSON, or 304 if the client's ETag is
+    still current. The version check and the query share one snapshot;
+    vary adds anything else the response depends on to the ETag.
+    """
+    role, viewer_id = current_viewer()
+    connection = get_db()
+    in_transaction = connection.in_transaction
+    if not in_transaction:
+        connection.execute("BEGIN")
+    try:
+        version = connection.execute(queries.DATA_VERSION).fetchone()[0]
+        etag = hashlib.sha256(f"{version}|{role}:{viewer_id}|{request.full_path}|{vary}".encode()).hexdigest()[:32]
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = jsonify(build(connection))
+    finally:
+        if not in_transaction:
+            connection.commit()
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@api.route("/achievements")
+def achievements():
+    role, viewer_id = current_viewer()
+    if role != "teacher":
+        abort(403, description="Only teachers can list recorded achievements.")
+    return achievements_response({"teacher_id": viewer_id})
+
+
+@api.route("/students/<student_id>/achievements")
+def student_achievements(student_id):
+    role, viewer_id = current_viewer()
+    if role == "student":
+        if viewer_id != student_id:
+            abort(403, description="Students can only view their own achievements.")
+        return achievements_response({"student_id": student_id})
+    # Teachers see the entries they recorded for this student
+    return achievements_response({"student_id": student_id, "teacher_id": viewer_id})
+
+
+@api.route("/teachers/<teacher_id>/stats")
+def teacher_stats(teacher_id):
+    role, viewer_id = current_viewer()
+    if role != "teacher" or viewer_id != teacher_id:
+        abort(403, description="Teachers can only view their own stats.")
+
+    one_week_ago = (datetime.datetime.now() - datetime.timedelta(days=7)).strftime("%Y-%m-%d")
+
+    def build(connection):
+        row = connection.execute(
+            queries.TEACHER_STATS, {"teacher_id": teacher_id, "since": one_week_ago}
+        ).fetchone()
+        return dict(row, teacher_id=teacher_id)
+
+    return conditional_json(build, vary=one_week_ago)
+
+
+@api.route("/search")
+def search():
+    role, viewer_id = current_viewer()
+    text = request.args.get("q", "")
+    if queries.fts_query(text) is None:
+        abort(400, description="Query parameter 'q' must contain a word.")
+
+    filters = {"student_id" if role == "student" else "teacher_id": viewer_id}
+    achievement_type = request.args.get("type")
+    if achievement_type:
+        if achievement_type not in queries.ACHIEVEMENT_TYPES:
+            abort(400, description=f"Unknown achievement type: {achievement_type}")
+        filters["achievement_type"] = achievement_type
+    limit = request.args.get("limit", queries.DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, queries.MAX_PAGE_SIZE))
+
+    def build(connection):
+        try:
+            rows, next_cursor = queries.search_achievements(
+                connection, text, filters, after=request.args.get("after"), limit=limit,
+            )
+        except ValueError as e:
+            abort(400, description=str(e))
+        return {"data": rows, "next_cursor": next_cursor}
+
+    return conditional_json(build)
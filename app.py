@@ -1,45 +1,86 @@
-from flask import Flask, render_template, request, redirect, url_for, session
+"""
+Achievement Management System.
+
+create_app(config) builds the Flask app from a config class (see
+config.py; APP_CONFIG picks one when none is given) without touching the
+filesystem: the database and upload folders are prepared by an explicit
+bootstrap step, not at import time.
+
+    flask --app app init-db                      # create/migrate ams.db
+    gunicorn -c gunicorn.conf.py "app:create_app()"
+"""
+from flask import Flask, current_app, render_template, stream_template, request, redirect, url_for, session
+import itertools
 import sqlite3
 import os
 import secrets
-from werkzeug.utils import secure_filename
 import datetime
 
-app = Flask(__name__)
-app.secret_key = os.environ.get("SECRET_KEY", secrets.token_hex(16))
-
-# ✅ Portable DB path (works on Windows/Linux/Vercel)
-DB_PATH = os.path.join(os.path.dirname(__file__), "ams.db")
-
-# Define upload folder path for certificates
-UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "uploads")
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
-
-def ensure_achievements_schema(connection):
+import click
+from werkzeug.exceptions import RequestEntityTooLarge
+
+import certificates
+import config
+import db
+import exports
+import imports
+import metrics
+import migrations
+import profiling
+import queries
+import seed
+import storage
+import thumbnails
+import timing
+from signals import login_attempted
+from api import api
+from db import get_db, release_on_close
+
+# Views below are collected here and attached to each app by create_app()
+ROUTES = []
+
+
+def route(rule, **options):
+    def register(view):
+        ROUTES.append((rule, options, view))
+        return view
+    return register
+
+
+def create_app(config_object=None):
     """
-    ✅ Safe, non-destructive SQLite migration:
-    - Adds teacher_id if missing
-    - Adds created_at if missing
-    - Backfills created_at for old rows
+    Build the app. config_object is a config class/object (default: the
+    class named by APP_CONFIG, else config.Config) or a dict of overrides
+    applied on top of it.
     """
-    cursor = connection.cursor()
-    cursor.execute("PRAGMA table_info(achievements)")
-    columns = cursor.fetchall()
-    column_names = [c[1] for c in columns]
-
-    if "teacher_id" not in column_names:
-        print("Adding teacher_id column to achievements table...")
-        cursor.execute("ALTER TABLE achievements ADD COLUMN teacher_id TEXT DEFAULT 'unknown'")
-        print("teacher_id column added successfully")
-
-    if "created_at" not in column_names:
-        print("Adding created_at column to achievements table...")
-        cursor.execute("ALTER TABLE achievements ADD COLUMN created_at TEXT")
-        cursor.execute("UPDATE achievements SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
-        print("created_at column added and backfilled successfully")
-
-    connection.commit()
+    overrides = config_object if isinstance(config_object, dict) else {}
+    if config_object is None or isinstance(config_object, dict):
+        config_object = config.CONFIGS[os.environ.get("APP_CONFIG", "default")]
+    if hasattr(config_object, "validate"):
+        config_object.validate()
+
+    app = Flask(__name__)
+    app.config.from_object(config_object)
+    app.config.update(overrides)
+    if not app.config.get("SECRET_KEY"):
+        app.secret_key = os.environ.get("SECRET_KEY", secrets.token_hex(16))
+
+    db.init_app(app)
+    timing.init_app(app)
+    metrics.init_app(app)
+    profiling.init_app(app)
+    migrations.init_app(app)
+    app.register_blueprint(api)
+    storage.init_app(app)
+    certificates.init_app(app)
+    exports.init_app(app)
+    imports.init_app(app)
+    seed.init_app(app)
+    app.cli.add_command(init_db_command)
+
+    for rule, options, view in ROUTES:
+        app.add_url_rule(rule, view_func=view, **options)
+    return app
 
 
 # Define a function to check allowed file extensions
@@ -48,139 +89,59 @@ def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-# Initialize database on startup
-def init_db():
-    if not os.path.exists(DB_PATH):
-        connection = sqlite3.connect(DB_PATH)
-        cursor = connection.cursor()
-
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS student (
-            student_name TEXT NOT NULL,
-            student_id TEXT PRIMARY KEY,
-            email TEXT UNIQUE NOT NULL,
-            phone_number TEXT,
-            password TEXT NOT NULL,
-            student_gender TEXT,
-            student_dept TEXT
-        )
-        """)
-
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS teacher (
-            teacher_name TEXT NOT NULL,
-            teacher_id TEXT PRIMARY KEY,
-            email TEXT UNIQUE NOT NULL,
-            phone_number TEXT,
-            password TEXT NOT NULL,
-            teacher_gender TEXT,
-            teacher_dept TEXT
-        )
-        """)
-
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS achievements (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            teacher_id TEXT NOT NULL,
-            student_id TEXT NOT NULL,
-            achievement_type TEXT NOT NULL,
-            event_name TEXT NOT NULL,
-            achievement_date DATE NOT NULL,
-            organizer TEXT NOT NULL,
-            position TEXT NOT NULL,
-            achievement_description TEXT,
-            certificate_path TEXT,
-
-            symposium_theme TEXT,
-            programming_language TEXT,
-            coding_platform TEXT,
-            paper_title TEXT,
-            journal_name TEXT,
-            conference_level TEXT,
-            conference_role TEXT,
-            team_size INTEGER,
-            project_title TEXT,
-            database_type TEXT,
-            difficulty_level TEXT,
-            other_description TEXT,
-
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (student_id) REFERENCES student(student_id),
-            FOREIGN KEY (teacher_id) REFERENCES teacher(teacher_id)
-        )
-        """)
-
-        connection.commit()
-        connection.close()
-        print(f"Created database at {DB_PATH}")
-    else:
-        connection = sqlite3.connect(DB_PATH)
-        cursor = connection.cursor()
-
-        # Ensure achievements table exists
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='achievements'")
-        if not cursor.fetchone():
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS achievements (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                teacher_id TEXT NOT NULL,
-                student_id TEXT NOT NULL,
-                achievement_type TEXT NOT NULL,
-                event_name TEXT NOT NULL,
-                achievement_date DATE NOT NULL,
-                organizer TEXT NOT NULL,
-                position TEXT NOT NULL,
-                achievement_description TEXT,
-                certificate_path TEXT,
-
-                symposium_theme TEXT,
-                programming_language TEXT,
-                coding_platform TEXT,
-                paper_title TEXT,
-                journal_name TEXT,
-                conference_level TEXT,
-                conference_role TEXT,
-                team_size INTEGER,
-                project_title TEXT,
-                database_type TEXT,
-                difficulty_level TEXT,
-                other_description TEXT,
-
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (student_id) REFERENCES student(student_id),
-                FOREIGN KEY (teacher_id) REFERENCES teacher(teacher_id)
-            )
-            """)
-            connection.commit()
-            print("Created achievements table")
+def buffered(chunks, size=16 * 1024):
+    """Coalesce small template chunks into ~size-byte writes for streaming."""
+    buffer, length = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer)
 
-        # ✅ IMPORTANT: fix old DBs missing columns (created_at issue)
-        ensure_achievements_schema(connection)
 
-        connection.close()
-        print(f"Database already exists at {DB_PATH}")
+def init_db(target=None):
+    """
+    Bootstrap step: create the upload folder and the database if needed
+    and apply any pending schema migrations. Run once per deployment (or
+    in the gunicorn master, see gunicorn.conf.py), not per worker.
+    """
+    target = target or app
+    db_path = target.config["DB_PATH"]
+    created = not os.path.exists(db_path)
+    os.makedirs(target.config["UPLOAD_FOLDER"], exist_ok=True)
+    db.set_journal_mode(db_path, target.config["SQLITE_JOURNAL_MODE"])
+    applied = migrations.upgrade(db_path)
+    if created:
+        print(f"Created database at {db_path}")
+    elif applied:
+        print(f"Migrated database at {db_path} to version {applied[-1]}")
 
 
-# Call initialization function
-init_db()
+@click.command("init-db")
+def init_db_command():
+    """Create the database and upload folder and apply migrations."""
+    init_db(current_app._get_current_object())
 
 
-@app.route("/")
+@route("/")
 def home():
     return render_template("home.html")
 
 
-@app.route("/student", methods=["GET", "POST"])
+@route("/student", methods=["GET", "POST"])
 def student():
     if request.method == "POST":
         student_id = request.form.get("sname")
         password = request.form.get("password")
 
-        connection = sqlite3.connect(DB_PATH)
+        connection = get_db()
         cursor = connection.cursor()
         cursor.execute("SELECT * FROM student WHERE student_id = ? AND password = ?", (student_id, password))
         student_data = cursor.fetchone()
-        connection.close()
+        login_attempted.send(current_app._get_current_object(), role="student", success=student_data is not None)
 
         if student_data:
             session["logged_in"] = True
@@ -194,17 +155,17 @@ def student():
     return render_template("student.html")
 
 
-@app.route("/teacher", methods=["GET", "POST"])
+@route("/teacher", methods=["GET", "POST"])
 def teacher():
     if request.method == "POST":
         teacher_id = request.form.get("tname")
         password = request.form.get("password")
 
-        connection = sqlite3.connect(DB_PATH)
+        connection = get_db()
         cursor = connection.cursor()
         cursor.execute("SELECT * FROM teacher WHERE teacher_id = ? AND password = ?", (teacher_id, password))
         teacher_data = cursor.fetchone()
-        connection.close()
+        login_attempted.send(current_app._get_current_object(), role="teacher", success=teacher_data is not None)
 
         if teacher_data:
             session["logged_in"] = True
@@ -218,7 +179,7 @@ def teacher():
     return render_template("teacher.html")
 
 
-@app.route("/student-new", methods=["GET", "POST"])
+@route("/student-new", methods=["GET", "POST"])
 def student_new():
     if request.method == "POST":
         student_name = request.form.get("student_name")
@@ -229,21 +190,9 @@ def student_new():
         student_gender = request.form.get("student_gender")
         student_dept = request.form.get("student_dept")
 
-        connection = sqlite3.connect(DB_PATH)
+        connection = get_db()
         cursor = connection.cursor()
 
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS student (
-            student_name TEXT NOT NULL,
-            student_id TEXT PRIMARY KEY,
-            email TEXT UNIQUE NOT NULL,
-            phone_number TEXT,
-            password TEXT NOT NULL,
-            student_gender TEXT,
-            student_dept TEXT
-        )
-        """)
-
         try:
             cursor.execute("""
                 INSERT INTO student (student_name, student_id, email, phone_number, password, student_gender, student_dept)
@@ -252,14 +201,13 @@ def student_new():
             connection.commit()
             return redirect(url_for("student"))
         except sqlite3.Error as e:
+            connection.rollback()
             return render_template("student_new_2.html", error=f"Database error: {e}")
-        finally:
-            connection.close()
 
     return render_template("student_new_2.html")
 
 
-@app.route("/teacher-new", endpoint="teacher-new", methods=["GET", "POST"])
+@route("/teacher-new", endpoint="teacher-new", methods=["GET", "POST"])
 def teacher_new():
     if request.method == "POST":
         teacher_name = request.form.get("teacher_name")
@@ -270,21 +218,9 @@ def teacher_new():
         teacher_gender = request.form.get("teacher_gender")
         teacher_dept = request.form.get("teacher_dept")
 
-        connection = sqlite3.connect(DB_PATH)
+        connection = get_db()
         cursor = connection.cursor()
 
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS teacher (
-            teacher_name TEXT NOT NULL,
-            teacher_id TEXT PRIMARY KEY,
-            email TEXT UNIQUE NOT NULL,
-            phone_number TEXT,
-            password TEXT NOT NULL,
-            teacher_gender TEXT,
-            teacher_dept TEXT
-        )
-        """)
-
         try:
             cursor.execute("""
                 INSERT INTO teacher (teacher_name, teacher_id, email, phone_number, password, teacher_gender, teacher_dept)
@@ -293,19 +229,18 @@ def teacher_new():
             connection.commit()
             return redirect(url_for("teacher"))
         except sqlite3.Error as e:
+            connection.rollback()
             return render_template("teacher_new_2.html", error=f"Database error: {e}")
-        finally:
-            connection.close()
 
     return render_template("teacher_new_2.html")
 
 
-@app.route("/teacher-achievements", endpoint="teacher-achievements")
+@route("/teacher-achievements", endpoint="teacher-achievements")
 def teacher_achievements():
     return render_template("teacher_achievements_2.html")
 
 
-@app.route("/submit_achievements", endpoint="submit_achievements", methods=["GET", "POST"])
+@route("/submit_achievements", endpoint="submit_achievements", methods=["GET", "POST"])
 def submit_achievements():
     if not session.get("logged_in") or not session.get("teacher_id"):
         return redirect(url_for("teacher"))
@@ -346,18 +281,16 @@ def submit_achievements():
                     if not allowed_file(file.filename):
                         return render_template("submit_achievements.html",
                                                error="Invalid file type. Please upload PDF, PNG, JPG, or JPEG files.")
-                    timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-                    secure_name = f"{timestamp}_{secure_filename(file.filename)}"
-                    file_path = os.path.join(UPLOAD_FOLDER, secure_name)
-                    file.save(file_path)
-                    certificate_path = f"uploads/{secure_name}"
-
-            with sqlite3.connect(DB_PATH) as connection:
+                    # Stored once per unique content under a hash-derived path
+                    try:
+                        certificate_path = storage.save_certificate(file)
+                    except storage.InvalidCertificate as e:
+                        return render_template("submit_achievements.html", error=str(e))
+
+            connection = get_db()
+            with connection:
                 cursor = connection.cursor()
 
-                # ✅ Ensure schema is correct before inserting (fixes old DB)
-                ensure_achievements_schema(connection)
-
                 # Validate student exists
                 cursor.execute("SELECT student_id, student_name FROM student WHERE student_id = ?", (student_id,))
                 student_data = cursor.fetchone()
@@ -383,45 +316,71 @@ def submit_achievements():
                     journal_name, conference_level, conference_role, team_size,
                     project_title, database_type, difficulty_level, other_description
                 ))
+                achievement_id = cursor.lastrowid
 
                 connection.commit()
 
+            # Thumbnails are rendered off the request thread
+            thumbnails.schedule(certificate_path, [achievement_id])
+
             success_message = f"Achievement of {student_name} has been successfully registered!!"
             return render_template("submit_achievements.html", success=success_message)
 
+        except RequestEntityTooLarge:
+            limit_mb = current_app.config["MAX_CONTENT_LENGTH"] // (1024 * 1024)
+            return render_template("submit_achievements.html",
+                                   error=f"Certificate is too large. The maximum size is {limit_mb} MB."), 413
         except Exception as e:
             return render_template("submit_achievements.html", error=f"An error occurred: {e}")
 
     return redirect(url_for("teacher-dashboard", success="Achievement submitted successfully!"))
 
 
-@app.route("/student-achievements", endpoint="student-achievements")
+@route("/student-achievements", endpoint="student-achievements")
 def student_achievements():
     if not session.get("logged_in"):
         return redirect(url_for("student"))
 
+    student_id = session.get("student_id")
     student_data = {
-        "id": session.get("student_id"),
+        "id": student_id,
         "name": session.get("student_name"),
         "dept": session.get("student_dept"),
     }
-    return render_template("student_achievements_1.html", student=student_data)
+    connection = get_db()
+    summary = queries.student_summary(connection, student_id)
+    achievements = connection.execute(queries.STUDENT_ACHIEVEMENTS, (student_id,)).fetchall()
+    return render_template(
+        "student_achievements_1.html",
+        student=student_data,
+        summary=summary,
+        achievements=achievements,
+        achievement_types=queries.ACHIEVEMENT_TYPES,
+    )
 
 
-@app.route("/student-dashboard", endpoint="student-dashboard")
+@route("/student-dashboard", endpoint="student-dashboard")
 def student_dashboard():
     if not session.get("logged_in"):
         return redirect(url_for("student"))
 
+    student_id = session.get("student_id")
     student_data = {
-        "id": session.get("student_id"),
+        "id": student_id,
         "name": session.get("student_name"),
         "dept": session.get("student_dept"),
     }
-    return render_template("student_dashboard.html", student=student_data)
+    summary = queries.student_summary(get_db(), student_id)
+    return render_template(
+        "student_dashboard.html",
+        student=student_data,
+        summary=summary,
+        this_year=str(datetime.date.today().year),
+        achievement_types=queries.ACHIEVEMENT_TYPES,
+    )
 
 
-@app.route("/teacher-dashboard", endpoint="teacher-dashboard")
+@route("/teacher-dashboard", endpoint="teacher-dashboard")
 def teacher_dashboard():
     if not session.get("logged_in"):
         return redirect(url_for("teacher"))
@@ -433,42 +392,9 @@ def teacher_dashboard():
         "dept": session.get("teacher_dept"),
     }
 
-    connection = sqlite3.connect(DB_PATH)
-    connection.row_factory = sqlite3.Row
-    cursor = connection.cursor()
-
-    # ✅ Ensure schema exists so query never crashes
-    ensure_achievements_schema(connection)
-
-    cursor.execute("SELECT COUNT(*) FROM achievements WHERE teacher_id = ?", (teacher_id,))
-    total_achievements = cursor.fetchone()[0]
-
-    cursor.execute("SELECT COUNT(DISTINCT student_id) FROM achievements WHERE teacher_id = ?", (teacher_id,))
-    students_managed = cursor.fetchone()[0]
-
+    connection = get_db()
     one_week_ago = (datetime.datetime.now() - datetime.timedelta(days=7)).strftime("%Y-%m-%d")
-    cursor.execute("SELECT COUNT(*) FROM achievements WHERE teacher_id = ? AND achievement_date >= ?",
-                   (teacher_id, one_week_ago))
-    this_week_count = cursor.fetchone()[0]
-
-    cursor.execute("""
-        SELECT a.id, a.student_id, s.student_name, a.achievement_type,
-               a.event_name, a.achievement_date
-        FROM achievements a
-        JOIN student s ON a.student_id = s.student_id
-        WHERE a.teacher_id = ?
-        ORDER BY a.created_at DESC
-        LIMIT 5
-    """, (teacher_id,))
-    recent_entries = cursor.fetchall()
-
-    connection.close()
-
-    stats = {
-        "total_achievements": total_achievements,
-        "students_managed": students_managed,
-        "this_week": this_week_count,
-    }
+    stats, recent_entries = queries.teacher_dashboard(connection, teacher_id, one_week_ago)
 
     return render_template(
         "teacher_dashboard.html",
@@ -478,34 +404,64 @@ def teacher_dashboard():
     )
 
 
-@app.route("/all-achievements", endpoint="all-achievements")
+@route("/all-achievements", endpoint="all-achievements")
 def all_achievements():
     if not session.get("logged_in"):
         return redirect(url_for("teacher"))
 
     teacher_id = session.get("teacher_id")
 
-    connection = sqlite3.connect(DB_PATH)
-    connection.row_factory = sqlite3.Row
-    cursor = connection.cursor()
+    achievement_type = request.args.get("type")
+    if achievement_type not in queries.ACHIEVEMENT_TYPES:
+        achievement_type = None
+
+    if request.args.get("per_page") == "all":
+        # "Show everything": iterate the cursor lazily and stream the page
+        rows = queries.iter_teacher_achievements(get_db(), teacher_id, achievement_type=achievement_type)
+        first = next(rows, None)
+        achievements = itertools.chain([first], rows) if first is not None else []
+        return release_on_close(current_app.response_class(buffered(stream_template(
+            "all_achievements.html",
+            achievements=achievements,
+            achievement_types=queries.ACHIEVEMENT_TYPES,
+            selected_type=achievement_type,
+            per_page="all",
+            next_cursor=None,
+            prev_cursor=None,
+        ))))
+
+    per_page = request.args.get("per_page", queries.DEFAULT_PAGE_SIZE, type=int)
+    per_page = max(1, min(per_page, queries.MAX_PAGE_SIZE))
+
+    try:
+        achievements, next_cursor, prev_cursor = queries.teacher_achievements_page(
+            get_db(), teacher_id,
+            achievement_type=achievement_type,
+            after=request.args.get("after"),
+            before=request.args.get("before"),
+            limit=per_page,
+        )
+    except ValueError:
+        # Stale or hand-edited cursor: start again from the first page
+        achievements, next_cursor, prev_cursor = queries.teacher_achievements_page(
+            get_db(), teacher_id, achievement_type=achievement_type, limit=per_page,
+        )
 
-    cursor.execute("""
-        SELECT a.id, a.student_id, s.student_name, a.achievement_type,
-               a.event_name, a.achievement_date, a.position, a.organizer,
-               a.certificate_path
-        FROM achievements a
-        JOIN student s ON a.student_id = s.student_id
-        WHERE a.teacher_id = ?
-        ORDER BY a.achievement_date DESC
-    """, (teacher_id,))
+    return render_template(
+        "all_achievements.html",
+        achievements=achievements,
+        achievement_types=queries.ACHIEVEMENT_TYPES,
+        selected_type=achievement_type,
+        per_page=per_page,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+    )
 
-    achievements = cursor.fetchall()
-    connection.close()
 
-    return render_template("all_achievements.html", achievements=achievements)
+# Module-level app for `flask --app app`, `gunicorn app:app` and the tests
+app = create_app()
 
 
 if __name__ == "__main__":
     init_db()
     app.run(debug=True)
-
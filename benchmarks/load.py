@@ -0,0 +1,442 @@
+"""
+HTTP load test with mixed student and teacher sessions.
+
+New sessions arrive as a Poisson process at --rate per second for
+--duration seconds. This is an open loop, so a slow server builds a
+backlog rather than slowing the arrivals. Each session is one user with
+their own cookies and keep-alive connection:
+
+    student   log in, open the dashboard, open their achievements
+    teacher   log in, open the dashboard, submit an achievement with a
+              certificate upload, open all-achievements
+
+Steps are separated by exponential think times (mean --think seconds).
+The client is plain asyncio streams speaking HTTP/1.1, so nothing beyond
+the standard library is needed.
+
+By default the harness seeds a scratch database (see seed.py) and starts
+the app on a free local port, either with the werkzeug dev server or
+with gunicorn -c gunicorn.conf.py. It then reports throughput, latency
+percentiles and errors per step, and counts "database is locked" both in
+responses and in the server's log. To target a server that is already
+running, pass --url; --db then names its database so the harness can
+pick real users (all seeded users share seed.SEED_PASSWORD).
+
+    python benchmarks/load.py --server gunicorn --workers 4 --rate 20 --duration 60
+    python benchmarks/load.py --server werkzeug --scale tiny --rate 5 --duration 10
+    python benchmarks/load.py --url http://127.0.0.1:8000 --db ams.db --rate 10
+"""
+import argparse
+import asyncio
+import collections
+import contextlib
+import json
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import seed  # noqa: E402
+
+LOCKED = b"database is locked"
+SCALES = {"tiny": (200, 10, 2000), **seed.SCALES}
+
+
+class HttpClient:
+    """One user's HTTP/1.1 connection and cookie jar."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.cookies = {}
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            with contextlib.suppress(OSError):
+                await self.writer.wait_closed()
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=b"", content_type=None):
+        """Return (status, body). Retries once if a kept-alive connection had gone stale."""
+        reused = self.writer is not None
+        try:
+            return await self._exchange(method, path, body, content_type)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            await self.close()
+            if not reused:
+                raise
+        return await self._exchange(method, path, body, content_type)
+
+    async def _exchange(self, method, path, body, content_type):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            f"Content-Length: {len(body)}",
+        ]
+        if content_type:
+            lines.append(f"Content-Type: {content_type}")
+        if self.cookies:
+            lines.append("Cookie: " + "; ".join(f"{k}={v}" for k, v in self.cookies.items()))
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("server closed the connection")
+        version, status = status_line.split()[:2]
+        status = int(status)
+        headers = collections.defaultdict(list)
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()].append(value.strip())
+        for cookie in headers["set-cookie"]:
+            name, _, value = cookie.split(";", 1)[0].partition("=")
+            self.cookies[name.strip()] = value.strip()
+
+        if method == "HEAD" or status in (204, 304):
+            content = b""
+        elif "chunked" in ",".join(headers["transfer-encoding"]).lower():
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            content = b"".join(chunks)
+        elif headers["content-length"]:
+            content = await self.reader.readexactly(int(headers["content-length"][0]))
+        else:
+            content = await self.reader.read()
+            await self.close()
+            return status, content
+
+        connection = ",".join(headers["connection"]).lower()
+        if "close" in connection or (version == b"HTTP/1.0" and "keep-alive" not in connection):
+            await self.close()
+        return status, content
+
+
+def form(fields):
+    return urllib.parse.urlencode(fields).encode(), "application/x-www-form-urlencoded"
+
+
+def multipart(fields, files):
+    """files maps field name to (filename, bytes, content type)."""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, data, content_type) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n".encode() + data + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = collections.defaultdict(list)
+        self.errors = collections.defaultdict(collections.Counter)
+        self.locked = 0
+        self.sessions_started = self.sessions_completed = 0
+
+    def record(self, step, elapsed, error=None):
+        self.latencies[step].append(elapsed)
+        if error:
+            self.errors[step][error] += 1
+
+
+class LoadTest:
+    def __init__(self, host, port, users, args):
+        self.host, self.port = host, port
+        self.users = users
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.stats = Stats()
+
+    async def step(self, client, name, method, path, body=b"", content_type=None, expect=200, marker=None):
+        """Run one request; returns whether it succeeded."""
+        start = time.perf_counter()
+        try:
+            status, content = await asyncio.wait_for(
+                client.request(method, path, body, content_type), self.args.timeout,
+            )
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError) as e:
+            self.stats.record(name, time.perf_counter() - start, type(e).__name__)
+            await client.close()
+            return False
+        elapsed = time.perf_counter() - start
+        error = None
+        if LOCKED in content:
+            self.stats.locked += 1
+            error = "database is locked"
+        elif status != expect:
+            error = f"HTTP {status}"
+        elif marker is not None and marker not in content:
+            error = "unexpected page"
+        self.stats.record(name, elapsed, error)
+        return error is None
+
+    async def think(self):
+        if self.args.think > 0:
+            await asyncio.sleep(self.rng.expovariate(1 / self.args.think))
+
+    async def student_session(self, client):
+        student_id = self.rng.choice(self.users["students"])
+        steps = [
+            ("student_login", "POST", "/student",
+             *form({"sname": student_id, "password": seed.SEED_PASSWORD}), 302),
+            ("student_dashboard", "GET", "/student-dashboard", b"", None, 200),
+            ("student_achievements", "GET", "/student-achievements", b"", None, 200),
+        ]
+        for name, method, path, body, content_type, expect in steps:
+            if not await self.step(client, name, method, path, body, content_type, expect):
+                return False
+            await self.think()
+        return True
+
+    async def teacher_session(self, client):
+        teacher_id = self.rng.choice(self.users["teachers"])
+        if not await self.step(client, "teacher_login", "POST", "/teacher",
+                               *form({"tname": teacher_id, "password": seed.SEED_PASSWORD}), expect=302):
+            return False
+        await self.think()
+        if not await self.step(client, "teacher_dashboard", "GET", "/teacher-dashboard"):
+            return False
+        await self.think()
+
+        # Unique bytes per upload, or the content-addressed store dedupes them
+        certificate = b"%PDF-1.4\n" + uuid.uuid4().hex.encode() + b"\n" + b"0" * self.args.certificate_kb * 1024
+        body, content_type = multipart({
+            "student_id": self.rng.choice(self.users["students"]),
+            "achievement_type": "hackathon",
+            "event_name": "Load Test Hackathon",
+            "achievement_date": time.strftime("%Y-%m-%d"),
+            "organizer": "Load Test",
+            "position": "Participant",
+            "team_size": "4",
+            "project_title": "Load Generator",
+        }, {"certificate": ("certificate.pdf", certificate, "application/pdf")})
+        if not await self.step(client, "submit_achievement", "POST", "/submit_achievements",
+                               body, content_type, marker=b"successfully registered"):
+            return False
+        await self.think()
+        return await self.step(client, "all_achievements", "GET", "/all-achievements")
+
+    async def session(self):
+        self.stats.sessions_started += 1
+        client = HttpClient(self.host, self.port)
+        try:
+            if self.rng.random() < self.args.teacher_share:
+                completed = await self.teacher_session(client)
+            else:
+                completed = await self.student_session(client)
+        finally:
+            await client.close()
+        self.stats.sessions_completed += completed
+
+    async def run(self):
+        tasks = []
+        started = time.perf_counter()
+        deadline = started + self.args.duration
+        while True:
+            await asyncio.sleep(self.rng.expovariate(self.args.rate))
+            if time.perf_counter() >= deadline:
+                break
+            tasks.append(asyncio.create_task(self.session()))
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - started
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def report(stats, elapsed, server_locked, args):
+    requests = sum(len(v) for v in stats.latencies.values())
+    errors = sum(sum(c.values()) for c in stats.errors.values())
+    steps = {}
+    for name, latencies in stats.latencies.items():
+        latencies = sorted(latencies)
+        steps[name] = {
+            "requests": len(latencies),
+            "errors": dict(stats.errors[name]),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p90_ms": round(percentile(latencies, 0.90) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2),
+        }
+    return {
+        "target_rate": args.rate,
+        "elapsed_s": round(elapsed, 2),
+        "sessions_started": stats.sessions_started,
+        "sessions_completed": stats.sessions_completed,
+        "requests": requests,
+        "throughput_rps": round(requests / elapsed, 2),
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "locked_responses": stats.locked,
+        "locked_in_server_log": server_locked,
+        "steps": steps,
+    }
+
+
+def print_report(result):
+    print(
+        f"{result['sessions_started']} sessions ({result['sessions_completed']} completed) in "
+        f"{result['elapsed_s']} s at {result['target_rate']}/s; {result['requests']} requests, "
+        f"{result['throughput_rps']} req/s, error rate {result['error_rate']:.2%}"
+    )
+    log_count = result["locked_in_server_log"]
+    print(
+        f'"database is locked": {result["locked_responses"]} response(s), '
+        f"{'n/a' if log_count is None else log_count} server log line(s)"
+    )
+    print(f"{'step':<22} {'count':>6} {'errors':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, step in sorted(result["steps"].items()):
+        print(
+            f"{name:<22} {step['requests']:6d} {sum(step['errors'].values()):6d} {step['p50_ms']:9.1f}"
+            f" {step['p90_ms']:9.1f} {step['p99_ms']:9.1f} {step['max_ms']:9.1f}"
+        )
+        for error, count in step["errors"].items():
+            print(f"{'':<22} {count:6d} x {error}")
+
+
+def load_users(db_path, limit=5000):
+    connection = sqlite3.connect(db_path)
+    try:
+        return {
+            "students": [r[0] for r in connection.execute("SELECT student_id FROM student LIMIT ?", (limit,))],
+            "teachers": [r[0] for r in connection.execute("SELECT teacher_id FROM teacher LIMIT ?", (limit,))],
+        }
+    finally:
+        connection.close()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        with contextlib.suppress(OSError):
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        time.sleep(0.1)
+    raise RuntimeError(f"server did not listen on port {port} within {timeout} s")
+
+
+@contextlib.contextmanager
+def local_server(kind, scratch, args):
+    """Seed a scratch database, start the app on it and yield (port, log path)."""
+    db_path = os.path.join(scratch, "ams.db")
+    uploads = os.path.join(scratch, "uploads")
+    seed.seed_database(db_path, *SCALES[args.scale], seed=args.seed)
+
+    port = free_port()
+    env = dict(os.environ, DB_PATH=db_path, UPLOAD_FOLDER=uploads, APP_CONFIG="default")
+    if kind == "gunicorn":
+        metrics_dir = os.path.join(scratch, "metrics")
+        os.makedirs(metrics_dir, exist_ok=True)
+        env.update(
+            BIND=f"127.0.0.1:{port}", WEB_CONCURRENCY=str(args.workers),
+            PROMETHEUS_MULTIPROC_DIR=metrics_dir,
+        )
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"]
+    else:
+        subprocess.run([sys.executable, "-m", "flask", "--app", "app", "init-db"],
+                       cwd=ROOT, env=env, check=True, capture_output=True)
+        command = [sys.executable, "-m", "flask", "--app", "app", "run", "--port", str(port), "--with-threads"]
+
+    log_path = os.path.join(scratch, "server.log")
+    with open(log_path, "wb") as log:
+        process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            wait_until_up(port, process)
+            yield port, log_path
+        finally:
+            process.terminate()
+            with contextlib.suppress(subprocess.TimeoutExpired):
+                process.wait(timeout=10)
+            if process.poll() is None:
+                process.kill()
+
+
+def count_locked(log_path):
+    with open(log_path, "rb") as f:
+        return sum(1 for line in f if LOCKED in line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", choices=["werkzeug", "gunicorn"], default="werkzeug",
+                        help="Server to start on a seeded scratch database.")
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn workers.")
+    parser.add_argument("--scale", choices=list(SCALES), default="small", help="Seeded data size.")
+    parser.add_argument("--url", help="Use this running server instead of starting one.")
+    parser.add_argument("--db", help="With --url: the server's database, to pick users from.")
+    parser.add_argument("--rate", type=float, default=10, help="New sessions per second.")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to keep starting sessions.")
+    parser.add_argument("--teacher-share", type=float, default=0.3, help="Fraction of sessions that are teachers.")
+    parser.add_argument("--think", type=float, default=0.5, help="Mean think time between steps, seconds.")
+    parser.add_argument("--certificate-kb", type=int, default=200, help="Size of uploaded certificates.")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout, seconds.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the report to this file.")
+    parser.add_argument("--max-error-rate", type=float, help="Exit non-zero above this error rate.")
+    args = parser.parse_args()
+
+    with contextlib.ExitStack() as stack:
+        if args.url:
+            if not args.db:
+                parser.error("--url needs --db to pick users")
+            target = urllib.parse.urlsplit(args.url)
+            host, port, log_path = target.hostname, target.port or 80, None
+            users = load_users(args.db)
+        else:
+            scratch = stack.enter_context(tempfile.TemporaryDirectory())
+            port, log_path = stack.enter_context(local_server(args.server, scratch, args))
+            host = "127.0.0.1"
+            users = load_users(os.path.join(scratch, "ams.db"))
+        if not users["students"] or not users["teachers"]:
+            parser.error("the database has no students or no teachers")
+
+        test = LoadTest(host, port, users, args)
+        elapsed = asyncio.run(test.run())
+        result = report(test.stats, elapsed, count_locked(log_path) if log_path else None, args)
+
+    print_report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.max_error_rate is not None and result["error_rate"] > args.max_error_rate:
+        print(f"FAIL: error rate {result['error_rate']:.2%} above {args.max_error_rate:.2%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""
+Route benchmarks: throughput and p50/p99 latency of the hot routes at
+several data scales, driven through the Flask test client.
+
+For each scale a scratch database is filled by seed.py (same seed, same
+rows). Every scenario then runs --iterations requests after a short
+warm-up. The read scenarios run as the busiest teacher, since that is
+where slow pages show up first:
+
+    login_student, login_teacher     POST /student, /teacher
+    signup                           POST /student-new, a new student each time
+    teacher_dashboard                GET /teacher-dashboard
+    all_achievements                 GET /all-achievements (first page, and filtered by type)
+    submit_achievement               POST /submit_achievements, without and with a certificate
+
+    python benchmarks/routes.py --scales tiny,small --save baseline.json
+    python benchmarks/routes.py --scales tiny,small --compare baseline.json --threshold 0.2
+
+--compare flags each scenario whose p50 or p99 grew, or whose throughput
+fell, by more than --threshold (a fraction of the baseline), and exits
+non-zero if any did. Only compare baselines recorded on the same machine.
+Building the larger scales takes a while; --cache-dir keeps the seeded
+databases between runs (each run works on a copy).
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import seed  # noqa: E402
+from app import create_app, init_db  # noqa: E402
+
+SCALES = {"tiny": (200, 10, 2000), **seed.SCALES}
+# Fixed so that a scale always seeds the same rows
+SEED = 0
+UNTIL = datetime.date(2025, 6, 30)
+
+ACHIEVEMENT_FORM = {
+    "achievement_type": "hackathon",
+    "event_name": "Benchmark Hackathon",
+    "achievement_date": "2025-06-01",
+    "organizer": "Benchmark Org",
+    "position": "Participant",
+    "team_size": "4",
+    "project_title": "Load Testing",
+}
+
+
+def _login(client, role, user_id):
+    field = "tname" if role == "teacher" else "sname"
+    client.post(f"/{role}", data={field: user_id, "password": seed.SEED_PASSWORD})
+
+
+def _login_student(client, ctx, i):
+    response = client.post("/student", data={"sname": ctx["student_id"], "password": seed.SEED_PASSWORD})
+    return response.status_code == 302
+
+
+def _login_teacher(client, ctx, i):
+    response = client.post("/teacher", data={"tname": ctx["teacher_id"], "password": seed.SEED_PASSWORD})
+    return response.status_code == 302
+
+
+def _signup(client, ctx, i):
+    student_id = f"BENCH{ctx['run']}{i:07d}"
+    response = client.post("/student-new", data={
+        "student_name": "Bench Student", "student_id": student_id, "email": f"{student_id}@bench.example",
+        "phone_number": "9000000000", "password": seed.SEED_PASSWORD,
+        "student_gender": "Other", "student_dept": "CSE",
+    })
+    return response.status_code == 302
+
+
+def _teacher_dashboard(client, ctx, i):
+    return client.get("/teacher-dashboard").status_code == 200
+
+
+def _all_achievements(client, ctx, i):
+    return client.get("/all-achievements").status_code == 200
+
+
+def _all_achievements_filtered(client, ctx, i):
+    return client.get("/all-achievements?type=hackathon").status_code == 200
+
+
+def _submit(client, ctx, i):
+    response = client.post("/submit_achievements", data=dict(ACHIEVEMENT_FORM, student_id=ctx["student_id"]))
+    return b"successfully registered" in response.data
+
+
+def _submit_certificate(client, ctx, i):
+    # Distinct bytes each time, or the content-addressed store would dedupe
+    certificate = b"%PDF-1.4\n" + f"{ctx['run']}-{i}\n".encode() + b"0" * 64 * 1024
+    data = dict(ACHIEVEMENT_FORM, student_id=ctx["student_id"],
+                certificate=(io.BytesIO(certificate), "certificate.pdf"))
+    response = client.post("/submit_achievements", data=data, content_type="multipart/form-data")
+    return b"successfully registered" in response.data
+
+
+# name: (function returning whether the request succeeded, role logged in
+# first); reads run before the writes
+SCENARIOS = {
+    "login_student": (_login_student, None),
+    "login_teacher": (_login_teacher, None),
+    "teacher_dashboard": (_teacher_dashboard, "teacher"),
+    "all_achievements": (_all_achievements, "teacher"),
+    "all_achievements_filtered": (_all_achievements_filtered, "teacher"),
+    "signup": (_signup, None),
+    "submit_achievement": (_submit, "teacher"),
+    "submit_achievement_certificate": (_submit_certificate, "teacher"),
+}
+
+
+def prepare_database(scale, directory, cache_dir=None):
+    """Seed a database for scale in directory (via cache_dir if given); returns its path."""
+    db_path = os.path.join(directory, f"{scale}.db")
+    if cache_dir:
+        cached = os.path.join(cache_dir, f"{scale}-seed{SEED}-{UNTIL.isoformat()}.db")
+        if not os.path.exists(cached):
+            os.makedirs(cache_dir, exist_ok=True)
+            seed.seed_database(cached + ".tmp", *SCALES[scale], seed=SEED, until=UNTIL)
+            os.replace(cached + ".tmp", cached)
+        shutil.copyfile(cached, db_path)
+    else:
+        seed.seed_database(db_path, *SCALES[scale], seed=SEED, until=UNTIL)
+    return db_path
+
+
+def summarize(latencies, elapsed, errors):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3),
+    }
+
+
+def run_scenario(app, ctx, func, role, iterations, warmup):
+    client = app.test_client()
+    if role:
+        _login(client, role, ctx[f"{role}_id"])
+    for i in range(warmup):
+        func(client, ctx, -1 - i)
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for i in range(iterations):
+        start = time.perf_counter()
+        ok = func(client, ctx, i)
+        latencies.append(time.perf_counter() - start)
+        errors += not ok
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def run_scale(scale, scenarios, iterations, warmup, cache_dir=None, echo=print):
+    with tempfile.TemporaryDirectory() as scratch:
+        db_path = prepare_database(scale, scratch, cache_dir)
+        app = create_app({
+            "DB_PATH": db_path,
+            "UPLOAD_FOLDER": os.path.join(scratch, "uploads"),
+            "TESTING": True,
+            "SECRET_KEY": "benchmark",
+        })
+        init_db(app)
+        connection = sqlite3.connect(db_path)
+        teacher_id = connection.execute("SELECT teacher_id FROM teacher_stats ORDER BY total DESC LIMIT 1").fetchone()[0]
+        student_id = connection.execute("SELECT student_id FROM student ORDER BY student_id LIMIT 1").fetchone()[0]
+        connection.close()
+        ctx = {"teacher_id": teacher_id, "student_id": student_id, "run": os.getpid()}
+
+        results = {}
+        for name in scenarios:
+            func, role = SCENARIOS[name]
+            results[name] = run_scenario(app, ctx, func, role, iterations, warmup)
+            echo(format_result(scale, name, results[name]))
+        app.extensions["db_pool"].close_all()
+    return results
+
+
+def format_result(scale, name, result):
+    return (
+        f"{scale:>7} {name:<32} {result['rps']:9.1f} req/s  p50 {result['p50_ms']:8.2f} ms"
+        f"  p99 {result['p99_ms']:8.2f} ms  errors {result['errors']}"
+    )
+
+
+def compare(current, baseline, threshold):
+    """Return (lines, regressions) comparing two result files' "results"."""
+    lines, regressions = [], []
+    for scale, scenarios in current.items():
+        for name, result in scenarios.items():
+            base = baseline.get(scale, {}).get(name)
+            if base is None:
+                lines.append(f"{scale:>7} {name:<32} (no baseline)")
+                continue
+            changes = {
+                "p50": result["p50_ms"] / base["p50_ms"] - 1,
+                "p99": result["p99_ms"] / base["p99_ms"] - 1,
+                "rps": result["rps"] / base["rps"] - 1,
+            }
+            worse = [
+                key for key, change in changes.items()
+                if (change < -threshold if key == "rps" else change > threshold)
+            ]
+            flag = "REGRESSION " + ", ".join(worse) if worse else "ok"
+            lines.append(
+                f"{scale:>7} {name:<32} p50 {changes['p50']:+7.1%}  p99 {changes['p99']:+7.1%}"
+                f"  req/s {changes['rps']:+7.1%}  {flag}"
+            )
+            if worse:
+                regressions.append((scale, name, worse))
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="tiny,small", help=f"Comma-separated, from {', '.join(SCALES)}.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenario names.")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--cache-dir", help="Keep seeded databases here between runs.")
+    parser.add_argument("--save", help="Write the results as a JSON baseline.")
+    parser.add_argument("--compare", help="Baseline JSON to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed change, as a fraction.")
+    args = parser.parse_args()
+
+    scales = args.scales.split(",")
+    scenarios = args.scenarios.split(",")
+    unknown = [s for s in scales if s not in SCALES] + [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scale or scenario: {', '.join(unknown)}")
+
+    results = {scale: run_scale(scale, scenarios, args.iterations, args.warmup, args.cache_dir) for scale in scales}
+    report = {
+        "meta": {
+            "recorded_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.platform(),
+            "iterations": args.iterations,
+        },
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved results to {args.save}")
+
+    failed = any(r["errors"] for scenarios in results.values() for r in scenarios.values())
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        lines, regressions = compare(results, baseline["results"], args.threshold)
+        print(f"\nAgainst {args.compare} (recorded {baseline['meta']['recorded_at']}, threshold {args.threshold:.0%}):")
+        for line in lines:
+            print(line)
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
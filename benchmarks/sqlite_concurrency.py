@@ -0,0 +1,113 @@
+"""
+Read/write concurrency benchmark for the SQLite tuning in db.py.
+
+Runs the same mixed workload twice against a scratch copy of the schema:
+once with SQLite's defaults (rollback journal, no busy timeout) and once
+with the PRAGMAs the app applies. Reader threads run the teacher dashboard
+count while writer threads insert achievements; the report shows
+throughput and how many operations failed with "database is locked".
+
+    python benchmarks/sqlite_concurrency.py --readers 8 --writers 2 --seconds 5
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+import migrations  # noqa: E402
+
+READ_SQL = "SELECT COUNT(*), COUNT(DISTINCT student_id) FROM achievements WHERE teacher_id = ?"
+WRITE_SQL = """
+    INSERT INTO achievements (teacher_id, student_id, achievement_type, event_name,
+                              achievement_date, organizer, position)
+    VALUES (?, ?, 'hackathon', 'Bench Event', '2025-01-01', 'Bench Org', '1')
+"""
+
+
+def _prepare(db_path, rows):
+    migrations.upgrade(db_path)
+    connection = sqlite3.connect(db_path)
+    connection.executemany(
+        WRITE_SQL,
+        ((f"T{i % 20:03d}", f"S{i % 500:05d}") for i in range(rows)),
+    )
+    connection.commit()
+    connection.close()
+
+
+def _worker(db_path, pragmas, kind, stop, results, index):
+    # timeout=0 disables the Python-level retry so only busy_timeout applies
+    connection = sqlite3.connect(db_path, timeout=0, check_same_thread=False)
+    db.apply_pragmas(connection, pragmas)
+    ops = locked = 0
+    while not stop.is_set():
+        teacher = f"T{(ops + index) % 20:03d}"
+        try:
+            if kind == "read":
+                connection.execute(READ_SQL, (teacher,)).fetchone()
+            else:
+                with connection:
+                    connection.execute(WRITE_SQL, (teacher, f"S{ops % 500:05d}"))
+            ops += 1
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            locked += 1
+    connection.close()
+    results.append((kind, ops, locked))
+
+
+def run(label, journal_mode, pragmas, args):
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        db.set_journal_mode(db_path, journal_mode)
+        _prepare(db_path, args.rows)
+
+        stop = threading.Event()
+        results = []
+        threads = [
+            threading.Thread(target=_worker, args=(db_path, pragmas, kind, stop, results, i))
+            for i, kind in enumerate(["read"] * args.readers + ["write"] * args.writers)
+        ]
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+
+    totals = {}
+    for kind, ops, locked in results:
+        done, errors = totals.get(kind, (0, 0))
+        totals[kind] = (done + ops, errors + locked)
+    print(f"{label}:")
+    for kind in ("read", "write"):
+        done, errors = totals.get(kind, (0, 0))
+        print(f"  {kind:5s} {done / args.seconds:10.0f} ops/s   {errors} locked errors")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    run("default (rollback journal)", "DELETE", [], args)
+    run("tuned (db.DEFAULTS)", db.DEFAULTS["SQLITE_JOURNAL_MODE"], db.sqlite_pragmas(db.DEFAULTS), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Startup benchmark: time to import app.py and to serve the first request.
+
+Each run happens in a fresh interpreter against a scratch DB_PATH and
+UPLOAD_FOLDER, and checks that importing the app created neither. With
+the limits set it exits non-zero on a regression, so it can guard CI:
+
+    python benchmarks/startup.py --runs 5 --max-import-ms 800 --max-first-request-ms 200
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, os, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+untouched = not os.path.exists(os.environ["DB_PATH"]) and not os.path.exists(os.environ["UPLOAD_FOLDER"])
+response = app.app.test_client().get("/")
+served = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_request_ms": (served - imported) * 1000,
+    "status": response.status_code,
+    "untouched": untouched,
+}))
+"""
+
+
+def run_once():
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(
+            os.environ,
+            DB_PATH=os.path.join(scratch, "ams.db"),
+            UPLOAD_FOLDER=os.path.join(scratch, "uploads"),
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE], cwd=ROOT, env=env,
+            check=True, capture_output=True, text=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float)
+    parser.add_argument("--max-first-request-ms", type=float)
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.runs)]
+    import_ms = statistics.median(r["import_ms"] for r in results)
+    request_ms = statistics.median(r["first_request_ms"] for r in results)
+    print(f"import app.py      median {import_ms:8.1f} ms over {args.runs} run(s)")
+    print(f"first request (/)  median {request_ms:8.1f} ms")
+
+    failures = []
+    if not all(r["untouched"] for r in results):
+        failures.append("importing app created the database or upload folder")
+    if any(r["status"] != 200 for r in results):
+        failures.append("first request did not return 200")
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        failures.append(f"import took {import_ms:.1f} ms (limit {args.max_import_ms} ms)")
+    if args.max_first_request_ms is not None and request_ms > args.max_first_request_ms:
+        failures.append(f"first request took {request_ms:.1f} ms (limit {args.max_first_request_ms} ms)")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Certificate downloads (/certificates/<achievement_id>).
+
+Certificates and their thumbnails/previews are served here rather than by
+the static handler, so each request is checked against the achievement's
+student and teacher. Blobs are content-addressed: the SHA-256 in the path
+is used as a strong ETag and the response is marked immutable, so a
+browser fetches a certificate once. Range requests are honoured for large
+PDFs.
+
+CERTIFICATE_SENDFILE hands the byte transfer to the front proxy once the
+access check has passed:
+
+    ""                  stream the file from the Python worker (default)
+    "x-sendfile"        Apache mod_xsendfile / lighttpd: X-Sendfile: <path>
+    "x-accel-redirect"  nginx: X-Accel-Redirect: CERTIFICATE_ACCEL_PREFIX + <relpath>
+
+For nginx, CERTIFICATE_ACCEL_PREFIX must be an `internal` location aliased
+to UPLOAD_FOLDER.
+"""
+import os
+
+from flask import Blueprint, abort, current_app, redirect, request, session, url_for
+from werkzeug.utils import send_file
+
+import storage
+from db import get_db
+
+certificates = Blueprint("certificates", __name__, url_prefix="/certificates")
+
+# One year: the bytes behind a content-addressed path never change
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+VARIANTS = {
+    "certificate": "certificate_path",
+    "thumb": "thumbnail_path",
+    "preview": "preview_path",
+}
+
+
+# teacher_id of rows recorded before the column existed: migration 1 adds
+# it with DEFAULT 'unknown'
+LEGACY_TEACHER_IDS = (None, "unknown")
+
+
+def can_view(row):
+    if session.get("student_id"):
+        return row["student_id"] == session["student_id"]
+    if session.get("teacher_id"):
+        # Rows recorded before teacher_id existed are visible to all teachers
+        return row["teacher_id"] in LEGACY_TEACHER_IDS or row["teacher_id"] == session["teacher_id"]
+    return False
+
+
+def send_certificate(certificate_path, etag=None):
+    """
+    Send the stored file behind a static-relative certificate_path
+    ("uploads/..."). etag marks it as immutable content.
+    """
+    relpath = certificate_path.split("/", 1)[1]
+    path = storage.get_store().path(relpath)
+    if not os.path.isfile(path):
+        abort(404)
+
+    mode = current_app.config.get("CERTIFICATE_SENDFILE") or ""
+    response = send_file(
+        path,
+        request.environ,
+        use_x_sendfile=bool(mode),
+        etag=etag or True,
+        # The proxy serves ranges itself; Werkzeug would answer with an empty 206
+        conditional=not mode,
+        response_class=current_app.response_class,
+    )
+    if mode:
+        response = response.make_conditional(request.environ)
+        if response.status_code == 304:
+            response.headers.pop("X-Sendfile", None)
+        elif mode == "x-accel-redirect":
+            response.headers.pop("X-Sendfile", None)
+            prefix = current_app.config.get("CERTIFICATE_ACCEL_PREFIX", "/protected-uploads/")
+            response.headers["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + relpath
+
+    if etag:
+        response.cache_control.no_cache = None
+        response.cache_control.private = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        # Legacy uploads can be replaced in place; always revalidate
+        response.cache_control.private = True
+    return response
+
+
+@certificates.route("/<int:achievement_id>", defaults={"variant": "certificate"})
+@certificates.route("/<int:achievement_id>/<variant>")
+def download(achievement_id, variant):
+    if not session.get("logged_in"):
+        return redirect(url_for("home"))
+    column = VARIANTS.get(variant)
+    if column is None:
+        abort(404)
+
+    row = get_db().execute(
+        f"SELECT student_id, teacher_id, certificate_path, {column} AS path "
+        "FROM achievements WHERE id = ?",
+        (achievement_id,),
+    ).fetchone()
+    if row is None or not row["path"]:
+        abort(404)
+    if not can_view(row):
+        abort(403)
+
+    etag = storage.digest_from_path(row["certificate_path"])
+    if etag and variant != "certificate":
+        # Derivatives are named <digest>-<variant>.<ext> after their source blob
+        etag = row["path"].rsplit("/", 1)[-1]
+    return send_certificate(row["path"], etag=etag)
+
+
+def block_static_uploads():
+    # Uploads live under static/ for historical reasons; only serve them here
+    if request.endpoint == "static" and request.view_args.get("filename", "").startswith("uploads/"):
+        abort(404)
+
+
+def init_app(app):
+    app.config.setdefault("CERTIFICATE_SENDFILE", "")
+    app.config.setdefault("CERTIFICATE_ACCEL_PREFIX", "/protected-uploads/")
+    app.register_blueprint(certificates)
+    app.before_request(block_static_uploads)
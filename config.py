@@ -12,19 +12,49 @@ class Config:
         os.path.join(BASE_DIR, "ams.db")
     )
 
+    # Connection pool (per worker process)
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+    DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 5.0))
+
+    # SQLite tuning (applied to every pooled connection)
+    SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000))
+    SQLITE_CACHE_SIZE = int(os.environ.get("SQLITE_CACHE_SIZE", -16000))
+    SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 128 * 1024 * 1024))
+    SQLITE_TEMP_STORE = os.environ.get("SQLITE_TEMP_STORE", "MEMORY")
+
     # Uploads
     UPLOAD_FOLDER = os.environ.get(
         "UPLOAD_FOLDER",
         os.path.join(BASE_DIR, "static", "uploads")
     )
 
+    # Let the front proxy send certificate bytes: "", "x-sendfile" or "x-accel-redirect"
+    CERTIFICATE_SENDFILE = os.environ.get("CERTIFICATE_SENDFILE", "")
+    CERTIFICATE_ACCEL_PREFIX = os.environ.get("CERTIFICATE_ACCEL_PREFIX", "/protected-uploads/")
+
     # File upload rules
     ALLOWED_EXTENSIONS = {"pdf", "png", "jpg", "jpeg"}
 
     # Max upload size (5 MB)
     MAX_CONTENT_LENGTH = 5 * 1024 * 1024
 
+    # Requests slower than this are logged with their SQL statements (timing.py)
+    SLOW_REQUEST_MS = int(os.environ.get("SLOW_REQUEST_MS", 500))
 
+    # Background threads (per worker process) rendering certificate thumbnails
+    THUMBNAIL_WORKERS = int(os.environ.get("THUMBNAIL_WORKERS", 2))
+
+    # Fraction of requests to profile (see profiling.py); 0 disables sampling
+    PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+    PROFILE_MODE = os.environ.get("PROFILE_MODE", "sample")
+    PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(BASE_DIR, "profiles"))
+
+    # Comma-separated teacher ids allowed to export their whole department
+    EXPORT_DEPARTMENT_TEACHERS = frozenset(
+        filter(None, os.environ.get("EXPORT_DEPARTMENT_TEACHERS", "").split(","))
+    )
 
 
 class DevelopmentConfig(Config):
@@ -43,3 +73,10 @@ class ProductionConfig(Config):
                 "SECRET_KEY environment variable must be set in production"
             )
 
+
+# Selected with the APP_CONFIG environment variable (see app.create_app)
+CONFIGS = {
+    "default": Config,
+    "development": DevelopmentConfig,
+    "production": ProductionConfig,
+}
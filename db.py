@@ -0,0 +1,255 @@
+"""
+SQLite connection pool.
+
+Routes get their connection through get_db(), which checks one out of a
+per-process pool, binds it to flask.g and hands it back on app-context
+teardown. The pool is bounded: once DB_POOL_SIZE connections are checked
+out, further callers wait up to DB_POOL_TIMEOUT seconds for one to be
+released. A streamed response hands its connection over with
+release_on_close(), so it stays checked out until the body is closed.
+
+Every new connection gets the tuning PRAGMAs from the SQLITE_* config
+values (see DEFAULTS); the persistent journal mode is set once by
+set_journal_mode() when the database is initialised.
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from flask import current_app, g
+
+DEFAULTS = {
+    "DB_POOL_SIZE": 5,
+    "DB_POOL_TIMEOUT": 5.0,
+    # sqlite3.Connection subclass for pooled connections (timing.py sets one)
+    "DB_CONNECTION_FACTORY": None,
+    # WAL lets dashboard reads proceed while a submission is being written
+    "SQLITE_JOURNAL_MODE": "WAL",
+    # NORMAL is durable under WAL except for the last commits on power loss
+    "SQLITE_SYNCHRONOUS": "NORMAL",
+    "SQLITE_BUSY_TIMEOUT": 5000,
+    # Negative values are KiB rather than pages
+    "SQLITE_CACHE_SIZE": -16000,
+    "SQLITE_MMAP_SIZE": 128 * 1024 * 1024,
+    "SQLITE_TEMP_STORE": "MEMORY",
+}
+
+
+def sqlite_pragmas(config):
+    """Per-connection PRAGMAs built from the SQLITE_* settings in config."""
+    pragmas = [
+        ("busy_timeout", config.get("SQLITE_BUSY_TIMEOUT")),
+        ("synchronous", config.get("SQLITE_SYNCHRONOUS")),
+        ("cache_size", config.get("SQLITE_CACHE_SIZE")),
+        ("mmap_size", config.get("SQLITE_MMAP_SIZE")),
+        ("temp_store", config.get("SQLITE_TEMP_STORE")),
+    ]
+    return [(name, value) for name, value in pragmas if value is not None]
+
+
+def apply_pragmas(connection, pragmas):
+    for name, value in pragmas:
+        connection.execute(f"PRAGMA {name} = {value}")
+
+
+def set_journal_mode(db_path, mode):
+    """Set the (persistent) journal mode of db_path and return the mode in effect."""
+    connection = sqlite3.connect(db_path)
+    try:
+        return connection.execute(f"PRAGMA journal_mode = {mode}").fetchone()[0]
+    finally:
+        connection.close()
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """Raised when no pooled connection became free within the timeout."""
+
+
+class ConnectionPool:
+    def __init__(self, db_path, max_size=5, timeout=5.0, pragmas=(), factory=None):
+        self.db_path = db_path
+        self.factory = factory or sqlite3.Connection
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pragmas = list(pragmas)
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._size = 0
+        self._pid = os.getpid()
+        self._stats = {
+            "hits": 0,
+            "waits": 0,
+            "creations": 0,
+            "discarded": 0,
+            "timeouts": 0,
+        }
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _connect(self):
+        connection = sqlite3.connect(self.db_path, check_same_thread=False, factory=self.factory)
+        connection.row_factory = sqlite3.Row
+        apply_pragmas(connection, self.pragmas)
+        self._count("creations")
+        return connection
+
+    def _healthy(self, connection):
+        try:
+            connection.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._size -= 1
+            self._stats["discarded"] += 1
+
+    def _reset_after_fork(self):
+        # Connections must never be shared between a parent and a forked
+        # child (gunicorn --preload); the child starts with an empty pool.
+        self._idle = queue.LifoQueue()
+        with self._lock:
+            self._size = 0
+        self._pid = os.getpid()
+
+    def acquire(self):
+        if self._pid != os.getpid():
+            self._reset_after_fork()
+
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if self._healthy(connection):
+                self._count("hits")
+                return connection
+            self._discard(connection)
+
+        with self._lock:
+            can_create = self._size < self.max_size
+            if can_create:
+                self._size += 1
+        if can_create:
+            try:
+                return self._connect()
+            except sqlite3.Error:
+                with self._lock:
+                    self._size -= 1
+                raise
+
+        self._count("waits")
+        deadline = time.monotonic() + self.timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._count("timeouts")
+                raise PoolTimeout(
+                    f"No database connection available after {self.timeout}s "
+                    f"(pool size {self.max_size})"
+                )
+            try:
+                connection = self._idle.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if self._healthy(connection):
+                return connection
+            self._discard(connection)
+            with self._lock:
+                can_create = self._size < self.max_size
+                if can_create:
+                    self._size += 1
+            if can_create:
+                return self._connect()
+
+    def release(self, connection):
+        if self._pid != os.getpid():
+            return
+        if connection.in_transaction:
+            try:
+                connection.rollback()
+            except sqlite3.Error:
+                self._discard(connection)
+                return
+        self._idle.put(connection)
+
+    def close_all(self):
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(connection)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = self._size
+        stats["idle"] = self._idle.qsize()
+        stats["in_use"] = stats["size"] - stats["idle"]
+        stats["max_size"] = self.max_size
+        return stats
+
+
+def get_pool(app=None):
+    """Return the app's pool, creating it on first use."""
+    app = app or current_app._get_current_object()
+    pool = app.extensions.get("db_pool")
+    if pool is None or pool.db_path != app.config["DB_PATH"]:
+        if pool is not None:
+            pool.close_all()
+        pool = ConnectionPool(
+            app.config["DB_PATH"],
+            max_size=app.config["DB_POOL_SIZE"],
+            timeout=app.config["DB_POOL_TIMEOUT"],
+            pragmas=sqlite_pragmas(app.config),
+            factory=app.config["DB_CONNECTION_FACTORY"],
+        )
+        app.extensions["db_pool"] = pool
+    return pool
+
+
+def get_db():
+    """Return the connection bound to the current app context."""
+    if "db" not in g:
+        g.db = get_pool().acquire()
+    return g.db
+
+
+def close_db(exception=None):
+    connection = g.pop("db", None)
+    if connection is None:
+        return
+    if exception is not None and connection.in_transaction:
+        connection.rollback()
+    get_pool().release(connection)
+
+
+def release_on_close(response):
+    """
+    Keep the context's connection checked out until response is closed.
+
+    Streamed bodies are iterated after teardown_appcontext has run, so
+    close_db would otherwise return the connection (and any open cursor
+    or transaction) to the pool while the stream is still reading it.
+    """
+    connection = g.pop("db", None)
+    if connection is not None:
+        pool = get_pool()
+        response.call_on_close(lambda: pool.release(connection))
+    return response
+
+
+def init_app(app):
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    app.teardown_appcontext(close_db)
@@ -0,0 +1,408 @@
+"""
+Bulk exports for teachers.
+
+    /exports/certificates.zip?type=&from=&to=   every matching certificate plus manifest.csv
+    /exports/achievements.csv?type=&from=&to=&scope=department
+    /exports/achievements.xlsx?...              every achievements column, one row each
+
+    flask --app app export achievements --format xlsx --dept CSE -o cse.xlsx
+
+Spreadsheet exports on the web hold only the rows the teacher recorded,
+as in the API. Teachers listed in EXPORT_DEPARTMENT_TEACHERS may pass
+scope=department to export every row for their department's students;
+the CLI can export everything. Rows are stepped from the SQLite cursor
+in batches and written straight into the response (or file), so memory
+stays flat for millions of rows. XLSX is written by xlsx_stream() as a
+streamed ZIP of inline-string worksheets, without a spreadsheet library.
+
+The archive is produced while it is being sent: zipfile writes into a sink
+that the response generator drains after every chunk, so neither the ZIP
+nor any certificate is ever held whole in memory or on disk. Entries are
+stored uncompressed (PDF/JPEG/PNG are already compressed) with data
+descriptors, which zipfile emits on its own for unseekable output. Both
+passes over the achievements (manifest, then files) read one snapshot.
+"""
+import csv
+import datetime
+import io
+import itertools
+import os
+import re
+import sqlite3
+import sys
+import time
+import zipfile
+from xml.sax.saxutils import escape
+
+import click
+from flask import Blueprint, abort, current_app, redirect, request, session, stream_with_context, url_for
+from flask.cli import AppGroup
+from werkzeug.utils import secure_filename
+
+import queries
+import storage
+from db import get_db, release_on_close
+
+exports = Blueprint("exports", __name__, url_prefix="/exports")
+
+DEFAULTS = {
+    # Teacher ids allowed to export their whole department
+    "EXPORT_DEPARTMENT_TEACHERS": frozenset(),
+}
+CHUNK_SIZE = storage.CHUNK_SIZE
+MANIFEST_COLUMNS = (
+    "id", "student_id", "student_name", "achievement_type", "event_name",
+    "achievement_date", "organizer", "position", "achievement_description",
+    "certificate_path",
+)
+# Spreadsheet apps run a cell starting with one of these as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class _Sink:
+    """Write-only file object collecting what zipfile writes until drained."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        if chunks:
+            yield b"".join(chunks)
+
+
+def zip_stream(entries):
+    """
+    Yield a ZIP archive chunk by chunk. entries yields (zipinfo, chunks)
+    pairs; each entry's chunks are consumed lazily as the archive is read.
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w") as archive:
+        for info, chunks in entries:
+            with archive.open(info, "w") as entry:
+                for chunk in chunks:
+                    entry.write(chunk)
+                    yield from sink.drain()
+            yield from sink.drain()
+    yield from sink.drain()
+
+
+def read_chunks(path):
+    with open(path, "rb") as f:
+        yield from iter(lambda: f.read(CHUNK_SIZE), b"")
+
+
+def export_filters():
+    """type/from/to query arguments, validated; aborts 400 on bad input."""
+    achievement_type = request.args.get("type") or None
+    if achievement_type is not None and achievement_type not in queries.ACHIEVEMENT_TYPES:
+        abort(400, description=f"Unknown achievement type: {achievement_type}")
+    dates = {}
+    for arg, key in (("from", "date_from"), ("to", "date_to")):
+        value = request.args.get(arg) or None
+        if value is not None:
+            try:
+                value = datetime.date.fromisoformat(value).isoformat()
+            except ValueError:
+                abort(400, description=f"'{arg}' must be a YYYY-MM-DD date.")
+        dates[key] = value
+    return dict(dates, achievement_type=achievement_type)
+
+
+def archive_name(row):
+    """Path of an achievement's certificate inside the ZIP."""
+    ext = row["certificate_path"].rsplit(".", 1)[-1]
+    event = secure_filename(row["event_name"] or "") or "certificate"
+    return f"{secure_filename(row['student_id']) or 'student'}/{row['id']}_{event}.{ext}"
+
+
+def certificate_file(store, row):
+    if not row["certificate_path"]:
+        return None
+    path = store.path(row["certificate_path"].split("/", 1)[1])
+    return path if os.path.isfile(path) else None
+
+
+def spreadsheet_safe(value):
+    """Return value with a leading ' if a spreadsheet would run it as a formula."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_chunks(header, rows):
+    """Yield CSV text for header and rows, encoded in ~CHUNK_SIZE pieces."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow([spreadsheet_safe(value) for value in row])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def manifest_chunks(rows, store):
+    return csv_chunks(MANIFEST_COLUMNS + ("file",), (
+        [row[c] for c in MANIFEST_COLUMNS] + [archive_name(row) if certificate_file(store, row) else ""]
+        for row in rows
+    ))
+
+
+def certificate_entries(connection, teacher_id, filters, store):
+    def rows():
+        return queries.iter_teacher_achievements(connection, teacher_id, columns=MANIFEST_COLUMNS, **filters)
+
+    # Read both passes from one snapshot so the manifest matches the files
+    in_transaction = connection.in_transaction
+    if not in_transaction:
+        connection.execute("BEGIN")
+    try:
+        manifest = zipfile.ZipInfo("manifest.csv", time.localtime()[:6])
+        manifest.compress_type = zipfile.ZIP_DEFLATED
+        yield manifest, manifest_chunks(rows(), store)
+
+        for row in rows():
+            path = certificate_file(store, row)
+            if path is not None:
+                yield zipfile.ZipInfo.from_file(path, archive_name(row)), read_chunks(path)
+    finally:
+        if not in_transaction:
+            connection.commit()
+
+
+@exports.route("/certificates.zip")
+def certificates_zip():
+    if not session.get("logged_in"):
+        return redirect(url_for("teacher"))
+    teacher_id = session.get("teacher_id")
+    if not teacher_id:
+        abort(403)
+
+    filters = export_filters()
+    entries = certificate_entries(get_db(), teacher_id, filters, storage.get_store())
+    response = current_app.response_class(stream_with_context(zip_stream(entries)), mimetype="application/zip")
+    filename = f"certificates-{secure_filename(teacher_id)}-{datetime.date.today():%Y%m%d}.zip"
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return release_on_close(response)
+
+
+# Worksheet row limit in Excel; longer exports continue on further sheets
+XLSX_MAX_ROWS = 1048576
+# Characters XML 1.0 cannot carry at all
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+XLSX_PARTS = {
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+        'relationships/officeDocument" Target="xl/workbook.xml"/></Relationships>'
+    ),
+}
+
+
+def _column_letter(index):
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _xlsx_row(number, values, columns):
+    cells = []
+    for column, value in zip(columns, values):
+        if value is None or value == "":
+            continue
+        ref = f"{column}{number}"
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        else:
+            text = escape(_XML_ILLEGAL.sub("", str(spreadsheet_safe(value))))
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f'<row r="{number}">{"".join(cells)}</row>'
+
+
+def _sheet_chunks(header, rows):
+    columns = [_column_letter(i) for i in range(len(header))]
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<sheetData>',
+        _xlsx_row(1, header, columns),
+    ]
+    size = 0
+    for number, row in enumerate(rows, start=2):
+        part = _xlsx_row(number, row, columns)
+        parts.append(part)
+        size += len(part)
+        if size >= CHUNK_SIZE:
+            yield "".join(parts).encode()
+            parts, size = [], 0
+    parts.append("</sheetData></worksheet>")
+    yield "".join(parts).encode()
+
+
+def _xml_entry(name):
+    info = zipfile.ZipInfo(name, time.localtime()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+
+def xlsx_entries(header, rows, sheet_name="Achievements"):
+    """ZIP entries of a workbook; the sheets come first, the index after."""
+    rows = iter(rows)
+    sheets = 0
+    while True:
+        first = next(rows, None)
+        if first is None and sheets:
+            break
+        sheets += 1
+        chunk = itertools.islice(itertools.chain([] if first is None else [first], rows), XLSX_MAX_ROWS - 1)
+        yield _xml_entry(f"xl/worksheets/sheet{sheets}.xml"), _sheet_chunks(header, chunk)
+
+    names = [sheet_name if n == 1 else f"{sheet_name} {n}" for n in range(1, sheets + 1)]
+    workbook = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+        + "".join(f'<sheet name="{escape(name)}" sheetId="{n}" r:id="rId{n}"/>' for n, name in enumerate(names, 1))
+        + "</sheets></workbook>"
+    )
+    workbook_rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        + "".join(
+            f'<Relationship Id="rId{n}" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+            f'relationships/worksheet" Target="worksheets/sheet{n}.xml"/>'
+            for n in range(1, sheets + 1)
+        )
+        + "</Relationships>"
+    )
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        + "".join(
+            f'<Override PartName="/xl/worksheets/sheet{n}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for n in range(1, sheets + 1)
+        )
+        + "</Types>"
+    )
+    parts = dict(XLSX_PARTS, **{
+        "xl/workbook.xml": workbook,
+        "xl/_rels/workbook.xml.rels": workbook_rels,
+        "[Content_Types].xml": content_types,
+    })
+    for name, xml in parts.items():
+        yield _xml_entry(name), [xml.encode()]
+
+
+def xlsx_stream(header, rows):
+    return zip_stream(xlsx_entries(header, rows))
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", lambda rows: csv_chunks(queries.EXPORT_COLUMNS, rows)),
+    "xlsx": (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        lambda rows: xlsx_stream(queries.EXPORT_COLUMNS, rows),
+    ),
+}
+
+
+def export_rows(connection, filters):
+    """Export rows for filters, read inside one transaction."""
+    in_transaction = connection.in_transaction
+    if not in_transaction:
+        connection.execute("BEGIN")
+    try:
+        yield from queries.iter_export_rows(connection, filters)
+    finally:
+        if not in_transaction:
+            connection.commit()
+
+
+@exports.route("/achievements.<fmt>")
+def achievements_export(fmt):
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    if not session.get("logged_in"):
+        return redirect(url_for("teacher"))
+    if not session.get("teacher_id"):
+        abort(403)
+
+    filters = export_filters()
+    if request.args.get("scope") == "department":
+        dept = session.get("teacher_dept")
+        if not dept or session["teacher_id"] not in current_app.config["EXPORT_DEPARTMENT_TEACHERS"]:
+            abort(403)
+        filters["teacher_id"], filters["student_dept"] = None, dept
+    else:
+        filters["teacher_id"], filters["student_dept"] = session["teacher_id"], None
+
+    mimetype, render = EXPORT_FORMATS[fmt]
+    chunks = render(export_rows(get_db(), filters))
+    response = current_app.response_class(stream_with_context(chunks), mimetype=mimetype)
+    filename = f"achievements-{datetime.date.today():%Y%m%d}.{fmt}"
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return release_on_close(response)
+
+
+export_cli = AppGroup("export", help="Export data as spreadsheets.")
+
+
+@export_cli.command("achievements")
+@click.option("--format", "fmt", type=click.Choice(sorted(EXPORT_FORMATS)), default="csv", show_default=True)
+@click.option("-o", "--output", type=click.Path(dir_okay=False, writable=True),
+              help="File to write; CSV goes to stdout if omitted.")
+@click.option("--teacher", help="Only achievements recorded by this teacher_id.")
+@click.option("--dept", help="Only students of this department.")
+@click.option("--type", "achievement_type", type=click.Choice(sorted(queries.ACHIEVEMENT_TYPES)))
+@click.option("--from", "date_from", type=click.DateTime(["%Y-%m-%d"]))
+@click.option("--to", "date_to", type=click.DateTime(["%Y-%m-%d"]))
+def export_achievements_command(fmt, output, teacher, dept, achievement_type, date_from, date_to):
+    """Export achievements (every column) as CSV or XLSX."""
+    if output is None and fmt != "csv":
+        raise click.UsageError("XLSX needs --output.")
+    filters = {
+        "teacher_id": teacher,
+        "student_dept": dept,
+        "achievement_type": achievement_type,
+        "date_from": date_from and date_from.date().isoformat(),
+        "date_to": date_to and date_to.date().isoformat(),
+    }
+    connection = sqlite3.connect(current_app.config["DB_PATH"])
+    try:
+        chunks = EXPORT_FORMATS[fmt][1](export_rows(connection, filters))
+        out = open(output, "wb") if output else sys.stdout.buffer
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+        finally:
+            if output:
+                out.close()
+    finally:
+        connection.close()
+
+
+def init_app(app):
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    app.register_blueprint(exports)
+    app.cli.add_command(export_cli)
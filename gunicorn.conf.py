@@ -0,0 +1,46 @@
+"""
+gunicorn settings.
+
+    gunicorn -c gunicorn.conf.py
+
+The app is imported once in the master (preload_app) and forked into the
+workers, so each worker starts without re-importing Flask, the blueprints
+and the templates' dependencies. The database bootstrap runs once in the
+master before any worker exists. Connection pools and the thumbnail
+thread pool are per-process and recreated lazily after the fork (see
+db.ConnectionPool and thumbnails.get_executor).
+
+Metrics from all workers are aggregated through PROMETHEUS_MULTIPROC_DIR
+(see metrics.py). The directory is created and emptied as soon as this
+file is loaded: the preloaded app opens its files there during import,
+before on_starting runs.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Must be set before prometheus_client is imported by the preloaded app
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "ams-metrics"))
+shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+wsgi_app = "app:app"
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+
+
+def on_starting(server):
+    from app import app, init_db
+
+    init_db(app)
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    # Drop the dead worker's live gauges; its counters stay in the totals
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,256 @@
+"""
+Bulk CSV import of students, teachers and achievements.
+
+    flask --app app import students students.csv
+    flask --app app import achievements results.csv
+
+Teachers can also upload students or achievements at /imports; uploaded
+achievements are always recorded under the uploading teacher.
+
+The CSV is read row by row. Each row is validated on its own, and valid
+rows are inserted with executemany() in transactions of CHUNK_ROWS rows.
+A row that fails validation or a constraint (a duplicate student_id, an
+unknown student, ...) is reported with its row number and skipped; the
+rest of the file is still imported. Column names match the table columns.
+"""
+import csv
+import datetime
+import io
+import itertools
+import sqlite3
+
+import click
+from flask import Blueprint, current_app, redirect, render_template, request, session, url_for
+from flask.cli import with_appcontext
+
+import db
+import queries
+from db import get_db
+
+imports = Blueprint("imports", __name__, url_prefix="/imports")
+
+CHUNK_ROWS = 2000
+# Errors kept for the report; the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+# Stay under SQLite's bound-parameter limit in IN (...) lookups
+LOOKUP_BATCH = 500
+
+ACHIEVEMENT_COLUMNS = (
+    "teacher_id", "student_id", "achievement_type", "event_name", "achievement_date",
+    "organizer", "position", "achievement_description",
+    "symposium_theme", "programming_language", "coding_platform", "paper_title",
+    "journal_name", "conference_level", "conference_role", "team_size",
+    "project_title", "database_type", "difficulty_level", "other_description",
+)
+
+KINDS = {
+    "students": {
+        "table": "student",
+        "columns": ("student_name", "student_id", "email", "phone_number",
+                    "password", "student_gender", "student_dept"),
+        "required": ("student_name", "student_id", "email", "password"),
+    },
+    "teachers": {
+        "table": "teacher",
+        "columns": ("teacher_name", "teacher_id", "email", "phone_number",
+                    "password", "teacher_gender", "teacher_dept"),
+        "required": ("teacher_name", "teacher_id", "email", "password"),
+    },
+    "achievements": {
+        "table": "achievements",
+        "columns": ACHIEVEMENT_COLUMNS,
+        "required": ("teacher_id", "student_id", "achievement_type", "event_name",
+                     "achievement_date", "organizer", "position"),
+    },
+}
+# What a teacher may upload through the web form
+WEB_KINDS = ("students", "achievements")
+
+
+class InvalidImport(ValueError):
+    """The file cannot be imported at all (e.g. its header is wrong)."""
+
+
+class ImportReport:
+    def __init__(self):
+        self.inserted = 0
+        self.error_count = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+def clean_row(kind, raw, overrides):
+    """Return the row's values in column order; ValueError if invalid."""
+    if None in raw:
+        raise ValueError("more fields than the header")
+    spec = KINDS[kind]
+    row = {c: (raw.get(c) or "").strip() or None for c in spec["columns"]}
+    row.update(overrides)
+
+    missing = [c for c in spec["required"] if row[c] is None]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    if "email" in row and "@" not in row["email"]:
+        raise ValueError(f"invalid email {row['email']!r}")
+    if kind == "achievements":
+        if row["achievement_type"] not in queries.ACHIEVEMENT_TYPES:
+            raise ValueError(f"unknown achievement_type {row['achievement_type']!r}")
+        try:
+            row["achievement_date"] = datetime.date.fromisoformat(row["achievement_date"]).isoformat()
+        except ValueError:
+            raise ValueError(f"achievement_date {row['achievement_date']!r} is not YYYY-MM-DD")
+        if row["team_size"] is not None:
+            try:
+                row["team_size"] = int(row["team_size"])
+            except ValueError:
+                raise ValueError(f"team_size {row['team_size']!r} is not a number")
+    return tuple(row[c] for c in spec["columns"])
+
+
+def _existing(connection, table, column, values):
+    values = list(values)
+    found = set()
+    for start in range(0, len(values), LOOKUP_BATCH):
+        batch = values[start:start + LOOKUP_BATCH]
+        placeholders = ", ".join("?" * len(batch))
+        found.update(row[0] for row in connection.execute(
+            f"SELECT {column} FROM {table} WHERE {column} IN ({placeholders})", batch
+        ))
+    return found
+
+
+def _check_references(connection, rows, report):
+    """Drop achievements whose student or teacher does not exist."""
+    columns = ACHIEVEMENT_COLUMNS
+    student_at, teacher_at = columns.index("student_id"), columns.index("teacher_id")
+    students = _existing(connection, "student", "student_id", {v[student_at] for _, v in rows})
+    teachers = _existing(connection, "teacher", "teacher_id", {v[teacher_at] for _, v in rows})
+    valid = []
+    for line, values in rows:
+        if values[student_at] not in students:
+            report.error(line, f"unknown student_id {values[student_at]!r}")
+        elif values[teacher_at] not in teachers:
+            report.error(line, f"unknown teacher_id {values[teacher_at]!r}")
+        else:
+            valid.append((line, values))
+    return valid
+
+
+def _insert_chunk(connection, sql, rows, report):
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        try:
+            connection.executemany(sql, [values for _, values in rows])
+            report.inserted += len(rows)
+        except sqlite3.IntegrityError:
+            # Replay the chunk row by row to pin each conflict on its row
+            connection.rollback()
+            connection.execute("BEGIN IMMEDIATE")
+            for line, values in rows:
+                try:
+                    connection.execute(sql, values)
+                except sqlite3.IntegrityError as e:
+                    report.error(line, str(e))
+                else:
+                    report.inserted += 1
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+
+
+def import_csv(connection, kind, text, overrides=None, chunk_rows=CHUNK_ROWS):
+    """
+    Import CSV rows of kind ("students", "teachers", "achievements") from the
+    text stream. overrides forces column values on every row. Returns an
+    ImportReport; raises InvalidImport if the header is unusable.
+    """
+    spec = KINDS[kind]
+    overrides = overrides or {}
+    reader = csv.DictReader(text)
+    header = set(reader.fieldnames or ())
+    unknown = sorted(header - set(spec["columns"]))
+    if unknown:
+        raise InvalidImport(f"Unknown columns: {', '.join(unknown)}")
+    missing = [c for c in spec["required"] if c not in header and c not in overrides]
+    if missing:
+        raise InvalidImport(f"Missing columns: {', '.join(missing)}")
+
+    columns = spec["columns"]
+    sql = f"INSERT INTO {spec['table']} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    report = ImportReport()
+    # Rows are numbered as in a spreadsheet, the header being row 1
+    numbered = enumerate(reader, start=2)
+    while True:
+        chunk = list(itertools.islice(numbered, chunk_rows))
+        if not chunk:
+            break
+        rows = []
+        for line, raw in chunk:
+            try:
+                rows.append((line, clean_row(kind, raw, overrides)))
+            except ValueError as e:
+                report.error(line, str(e))
+        if kind == "achievements":
+            rows = _check_references(connection, rows, report)
+        if rows:
+            _insert_chunk(connection, sql, rows, report)
+    report.errors.sort()
+    return report
+
+
+@imports.route("/", methods=["GET", "POST"])
+def upload():
+    if not session.get("logged_in") or not session.get("teacher_id"):
+        return redirect(url_for("teacher"))
+
+    if request.method == "GET":
+        return render_template("import_data.html", kinds=WEB_KINDS)
+
+    kind = request.form.get("kind")
+    file = request.files.get("file")
+    if kind not in WEB_KINDS or not file or not file.filename:
+        return render_template("import_data.html", kinds=WEB_KINDS, error="Choose what to import and a CSV file."), 400
+
+    overrides = {"teacher_id": session["teacher_id"]} if kind == "achievements" else {}
+    file.stream.seek(0)
+    text = io.TextIOWrapper(file.stream, encoding="utf-8-sig", newline="")
+    try:
+        report = import_csv(get_db(), kind, text, overrides)
+    except (InvalidImport, UnicodeDecodeError, csv.Error) as e:
+        return render_template("import_data.html", kinds=WEB_KINDS, kind=kind, error=str(e)), 400
+    finally:
+        text.detach()
+    return render_template("import_data.html", kinds=WEB_KINDS, kind=kind, report=report)
+
+
+@click.command("import")
+@click.argument("kind", type=click.Choice(sorted(KINDS)))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@with_appcontext
+def import_command(kind, path):
+    """Import students, teachers or achievements from a CSV file."""
+    connection = sqlite3.connect(current_app.config["DB_PATH"])
+    db.apply_pragmas(connection, db.sqlite_pragmas(current_app.config))
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            report = import_csv(connection, kind, f)
+    except InvalidImport as e:
+        raise click.ClickException(str(e))
+    finally:
+        connection.close()
+
+    for line, message in report.errors:
+        click.echo(f"row {line}: {message}", err=True)
+    if report.error_count > len(report.errors):
+        click.echo(f"... {report.error_count - len(report.errors)} more error(s)", err=True)
+    click.echo(f"Imported {report.inserted} {kind}; {report.error_count} row(s) skipped.")
+
+
+def init_app(app):
+    app.register_blueprint(imports)
+    app.cli.add_command(import_command)
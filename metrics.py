@@ -0,0 +1,128 @@
+"""
+Prometheus metrics at /metrics.
+
+    ams_request_duration_seconds{endpoint,method}   request latency
+    ams_requests_total{endpoint,method,status}
+    ams_db_query_duration_seconds                   per SQL statement (see timing.py)
+    ams_db_pool_connections{state}                  idle / in_use, summed over live workers
+    ams_db_pool_waits, ams_db_pool_timeouts         checkouts that had to wait / gave up
+    ams_upload_bytes, ams_upload_duration_seconds   stored certificates
+    ams_logins_total{role,outcome}
+
+Under gunicorn every worker is a separate process. When
+PROMETHEUS_MULTIPROC_DIR is set (gunicorn.conf.py does this), each
+process writes its samples to mmap'd files in that directory and a scrape
+of any worker aggregates all of them; otherwise the in-process registry
+is served. Recording a sample is a few microseconds and does no I/O
+beyond the mmap write.
+
+Set METRICS_TOKEN to require "Authorization: Bearer <token>" on /metrics.
+Needs prometheus_client; without it the endpoint is not registered.
+"""
+import hmac
+import os
+import time
+
+from flask import abort, current_app, g, request
+
+from signals import certificate_stored, login_attempted, query_executed
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+        generate_latest, multiprocess,
+    )
+except ImportError:  # metrics are optional
+    Histogram = None
+
+if Histogram is not None:
+    REQUEST_LATENCY = Histogram(
+        "ams_request_duration_seconds", "Request latency by endpoint.", ["endpoint", "method"],
+    )
+    REQUESTS = Counter(
+        "ams_requests", "Requests by endpoint and status.", ["endpoint", "method", "status"],
+    )
+    QUERY_LATENCY = Histogram(
+        "ams_db_query_duration_seconds", "SQLite statement latency.",
+        buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+    )
+    POOL_CONNECTIONS = Gauge(
+        "ams_db_pool_connections", "Pooled SQLite connections by state.", ["state"],
+        multiprocess_mode="livesum",
+    )
+    POOL_WAITS = Gauge(
+        "ams_db_pool_waits", "Connection checkouts that had to wait (live workers).",
+        multiprocess_mode="livesum",
+    )
+    POOL_TIMEOUTS = Gauge(
+        "ams_db_pool_timeouts", "Connection checkouts that timed out (live workers).",
+        multiprocess_mode="livesum",
+    )
+    UPLOAD_BYTES = Histogram(
+        "ams_upload_bytes", "Size of stored certificate uploads.",
+        buckets=(16 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024, 2 * 1024 * 1024, 5 * 1024 * 1024),
+    )
+    UPLOAD_DURATION = Histogram(
+        "ams_upload_duration_seconds", "Time from first upload byte to stored certificate.",
+    )
+    LOGINS = Counter("ams_logins", "Login attempts.", ["role", "outcome"])
+
+
+def _start_request():
+    g.metrics_start = time.perf_counter()
+
+
+def _record_request(response):
+    start = g.pop("metrics_start", None)
+    if start is None or request.endpoint == "metrics":
+        return response
+    # Unrouted paths share one label so 404 scans cannot blow up cardinality
+    endpoint = request.endpoint or "unmatched"
+    REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - start)
+    REQUESTS.labels(endpoint, request.method, str(response.status_code)).inc()
+
+    pool = current_app.extensions.get("db_pool")
+    if pool is not None:
+        stats = pool.stats()
+        POOL_CONNECTIONS.labels("idle").set(stats["idle"])
+        POOL_CONNECTIONS.labels("in_use").set(stats["in_use"])
+        POOL_WAITS.set(stats["waits"])
+        POOL_TIMEOUTS.set(stats["timeouts"])
+    return response
+
+
+def _record_query(sender, sql, elapsed, **extra):
+    QUERY_LATENCY.observe(elapsed)
+
+
+def _record_upload(sender, size, elapsed, **extra):
+    UPLOAD_BYTES.observe(size)
+    UPLOAD_DURATION.observe(elapsed)
+
+
+def _record_login(sender, role, success, **extra):
+    LOGINS.labels(role, "success" if success else "failure").inc()
+
+
+def metrics_view():
+    token = current_app.config.get("METRICS_TOKEN")
+    if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        abort(401)
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return current_app.response_class(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+def init_app(app):
+    app.config.setdefault("METRICS_TOKEN", None)
+    if Histogram is None:
+        return
+    app.before_request(_start_request)
+    app.after_request(_record_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
+    query_executed.connect(_record_query, app)
+    certificate_stored.connect(_record_upload, app)
+    login_attempted.connect(_record_login, app)
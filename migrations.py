@@ -0,0 +1,515 @@
+"""
+Versioned schema migrations for ams.db.
+
+The schema version lives in SQLite's PRAGMA user_version. Each migration is
+registered with @migration(version, description) and runs exactly once, in
+version order, inside its own transaction together with the user_version
+bump. upgrade() is called once at startup; request handlers never touch the
+schema.
+
+    flask --app app db upgrade     # apply pending migrations
+    flask --app app db status      # show current and pending versions
+    flask --app app db rebuild-stats   # recompute teacher_stats
+"""
+import sqlite3
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def register(func):
+        if any(m[0] == version for m in MIGRATIONS):
+            raise ValueError(f"Duplicate migration version {version}")
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return register
+
+
+def _columns(connection, table):
+    return {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+
+
+@migration(1, "base schema: student, teacher, achievements")
+def _base_schema(connection):
+    connection.execute("""
+    CREATE TABLE IF NOT EXISTS student (
+        student_name TEXT NOT NULL,
+        student_id TEXT PRIMARY KEY,
+        email TEXT UNIQUE NOT NULL,
+        phone_number TEXT,
+        password TEXT NOT NULL,
+        student_gender TEXT,
+        student_dept TEXT
+    )
+    """)
+
+    connection.execute("""
+    CREATE TABLE IF NOT EXISTS teacher (
+        teacher_name TEXT NOT NULL,
+        teacher_id TEXT PRIMARY KEY,
+        email TEXT UNIQUE NOT NULL,
+        phone_number TEXT,
+        password TEXT NOT NULL,
+        teacher_gender TEXT,
+        teacher_dept TEXT
+    )
+    """)
+
+    connection.execute("""
+    CREATE TABLE IF NOT EXISTS achievements (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        teacher_id TEXT NOT NULL,
+        student_id TEXT NOT NULL,
+        achievement_type TEXT NOT NULL,
+        event_name TEXT NOT NULL,
+        achievement_date DATE NOT NULL,
+        organizer TEXT NOT NULL,
+        position TEXT NOT NULL,
+        achievement_description TEXT,
+        certificate_path TEXT,
+
+        symposium_theme TEXT,
+        programming_language TEXT,
+        coding_platform TEXT,
+        paper_title TEXT,
+        journal_name TEXT,
+        conference_level TEXT,
+        conference_role TEXT,
+        team_size INTEGER,
+        project_title TEXT,
+        database_type TEXT,
+        difficulty_level TEXT,
+        other_description TEXT,
+
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (student_id) REFERENCES student(student_id),
+        FOREIGN KEY (teacher_id) REFERENCES teacher(teacher_id)
+    )
+    """)
+
+    # Databases created before teacher_id/created_at existed
+    columns = _columns(connection, "achievements")
+    if "teacher_id" not in columns:
+        connection.execute("ALTER TABLE achievements ADD COLUMN teacher_id TEXT DEFAULT 'unknown'")
+    if "created_at" not in columns:
+        connection.execute("ALTER TABLE achievements ADD COLUMN created_at TEXT")
+        connection.execute("UPDATE achievements SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
+
+
+@migration(2, "indexes for teacher dashboard and all-achievements")
+def _achievement_indexes(connection):
+    # teacher_id leads every index: each hot query is a range scan over one
+    # teacher's rows. (teacher_id, student_id) covers COUNT(DISTINCT student_id).
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_achievements_teacher_created ON achievements (teacher_id, created_at)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_achievements_teacher_date ON achievements (teacher_id, achievement_date)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_achievements_teacher_student ON achievements (teacher_id, student_id)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_achievements_student ON achievements (student_id)")
+    connection.execute("ANALYZE achievements")
+
+
+@migration(3, "covering index for single-pass teacher stats")
+def _teacher_stats_index(connection):
+    # Served the original COUNT-based teacher stats from the index; since
+    # migration 4 those come from teacher_stats and migration 10 drops it.
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_achievements_teacher_stats ON achievements (teacher_id, student_id, achievement_date)")
+    connection.execute("DROP INDEX IF EXISTS idx_achievements_teacher_student")
+
+
+# Per-teacher summary counters, maintained by the triggers below so the
+# dashboard reads a handful of rows instead of scanning achievements.
+# teacher_student_counts lets a delete know whether it removed a teacher's
+# last achievement for a student; teacher_daily_counts backs "this week".
+TEACHER_STATS_TABLES = """
+CREATE TABLE IF NOT EXISTS teacher_stats (
+    teacher_id TEXT PRIMARY KEY,
+    total INTEGER NOT NULL DEFAULT 0,
+    students INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS teacher_student_counts (
+    teacher_id TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    n INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (teacher_id, student_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS teacher_daily_counts (
+    teacher_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    n INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (teacher_id, day)
+) WITHOUT ROWID;
+"""
+
+
+def _stats_add(row):
+    return f"""
+    INSERT OR IGNORE INTO teacher_stats (teacher_id) VALUES ({row}.teacher_id);
+    INSERT OR IGNORE INTO teacher_student_counts (teacher_id, student_id)
+        VALUES ({row}.teacher_id, {row}.student_id);
+    UPDATE teacher_stats
+        SET total = total + 1,
+            students = students + (SELECT n = 0 FROM teacher_student_counts
+                                   WHERE teacher_id = {row}.teacher_id AND student_id = {row}.student_id)
+        WHERE teacher_id = {row}.teacher_id;
+    UPDATE teacher_student_counts SET n = n + 1
+        WHERE teacher_id = {row}.teacher_id AND student_id = {row}.student_id;
+    INSERT OR IGNORE INTO teacher_daily_counts (teacher_id, day)
+        VALUES ({row}.teacher_id, {row}.achievement_date);
+    UPDATE teacher_daily_counts SET n = n + 1
+        WHERE teacher_id = {row}.teacher_id AND day = {row}.achievement_date;
+    """
+
+
+def _stats_remove(row):
+    return f"""
+    UPDATE teacher_student_counts SET n = n - 1
+        WHERE teacher_id = {row}.teacher_id AND student_id = {row}.student_id;
+    UPDATE teacher_stats
+        SET total = total - 1,
+            students = students - (SELECT n = 0 FROM teacher_student_counts
+                                   WHERE teacher_id = {row}.teacher_id AND student_id = {row}.student_id)
+        WHERE teacher_id = {row}.teacher_id;
+    DELETE FROM teacher_student_counts
+        WHERE teacher_id = {row}.teacher_id AND student_id = {row}.student_id AND n <= 0;
+    UPDATE teacher_daily_counts SET n = n - 1
+        WHERE teacher_id = {row}.teacher_id AND day = {row}.achievement_date;
+    DELETE FROM teacher_daily_counts
+        WHERE teacher_id = {row}.teacher_id AND day = {row}.achievement_date AND n <= 0;
+    """
+
+
+# Rows without a teacher_id (pre-teacher_id data) are not tracked.
+TEACHER_STATS_TRIGGERS = f"""
+CREATE TRIGGER IF NOT EXISTS achievements_stats_insert
+AFTER INSERT ON achievements WHEN NEW.teacher_id IS NOT NULL
+BEGIN {_stats_add("NEW")} END;
+
+CREATE TRIGGER IF NOT EXISTS achievements_stats_delete
+AFTER DELETE ON achievements WHEN OLD.teacher_id IS NOT NULL
+BEGIN {_stats_remove("OLD")} END;
+
+CREATE TRIGGER IF NOT EXISTS achievements_stats_update_old
+AFTER UPDATE OF teacher_id, student_id, achievement_date ON achievements
+WHEN OLD.teacher_id IS NOT NULL
+BEGIN {_stats_remove("OLD")} END;
+
+CREATE TRIGGER IF NOT EXISTS achievements_stats_update_new
+AFTER UPDATE OF teacher_id, student_id, achievement_date ON achievements
+WHEN NEW.teacher_id IS NOT NULL
+BEGIN {_stats_add("NEW")} END;
+"""
+
+
+def _execute_script(connection, script):
+    # executescript() would COMMIT the migration's transaction first
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            connection.execute(statement)
+            statement = ""
+
+
+def rebuild_teacher_stats(connection):
+    """
+    Recompute the teacher summary tables from achievements. Returns the
+    number of teachers whose stored (total, students) row was wrong.
+    """
+    before = {
+        row[0]: (row[1], row[2])
+        for row in connection.execute("SELECT teacher_id, total, students FROM teacher_stats")
+    }
+    connection.execute("DELETE FROM teacher_stats")
+    connection.execute("DELETE FROM teacher_student_counts")
+    connection.execute("DELETE FROM teacher_daily_counts")
+    connection.execute("""
+        INSERT INTO teacher_student_counts (teacher_id, student_id, n)
+        SELECT teacher_id, student_id, COUNT(*) FROM achievements
+        WHERE teacher_id IS NOT NULL
+        GROUP BY teacher_id, student_id
+    """)
+    connection.execute("""
+        INSERT INTO teacher_stats (teacher_id, total, students)
+        SELECT teacher_id, SUM(n), COUNT(*) FROM teacher_student_counts
+        GROUP BY teacher_id
+    """)
+    connection.execute("""
+        INSERT INTO teacher_daily_counts (teacher_id, day, n)
+        SELECT teacher_id, achievement_date, COUNT(*) FROM achievements
+        WHERE teacher_id IS NOT NULL
+        GROUP BY teacher_id, achievement_date
+    """)
+    after = {
+        row[0]: (row[1], row[2])
+        for row in connection.execute("SELECT teacher_id, total, students FROM teacher_stats")
+    }
+    return sum(1 for t in before.keys() | after.keys() if before.get(t) != after.get(t))
+
+
+@migration(4, "trigger-maintained teacher_stats summary tables")
+def _teacher_stats(connection):
+    _execute_script(connection, TEACHER_STATS_TABLES)
+    _execute_script(connection, TEACHER_STATS_TRIGGERS)
+    rebuild_teacher_stats(connection)
+
+
+@migration(5, "index for type-filtered achievement listings")
+def _teacher_type_index(connection):
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_achievements_teacher_type_date ON achievements (teacher_id, achievement_type, achievement_date)")
+
+
+# A single counter bumped by every write that can change what a listing or
+# stats response contains. The JSON API derives its ETags from it, so a
+# conditional request is answered without running the query.
+DATA_VERSION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS data_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+
+INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0);
+
+CREATE TRIGGER IF NOT EXISTS achievements_version_insert AFTER INSERT ON achievements
+BEGIN UPDATE data_version SET version = version + 1 WHERE id = 1; END;
+
+CREATE TRIGGER IF NOT EXISTS achievements_version_update AFTER UPDATE ON achievements
+BEGIN UPDATE data_version SET version = version + 1 WHERE id = 1; END;
+
+CREATE TRIGGER IF NOT EXISTS achievements_version_delete AFTER DELETE ON achievements
+BEGIN UPDATE data_version SET version = version + 1 WHERE id = 1; END;
+
+CREATE TRIGGER IF NOT EXISTS student_version_update AFTER UPDATE ON student
+BEGIN UPDATE data_version SET version = version + 1 WHERE id = 1; END;
+
+CREATE TRIGGER IF NOT EXISTS student_version_delete AFTER DELETE ON student
+BEGIN UPDATE data_version SET version = version + 1 WHERE id = 1; END;
+"""
+
+
+@migration(6, "data_version counter and per-student listing index")
+def _data_version(connection):
+    _execute_script(connection, DATA_VERSION_SCHEMA)
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_achievements_student_date ON achievements (student_id, achievement_date)")
+    connection.execute("DROP INDEX IF EXISTS idx_achievements_student")
+
+
+# Cached per-student dashboard summaries (see queries.student_summary). The
+# triggers drop a student's entry in the same transaction as any write to
+# their achievements, so every worker process sees the invalidation.
+STUDENT_SUMMARY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS student_summary_cache (
+    student_id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS achievements_summary_insert AFTER INSERT ON achievements
+BEGIN DELETE FROM student_summary_cache WHERE student_id = NEW.student_id; END;
+
+CREATE TRIGGER IF NOT EXISTS achievements_summary_update AFTER UPDATE ON achievements
+BEGIN
+    DELETE FROM student_summary_cache WHERE student_id = OLD.student_id;
+    DELETE FROM student_summary_cache WHERE student_id = NEW.student_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS achievements_summary_delete AFTER DELETE ON achievements
+BEGIN DELETE FROM student_summary_cache WHERE student_id = OLD.student_id; END;
+"""
+
+
+@migration(7, "student_summary_cache for student dashboards")
+def _student_summary_cache(connection):
+    _execute_script(connection, STUDENT_SUMMARY_SCHEMA)
+
+
+@migration(8, "certificate thumbnail and preview paths")
+def _certificate_derivatives(connection):
+    columns = _columns(connection, "achievements")
+    if "thumbnail_path" not in columns:
+        connection.execute("ALTER TABLE achievements ADD COLUMN thumbnail_path TEXT")
+    if "preview_path" not in columns:
+        connection.execute("ALTER TABLE achievements ADD COLUMN preview_path TEXT")
+
+
+# External-content FTS5 index over the free-text achievement columns. The
+# update trigger only fires for those columns, so thumbnail writes and the
+# like do not touch the index. prefix='2 3' makes short prefix queries
+# (hack*, con*) index lookups rather than term scans.
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS achievements_fts USING fts5(
+    event_name, organizer, achievement_description,
+    paper_title, project_title, other_description,
+    content='achievements', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS achievements_fts_insert AFTER INSERT ON achievements
+BEGIN
+    INSERT INTO achievements_fts (rowid, event_name, organizer, achievement_description,
+                                  paper_title, project_title, other_description)
+    VALUES (NEW.id, NEW.event_name, NEW.organizer, NEW.achievement_description,
+            NEW.paper_title, NEW.project_title, NEW.other_description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS achievements_fts_delete AFTER DELETE ON achievements
+BEGIN
+    INSERT INTO achievements_fts (achievements_fts, rowid, event_name, organizer, achievement_description,
+                                  paper_title, project_title, other_description)
+    VALUES ('delete', OLD.id, OLD.event_name, OLD.organizer, OLD.achievement_description,
+            OLD.paper_title, OLD.project_title, OLD.other_description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS achievements_fts_update
+AFTER UPDATE OF event_name, organizer, achievement_description,
+                paper_title, project_title, other_description ON achievements
+BEGIN
+    INSERT INTO achievements_fts (achievements_fts, rowid, event_name, organizer, achievement_description,
+                                  paper_title, project_title, other_description)
+    VALUES ('delete', OLD.id, OLD.event_name, OLD.organizer, OLD.achievement_description,
+            OLD.paper_title, OLD.project_title, OLD.other_description);
+    INSERT INTO achievements_fts (rowid, event_name, organizer, achievement_description,
+                                  paper_title, project_title, other_description)
+    VALUES (NEW.id, NEW.event_name, NEW.organizer, NEW.achievement_description,
+            NEW.paper_title, NEW.project_title, NEW.other_description);
+END;
+"""
+
+
+@migration(9, "achievements_fts full-text index")
+def _full_text_search(connection):
+    _execute_script(connection, SEARCH_SCHEMA)
+    connection.execute("INSERT INTO achievements_fts (achievements_fts) VALUES ('rebuild')")
+
+
+@migration(10, "drop idx_achievements_teacher_stats")
+def _drop_teacher_stats_index(connection):
+    # Dashboard stats are read from the trigger-maintained summary tables,
+    # so the index only cost a b-tree write per insert. rebuild_teacher_stats
+    # sorts once instead.
+    connection.execute("DROP INDEX IF EXISTS idx_achievements_teacher_stats")
+
+
+# Every achievements column except the derivative paths, which the
+# thumbnail workers fill in after the upload. A column added by a later
+# migration must be added here (in a new migration) to invalidate caches.
+CONTENT_COLUMNS = """
+    id, teacher_id, student_id, achievement_type, event_name, achievement_date,
+    organizer, position, achievement_description, certificate_path,
+    symposium_theme, programming_language, coding_platform, paper_title,
+    journal_name, conference_level, conference_role, team_size,
+    project_title, database_type, difficulty_level, other_description, created_at
+"""
+
+CONTENT_UPDATE_TRIGGERS = f"""
+DROP TRIGGER IF EXISTS achievements_version_update;
+DROP TRIGGER IF EXISTS achievements_summary_update;
+
+CREATE TRIGGER achievements_version_update AFTER UPDATE OF {CONTENT_COLUMNS} ON achievements
+BEGIN UPDATE data_version SET version = version + 1 WHERE id = 1; END;
+
+CREATE TRIGGER achievements_summary_update AFTER UPDATE OF {CONTENT_COLUMNS} ON achievements
+BEGIN
+    DELETE FROM student_summary_cache WHERE student_id = OLD.student_id;
+    DELETE FROM student_summary_cache WHERE student_id = NEW.student_id;
+END;
+"""
+
+
+@migration(11, "skip cache invalidation for thumbnail/preview updates")
+def _content_update_triggers(connection):
+    _execute_script(connection, CONTENT_UPDATE_TRIGGERS)
+
+
+def current_version(connection):
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def latest_version():
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def pending(connection):
+    version = current_version(connection)
+    return [m for m in MIGRATIONS if m[0] > version]
+
+
+def upgrade(db_path, target=None, echo=None):
+    """
+    Apply every migration newer than the database's user_version (up to
+    target, if given). Returns the list of versions applied.
+    """
+    connection = sqlite3.connect(db_path, isolation_level=None)
+    applied = []
+    try:
+        for version, description, func in pending(connection):
+            if target is not None and version > target:
+                break
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                # Another worker may have migrated while we waited for the lock
+                if current_version(connection) >= version:
+                    connection.execute("ROLLBACK")
+                    continue
+                func(connection)
+                connection.execute(f"PRAGMA user_version = {int(version)}")
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            applied.append(version)
+            if echo:
+                echo(f"Applied migration {version}: {description}")
+    finally:
+        connection.close()
+    return applied
+
+
+db_cli = AppGroup("db", help="Database schema management.")
+
+
+@db_cli.command("upgrade")
+@click.option("--to", "target", type=int, default=None, help="Stop at this version.")
+def upgrade_command(target):
+    """Apply pending migrations."""
+    applied = upgrade(current_app.config["DB_PATH"], target=target, echo=click.echo)
+    if not applied:
+        click.echo("Database is up to date.")
+
+
+@db_cli.command("status")
+def status_command():
+    """Show the schema version and pending migrations."""
+    connection = sqlite3.connect(current_app.config["DB_PATH"])
+    try:
+        click.echo(f"Current version: {current_version(connection)}")
+        click.echo(f"Latest version: {latest_version()}")
+        for version, description, _ in pending(connection):
+            click.echo(f"  pending {version}: {description}")
+    finally:
+        connection.close()
+
+
+@db_cli.command("rebuild-stats")
+def rebuild_stats_command():
+    """Recompute teacher_stats from achievements (repairs drift)."""
+    connection = sqlite3.connect(current_app.config["DB_PATH"], isolation_level=None)
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            drifted = rebuild_teacher_stats(connection)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+    finally:
+        connection.close()
+    click.echo(f"Rebuilt teacher_stats ({drifted} teacher(s) had drifted).")
+
+
+def init_app(app):
+    app.cli.add_command(db_cli)
@@ -0,0 +1,227 @@
+"""
+Opt-in request profiling for production.
+
+A request is profiled when PROFILE_SAMPLE_RATE (0..1) picks it, or when
+it carries an X-Profile header holding a token from
+`flask --app app profile token` (signed with SECRET_KEY, valid for
+PROFILE_TOKEN_MAX_AGE seconds). Results are written per endpoint under
+PROFILE_DIR:
+
+    PROFILE_MODE=cprofile   <endpoint>/<time>-<pid>-<n>.prof    pstats, exact call counts
+    PROFILE_MODE=sample     <endpoint>/<time>-<pid>-<n>.folded  collapsed stacks from a
+                                                                 PROFILE_SAMPLE_INTERVAL sampler
+
+cProfile slows the profiled request several times over; the sampler only
+wakes every few milliseconds and leaves the request's own thread alone.
+Only one cProfile session can run per process (on Python 3.12+ it holds
+the sys.monitoring profiler slot), so a request that would overlap one is
+served unprofiled.
+Folded files load directly into flamegraph.pl or speedscope. Profiling
+stops in after_request, so the body of a streamed response is not
+included.
+
+    flask --app app profile top --endpoint teacher-dashboard --limit 15
+"""
+import cProfile
+import collections
+import glob
+import io
+import itertools
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+
+import click
+from flask import current_app, g, request
+from flask.cli import AppGroup
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from werkzeug.utils import secure_filename
+
+DEFAULTS = {
+    "PROFILE_SAMPLE_RATE": 0.0,
+    "PROFILE_MODE": "sample",
+    "PROFILE_SAMPLE_INTERVAL": 0.005,
+    "PROFILE_DIR": "profiles",
+    "PROFILE_TOKEN_MAX_AGE": 3600,
+}
+HEADER = "X-Profile"
+
+_counter = itertools.count()
+# Held while a cProfile session is enabled in this process
+_cprofile_lock = threading.Lock()
+
+
+class StackSampler:
+    """Samples one thread's Python stack from a helper thread."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _serializer(app):
+    return URLSafeTimedSerializer(app.secret_key, salt="profile-request")
+
+
+def make_token(app):
+    return _serializer(app).dumps("profile")
+
+
+def _token_valid(app, token):
+    try:
+        _serializer(app).loads(token, max_age=app.config["PROFILE_TOKEN_MAX_AGE"])
+        return True
+    except BadSignature:
+        return False
+
+
+def should_profile():
+    config = current_app.config
+    token = request.headers.get(HEADER)
+    if token and _token_valid(current_app, token):
+        return True
+    rate = config["PROFILE_SAMPLE_RATE"]
+    return rate > 0 and random.random() < rate
+
+
+def _start_profile():
+    if not should_profile():
+        return
+    if current_app.config["PROFILE_MODE"] == "cprofile":
+        if not _cprofile_lock.acquire(blocking=False):
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # A profiler outside this module already holds the slot
+            _cprofile_lock.release()
+            return
+    else:
+        profiler = StackSampler(threading.get_ident(), current_app.config["PROFILE_SAMPLE_INTERVAL"])
+        profiler.start()
+    g.profiler = profiler
+
+
+def _stop_profile(profiler):
+    if isinstance(profiler, StackSampler):
+        profiler.stop()
+    else:
+        profiler.disable()
+        _cprofile_lock.release()
+
+
+def _finish_profile(response):
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        return response
+    _stop_profile(profiler)
+    endpoint = secure_filename(request.endpoint or "unmatched") or "unmatched"
+    directory = os.path.join(current_app.config["PROFILE_DIR"], endpoint)
+    os.makedirs(directory, exist_ok=True)
+    name = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{next(_counter)}"
+    if isinstance(profiler, StackSampler):
+        profiler.write(os.path.join(directory, f"{name}.folded"))
+    else:
+        profiler.dump_stats(os.path.join(directory, f"{name}.prof"))
+    return response
+
+
+def _abandon_profile(exception=None):
+    # after_request was skipped; never leave a profiler or the lock behind
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        _stop_profile(profiler)
+
+
+def aggregate_folded(paths):
+    """Return (self_counts, total_counts, samples) over folded-stack files."""
+    self_counts, total_counts = collections.Counter(), collections.Counter()
+    samples = 0
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                count = int(count)
+                frames = stack.split(";")
+                samples += count
+                self_counts[frames[-1]] += count
+                for frame in set(frames):
+                    total_counts[frame] += count
+    return self_counts, total_counts, samples
+
+
+profile_cli = AppGroup("profile", help="Request profiling.")
+
+
+@profile_cli.command("token")
+def token_command():
+    """Print an X-Profile header value that forces profiling of a request."""
+    click.echo(f"{HEADER}: {make_token(current_app)}")
+
+
+@profile_cli.command("top")
+@click.option("--endpoint", help="Only this endpoint's profiles.")
+@click.option("--limit", default=20, show_default=True, help="Number of functions to show.")
+@click.option("--sort", type=click.Choice(["cumulative", "tottime"]), default="cumulative",
+              show_default=True, help="Order for pstats profiles.")
+def top_command(endpoint, limit, sort):
+    """Aggregate stored profiles into the top-N hot functions."""
+    root = current_app.config["PROFILE_DIR"]
+    directory = os.path.join(root, secure_filename(endpoint)) if endpoint else os.path.join(root, "*")
+    folded = sorted(glob.glob(os.path.join(directory, "*.folded")))
+    prof = sorted(glob.glob(os.path.join(directory, "*.prof")))
+    if not folded and not prof:
+        raise click.ClickException(f"No profiles under {root}.")
+
+    if folded:
+        self_counts, total_counts, samples = aggregate_folded(folded)
+        click.echo(f"{len(folded)} sampled request(s), {samples} samples")
+        click.echo(f"{'self %':>7} {'total %':>8}  function")
+        for frame, count in self_counts.most_common(limit):
+            click.echo(f"{100 * count / samples:7.1f} {100 * total_counts[frame] / samples:8.1f}  {frame}")
+    if prof:
+        out = io.StringIO()
+        stats = pstats.Stats(*prof, stream=out)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        click.echo(f"{len(prof)} cProfile request(s)")
+        click.echo(out.getvalue())
+
+
+def init_app(app):
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    app.cli.add_command(profile_cli)
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+    app.teardown_request(_abandon_profile)
@@ -0,0 +1,395 @@
+"""
+SQL for the hot read paths.
+
+Kept in one place so the routes and tests/test_query_plans.py check the
+same statements against the indexes created in migrations.py.
+"""
+import base64
+import binascii
+import json
+import re
+
+from markupsafe import escape
+
+# Reads the trigger-maintained summary rows (see migrations.py, migration 4):
+# two primary-key lookups plus a short range over the teacher's day buckets.
+TEACHER_STATS = """
+    SELECT COALESCE((SELECT total FROM teacher_stats WHERE teacher_id = :teacher_id), 0)
+               AS total_achievements,
+           COALESCE((SELECT students FROM teacher_stats WHERE teacher_id = :teacher_id), 0)
+               AS students_managed,
+           (SELECT COALESCE(SUM(n), 0) FROM teacher_daily_counts
+            WHERE teacher_id = :teacher_id AND day >= :since)
+               AS this_week
+"""
+
+DATA_VERSION = "SELECT version FROM data_version WHERE id = 1"
+
+TEACHER_RECENT = """
+    SELECT a.id, a.student_id, s.student_name, a.achievement_type,
+           a.event_name, a.achievement_date
+    FROM achievements a
+    JOIN student s ON a.student_id = s.student_id
+    WHERE a.teacher_id = ?
+    ORDER BY a.created_at DESC
+    LIMIT 5
+"""
+
+# Values stored in achievements.achievement_type (see teacher_achievements_2.html)
+ACHIEVEMENT_TYPES = {
+    "symposium": "Symposium",
+    "coding": "Coding Competition",
+    "paper": "Paper Presentation",
+    "conference": "Conference",
+    "hackathon": "Hackathon",
+    "sql": "SQL Query Event",
+    "other": "Other",
+}
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+# Columns shown by all_achievements.html
+LISTING_COLUMNS = (
+    "id", "student_id", "student_name", "achievement_type", "event_name",
+    "achievement_date", "position", "organizer", "certificate_path",
+    "thumbnail_path",
+)
+
+# Every column a client may ask for (student_name comes from the join)
+ACHIEVEMENT_FIELDS = (
+    "id", "teacher_id", "student_id", "student_name", "achievement_type",
+    "event_name", "achievement_date", "organizer", "position",
+    "achievement_description", "certificate_path",
+    "symposium_theme", "programming_language", "coding_platform", "paper_title",
+    "journal_name", "conference_level", "conference_role", "team_size",
+    "project_title", "database_type", "difficulty_level", "other_description",
+    "created_at", "thumbnail_path", "preview_path",
+)
+
+
+def listing_sql(filters, after=False, before=False, columns=LISTING_COLUMNS,
+                since=False, until=False):
+    """
+    Keyset-paginated achievements listing, newest achievement_date first
+    with id as the tie-breaker. filters are column names matched for
+    equality against same-named parameters; since/until bound
+    achievement_date by :date_from/:date_to (inclusive). Paging backwards
+    (before) walks the index in ascending order; the caller reverses it.
+    """
+    columns = [c for c in columns if c in ACHIEVEMENT_FIELDS]
+    for required in ("id", "achievement_date"):
+        if required not in columns:
+            columns.append(required)
+    select = ", ".join("s.student_name" if c == "student_name" else f"a.{c}" for c in columns)
+    where = " AND ".join(f"a.{c} = :{c}" for c in filters)
+
+    sql = f"""
+    SELECT {select}
+    FROM achievements a
+    JOIN student s ON a.student_id = s.student_id
+    WHERE {where}"""
+    if since:
+        sql += " AND a.achievement_date >= :date_from"
+    if until:
+        sql += " AND a.achievement_date <= :date_to"
+    if after:
+        sql += " AND (a.achievement_date, a.id) < (:cursor_date, :cursor_id)"
+        order = "DESC"
+    elif before:
+        sql += " AND (a.achievement_date, a.id) > (:cursor_date, :cursor_id)"
+        order = "ASC"
+    else:
+        order = "DESC"
+    return sql + f" ORDER BY a.achievement_date {order}, a.id {order} LIMIT :limit"
+
+
+def teacher_page_sql(filtered=False, after=False, before=False):
+    filters = ("teacher_id", "achievement_type") if filtered else ("teacher_id",)
+    return listing_sql(filters, after=after, before=before)
+
+
+def encode_cursor(row):
+    raw = f"{row['achievement_date']}|{row['id']}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return (achievement_date, id) from a cursor; ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        achievement_date, achievement_id = raw.rsplit("|", 1)
+        return achievement_date, int(achievement_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def achievements_page(connection, filters, after=None, before=None,
+                      limit=DEFAULT_PAGE_SIZE, columns=LISTING_COLUMNS):
+    """
+    Return (rows, next_cursor, prev_cursor) for one page of achievements
+    matching filters (a dict of column -> value). Cost depends on the page
+    size, not on how many achievements match.
+    """
+    params = dict(filters, limit=limit + 1)
+    backwards = after is None and before is not None
+    cursor = after or before
+    if cursor:
+        params["cursor_date"], params["cursor_id"] = decode_cursor(cursor)
+
+    sql = listing_sql(tuple(filters), after=after is not None, before=backwards, columns=columns)
+    rows = connection.execute(sql, params).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if backwards:
+        rows.reverse()
+        next_cursor = encode_cursor(rows[-1]) if rows else before
+        prev_cursor = encode_cursor(rows[0]) if has_more else None
+    else:
+        next_cursor = encode_cursor(rows[-1]) if has_more else None
+        prev_cursor = encode_cursor(rows[0]) if after is not None and rows else None
+    return rows, next_cursor, prev_cursor
+
+
+def teacher_achievements_page(connection, teacher_id, achievement_type=None,
+                              after=None, before=None, limit=DEFAULT_PAGE_SIZE):
+    filters = {"teacher_id": teacher_id}
+    if achievement_type is not None:
+        filters["achievement_type"] = achievement_type
+    return achievements_page(connection, filters, after=after, before=before, limit=limit)
+
+
+def iter_teacher_achievements(connection, teacher_id, achievement_type=None, date_from=None,
+                              date_to=None, columns=LISTING_COLUMNS, batch_size=500):
+    """
+    Yield every achievement of a teacher in listing order, fetching from
+    the cursor in batches so the full result set is never materialised.
+    """
+    filters = ("teacher_id", "achievement_type") if achievement_type is not None else ("teacher_id",)
+    sql = listing_sql(filters, columns=columns, since=date_from is not None, until=date_to is not None)
+    params = {
+        "teacher_id": teacher_id,
+        "achievement_type": achievement_type,
+        "date_from": date_from,
+        "date_to": date_to,
+        "limit": -1,
+    }
+    cursor = connection.execute(sql, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+
+# Full-text search (migration 9). Terms are ANDed and each matches as a
+# prefix; ORDER BY rank alone lets FTS5 return the BM25 top-N itself.
+SEARCH_MAX_TERMS = 8
+SEARCH_COLUMNS = (
+    "id", "student_id", "student_name", "achievement_type", "event_name",
+    "achievement_date", "organizer", "position",
+)
+# Control characters cannot occur in tokenized text, so they mark the hit
+_HIT_START, _HIT_END = "\x02", "\x03"
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query of quoted prefix terms, or None."""
+    terms = re.findall(r"\w+", text or "")[:SEARCH_MAX_TERMS]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_sql(filters):
+    select = ", ".join("s.student_name" if c == "student_name" else f"a.{c}" for c in SEARCH_COLUMNS)
+    where = "".join(f" AND a.{c} = :{c}" for c in filters)
+    return f"""
+    SELECT {select},
+           snippet(achievements_fts, -1, '{_HIT_START}', '{_HIT_END}', '…', 12) AS snippet
+    FROM achievements_fts
+    JOIN achievements a ON a.id = achievements_fts.rowid
+    JOIN student s ON a.student_id = s.student_id
+    WHERE achievements_fts MATCH :query{where}
+    ORDER BY achievements_fts.rank
+    LIMIT :limit OFFSET :offset"""
+
+
+def highlight(snippet):
+    """HTML-escape a snippet and wrap its matched terms in <mark>."""
+    return str(escape(snippet)).replace(_HIT_START, "<mark>").replace(_HIT_END, "</mark>")
+
+
+def encode_offset(offset):
+    return base64.urlsafe_b64encode(f"o{offset}".encode()).decode().rstrip("=")
+
+
+def decode_offset(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        if not raw.startswith("o"):
+            raise ValueError
+        return max(0, int(raw[1:]))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def search_achievements(connection, text, filters, after=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return (rows, next_cursor) for the BM25-ranked matches of text among
+    achievements matching filters. Rows are dicts with an HTML snippet.
+    """
+    query = fts_query(text)
+    if query is None:
+        return [], None
+    offset = decode_offset(after) if after else 0
+    params = dict(filters, query=query, limit=limit + 1, offset=offset)
+    rows = connection.execute(search_sql(tuple(filters)), params).fetchall()
+    next_cursor = encode_offset(offset + limit) if len(rows) > limit else None
+    return [dict(row, snippet=highlight(row["snippet"])) for row in rows[:limit]], next_cursor
+
+
+# Spreadsheet export: every stored column plus the student's department
+EXPORT_COLUMNS = tuple(
+    c for c in ACHIEVEMENT_FIELDS if c not in ("thumbnail_path", "preview_path")
+) + ("student_dept",)
+EXPORT_FILTERS = {
+    "teacher_id": "a.teacher_id = :teacher_id",
+    "student_dept": "s.student_dept = :student_dept",
+    "achievement_type": "a.achievement_type = :achievement_type",
+    "date_from": "a.achievement_date >= :date_from",
+    "date_to": "a.achievement_date <= :date_to",
+}
+
+
+def export_sql(filters):
+    """Unordered export of EXPORT_COLUMNS; filters are EXPORT_FILTERS keys."""
+    select = ", ".join(
+        f"s.{c}" if c in ("student_name", "student_dept") else f"a.{c}" for c in EXPORT_COLUMNS
+    )
+    where = " AND ".join(EXPORT_FILTERS[f] for f in filters) or "1"
+    return f"""
+    SELECT {select}
+    FROM achievements a
+    JOIN student s ON a.student_id = s.student_id
+    WHERE {where}"""
+
+
+def iter_export_rows(connection, filters, batch_size=1000):
+    """
+    Yield export rows as tuples for the non-None filters. The statement is
+    stepped in batches; no sort is requested, so SQLite streams straight
+    from the index or table and memory stays flat however many rows match.
+    """
+    params = {k: v for k, v in filters.items() if v is not None}
+    cursor = connection.execute(export_sql(params), params)
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield tuple(row)
+    finally:
+        cursor.close()
+
+
+# Free-text positions bucketed for the student filters and stats
+POSITION_BUCKET = """
+    CASE
+        WHEN lower(position) LIKE '%first%' OR trim(position) IN ('1', '1st') OR lower(position) LIKE '%winner%' THEN 'first'
+        WHEN lower(position) LIKE '%second%' OR trim(position) IN ('2', '2nd') OR lower(position) LIKE '%runner%' THEN 'second'
+        WHEN lower(position) LIKE '%third%' OR trim(position) IN ('3', '3rd') THEN 'third'
+        ELSE 'participation'
+    END
+"""
+
+STUDENT_SUMMARY_GROUPS = f"""
+    SELECT achievement_type, substr(achievement_date, 1, 4) AS year,
+           {POSITION_BUCKET} AS position_bucket, COUNT(*) AS n
+    FROM achievements
+    WHERE student_id = ?
+    GROUP BY 1, 2, 3
+"""
+
+STUDENT_RECENT = """
+    SELECT id, achievement_type, event_name, achievement_date
+    FROM achievements
+    WHERE student_id = ?
+    ORDER BY achievement_date DESC, id DESC
+    LIMIT 5
+"""
+
+STUDENT_ACHIEVEMENTS = f"""
+    SELECT id, achievement_type, event_name, achievement_date, organizer,
+           position, {POSITION_BUCKET} AS position_bucket,
+           achievement_description, certificate_path
+    FROM achievements
+    WHERE student_id = ?
+    ORDER BY achievement_date DESC, id DESC
+"""
+
+
+def _count_into(counts, key, n):
+    counts[key] = counts.get(key, 0) + n
+
+
+def compute_student_summary(connection, student_id):
+    summary = {"total": 0, "by_type": {}, "by_year": {}, "by_position": {}}
+    for row in connection.execute(STUDENT_SUMMARY_GROUPS, (student_id,)):
+        summary["total"] += row["n"]
+        _count_into(summary["by_type"], row["achievement_type"], row["n"])
+        _count_into(summary["by_year"], row["year"], row["n"])
+        _count_into(summary["by_position"], row["position_bucket"], row["n"])
+    summary["recent"] = [dict(row) for row in connection.execute(STUDENT_RECENT, (student_id,))]
+    return summary
+
+
+def student_summary(connection, student_id):
+    """
+    Per-student counts by type/year/position plus the five most recent
+    achievements. Served from student_summary_cache; on a miss the summary
+    is computed and stored under the write lock, so a concurrent insert
+    (whose trigger clears the entry) cannot leave a stale summary behind.
+    """
+    row = connection.execute(
+        "SELECT summary FROM student_summary_cache WHERE student_id = ?", (student_id,)
+    ).fetchone()
+    if row is not None:
+        return json.loads(row[0])
+
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        summary = compute_student_summary(connection, student_id)
+        connection.execute(
+            "INSERT OR REPLACE INTO student_summary_cache (student_id, summary) VALUES (?, ?)",
+            (student_id, json.dumps(summary)),
+        )
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    return summary
+
+
+def teacher_dashboard(connection, teacher_id, since):
+    """
+    Return (stats, recent_entries) for the teacher dashboard, both read
+    from the same snapshot of the database.
+    """
+    in_transaction = connection.in_transaction
+    if not in_transaction:
+        connection.execute("BEGIN")
+    try:
+        stats = dict(connection.execute(
+            TEACHER_STATS, {"teacher_id": teacher_id, "since": since}
+        ).fetchone())
+        recent_entries = connection.execute(TEACHER_RECENT, (teacher_id,)).fetchall()
+    finally:
+        if not in_transaction:
+            connection.commit()
+    return stats, recent_entries
@@ -0,0 +1,381 @@
+"""
+Seeded synthetic data for performance work.
+
+    flask --app app seed --scale large             # 100k students, 2k teachers, 5M achievements
+    flask --app app seed --students 5000 --teachers 100 --achievements 200000 --seed 7
+    flask --app app seed --scale small --reset     # replace existing people and achievements
+
+The same seed and --until date give the same rows. The data is shaped like
+production rather than uniform:
+
+- Departments are weighted; most achievements a teacher records are for
+  students of their own department.
+- Per-teacher volume follows a power law, so a few teachers own a large
+  share of the rows, and some students are far more active than others.
+- Dates cover the last YEARS years, growing towards the present and
+  peaking in the competition seasons. created_at trails
+  achievement_date by a few days.
+- Every achievement_type appears, with its type-specific columns filled
+  in (team_size for hackathons, coding_platform for coding events, ...).
+
+Every generated account's password is SEED_PASSWORD.
+
+Achievements' triggers and secondary indexes are dropped for the load and
+recreated afterwards. The tables they maintain (teacher_stats, the FTS
+index, ...) are then rebuilt in one pass each, since per-row trigger work
+would dominate the load. The load runs as a single transaction in
+rollback-journal mode, so new pages are not also copied to the WAL, and an
+interrupted load leaves the database unchanged.
+"""
+import collections
+import datetime
+import itertools
+import random
+import sqlite3
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+import migrations
+from imports import ACHIEVEMENT_COLUMNS
+
+SEED_PASSWORD = "password"
+YEARS = 4
+BATCH_SIZE = 20000
+# Exponent of the per-teacher volume power law
+TEACHER_SKEW = 0.9
+
+SCALES = {
+    # students, teachers, achievements
+    "small": (1000, 50, 20000),
+    "medium": (20000, 500, 500000),
+    "large": (100000, 2000, 5000000),
+}
+
+DEPARTMENTS = {"CSE": 45, "CSE(E Tech)": 15, "ECE": 25, "MECH": 15}
+# Share of a teacher's achievements recorded for their own department
+OWN_DEPARTMENT = 0.8
+GENDERS = {"Male": 52, "Female": 46, "Other": 2}
+TYPES = {"coding": 24, "hackathon": 18, "paper": 14, "symposium": 14, "conference": 12, "sql": 10, "other": 8}
+POSITIONS = {"First Place": 8, "Second Place": 8, "Third Place": 8, "Finalist": 14, "Special Mention": 4, "Participant": 58}
+# Relative activity per calendar month
+SEASON = (1.0, 1.3, 1.4, 0.9, 0.5, 0.4, 0.7, 1.1, 1.3, 1.2, 1.0, 0.6)
+
+FIRST_NAMES = (
+    "Aarav", "Aditi", "Akash", "Ananya", "Arjun", "Bhavya", "Deepak", "Divya", "Gautam", "Harini",
+    "Ishaan", "Janani", "Karthik", "Kavya", "Lakshmi", "Manoj", "Meera", "Naveen", "Nikita", "Pooja",
+    "Pranav", "Priya", "Rahul", "Ramya", "Rohan", "Sanjay", "Shreya", "Siddharth", "Sneha", "Surya",
+    "Tanvi", "Varun", "Vidya", "Vikram", "Yamini", "Zoya", "Abdul", "Fatima", "John", "Maria",
+)
+LAST_NAMES = (
+    "Sharma", "Iyer", "Reddy", "Nair", "Kumar", "Patel", "Rao", "Menon", "Gupta", "Singh",
+    "Krishnan", "Das", "Joshi", "Pillai", "Mehta", "Verma", "Subramanian", "Khan", "Fernandes", "Bose",
+)
+COLLEGES = (
+    "IIT Madras", "NIT Trichy", "Anna University", "VIT Vellore", "PSG Tech", "SSN College",
+    "BITS Pilani", "IIIT Hyderabad", "Amrita University", "SRM Institute", "CEG Guindy", "NIT Warangal",
+)
+THEMES = (
+    "Artificial Intelligence", "Cyber Security", "Internet of Things", "Renewable Energy", "Robotics",
+    "Cloud Computing", "Data Science", "Embedded Systems", "5G Networks", "Blockchain",
+    "Quantum Computing", "Smart Manufacturing", "VLSI Design", "Electric Vehicles",
+)
+LANGUAGES = {"Python": 35, "C++": 30, "Java": 20, "C": 8, "JavaScript": 5, "Go": 2}
+PLATFORMS = ("HackerRank", "CodeChef", "Codeforces", "LeetCode", "HackerEarth", "GeeksforGeeks", "AtCoder")
+CONTESTS = ("Long Challenge", "Weekly Contest", "Code Sprint", "Hiring Challenge", "Cook-Off", "Round")
+METHODS = (
+    "Deep Learning", "Federated Learning", "Graph Neural Networks", "Reinforcement Learning",
+    "Edge Computing", "Transformer Models", "Genetic Algorithms", "Fuzzy Logic", "Computer Vision",
+)
+PROBLEMS = (
+    "Crop Disease Detection", "Traffic Prediction", "Intrusion Detection", "Energy Forecasting",
+    "Medical Image Segmentation", "Fraud Detection", "Sign Language Recognition", "Fault Diagnosis",
+    "Air Quality Monitoring", "Resume Screening",
+)
+JOURNALS = (
+    "IEEE Access", "Springer LNCS", "Elsevier Procedia Computer Science", "IJERT",
+    "ACM Computing Surveys", "IEEE ICACCS", "International Journal of Engineering Research",
+)
+CONFERENCE_LEVELS = {"college": 30, "university": 25, "state": 20, "national": 17, "international": 8}
+CONFERENCE_ROLES = {"Presenter": 45, "Attendee": 35, "Session Chair": 5, "Volunteer": 15}
+HACKATHONS = ("Smart India Hackathon", "HackFest", "CodeFury", "Hack the Mountains", "DevSprint", "InnovateX")
+PROJECTS = (
+    "Smart Parking Assistant", "Campus Navigation App", "Blood Bank Finder", "Farm Price Tracker",
+    "Accessible Voting Kiosk", "Disaster Alert Network", "Waste Segregation Robot", "Mental Health Chatbot",
+    "Energy Usage Dashboard", "Bus Tracking System",
+)
+DATABASES = {"MySQL": 40, "PostgreSQL": 25, "Oracle": 20, "SQLite": 8, "SQL Server": 7}
+DIFFICULTIES = {"beginner": 30, "intermediate": 40, "advanced": 22, "expert": 8}
+TEAM_SIZES = {1: 5, 2: 20, 3: 25, 4: 35, 5: 10, 6: 5}
+OTHER_EVENTS = (
+    "Technical Quiz", "Debate Competition", "Paper Quilling", "Robotics Workshop", "Photography Contest",
+    "Inter-College Sports Meet", "Cultural Fest", "Entrepreneurship Pitch", "Poster Presentation",
+)
+
+
+def _pick(rng, weighted):
+    return rng.choices(tuple(weighted), tuple(weighted.values()))[0]
+
+
+def _symposium(rng, year):
+    theme = rng.choice(THEMES)
+    college = rng.choice(COLLEGES)
+    return f"{theme} Symposium {year}", college, {"symposium_theme": theme}
+
+
+def _coding(rng, year):
+    platform = rng.choice(PLATFORMS)
+    return (
+        f"{platform} {rng.choice(CONTESTS)} {year}", platform,
+        {"programming_language": _pick(rng, LANGUAGES), "coding_platform": platform},
+    )
+
+
+def _paper(rng, year):
+    journal = rng.choice(JOURNALS)
+    title = f"{rng.choice(METHODS)} for {rng.choice(PROBLEMS)}"
+    return f"Paper Presentation: {title}", journal, {"paper_title": title, "journal_name": journal}
+
+
+def _conference(rng, year):
+    level = _pick(rng, CONFERENCE_LEVELS)
+    return (
+        f"{level.title()} Conference on {rng.choice(THEMES)} {year}", rng.choice(COLLEGES),
+        {"conference_level": level, "conference_role": _pick(rng, CONFERENCE_ROLES)},
+    )
+
+
+def _hackathon(rng, year):
+    return (
+        f"{rng.choice(HACKATHONS)} {year}", rng.choice(COLLEGES),
+        {"team_size": _pick(rng, TEAM_SIZES), "project_title": rng.choice(PROJECTS)},
+    )
+
+
+def _sql(rng, year):
+    return (
+        f"SQL Query Challenge {year}", rng.choice(COLLEGES),
+        {"database_type": _pick(rng, DATABASES), "difficulty_level": _pick(rng, DIFFICULTIES)},
+    )
+
+
+def _other(rng, year):
+    event = rng.choice(OTHER_EVENTS)
+    return f"{event} {year}", rng.choice(COLLEGES), {"other_description": event}
+
+
+TYPE_DETAILS = {
+    "symposium": _symposium, "coding": _coding, "paper": _paper, "conference": _conference,
+    "hackathon": _hackathon, "sql": _sql, "other": _other,
+}
+DETAIL_COLUMNS = ACHIEVEMENT_COLUMNS[ACHIEVEMENT_COLUMNS.index("achievement_description") + 1:]
+INSERT_COLUMNS = ACHIEVEMENT_COLUMNS + ("created_at",)
+
+
+def _people(rng, count, prefix, domain):
+    """Rows for the student or teacher table, in its column order."""
+    width = max(3, len(str(count)))
+    departments, department_weights = tuple(DEPARTMENTS), tuple(DEPARTMENTS.values())
+    genders, gender_weights = tuple(GENDERS), tuple(GENDERS.values())
+    for n in range(1, count + 1):
+        person_id = f"{prefix}{n:0{width}d}"
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield (
+            f"{first} {last}", person_id, f"{first}.{last}.{person_id}@{domain}".lower(),
+            f"9{rng.randrange(10 ** 9):09d}", SEED_PASSWORD,
+            rng.choices(genders, gender_weights)[0], rng.choices(departments, department_weights)[0],
+        )
+
+
+def _calendar(until):
+    """Day strings over the last YEARS years and their cumulative weights."""
+    first = until - datetime.timedelta(days=365 * YEARS)
+    days = [first + datetime.timedelta(days=n) for n in range((until - first).days + 1)]
+    weights = [(0.5 + n / len(days)) * SEASON[day.month - 1] for n, day in enumerate(days)]
+    return [day.isoformat() for day in days], list(itertools.accumulate(weights))
+
+
+def _achievement_rows(rng, count, teachers, students, until):
+    """
+    teachers and students are lists of (id, department). Yields rows in
+    INSERT_COLUMNS order.
+    """
+    # Power-law volume, ranks shuffled so it is not tied to id order
+    ranks = list(range(1, len(teachers) + 1))
+    rng.shuffle(ranks)
+    teacher_weights = list(itertools.accumulate(1 / rank ** TEACHER_SKEW for rank in ranks))
+
+    # Per-department student pools with lognormal activity
+    pools = {}
+    for student_id, department in students:
+        pools.setdefault(department, ([], []))[0].append(student_id)
+    everyone = ([s for s, _ in students], [])
+    for ids, weights in (*pools.values(), everyone):
+        weights.extend(itertools.accumulate(rng.lognormvariate(0, 1) for _ in ids))
+
+    days, day_weights = _calendar(until)
+    day_index = range(len(days))
+    last_day = len(days) - 1
+    types, type_weights = tuple(TYPES), list(itertools.accumulate(TYPES.values()))
+    positions, position_weights = tuple(POSITIONS), list(itertools.accumulate(POSITIONS.values()))
+
+    # Time of day for created_at, office hours
+    clock = [f"{h:02d}:{m:02d}:{s:02d}" for h in range(8, 20) for m in range(60) for s in range(60)]
+    blank = dict.fromkeys(DETAIL_COLUMNS)
+
+    remaining = count
+    while remaining:
+        batch = min(remaining, BATCH_SIZE)
+        remaining -= batch
+        picked_teachers = rng.choices(teachers, cum_weights=teacher_weights, k=batch)
+        picked_days = rng.choices(day_index, cum_weights=day_weights, k=batch)
+        picked_types = rng.choices(types, cum_weights=type_weights, k=batch)
+        picked_positions = rng.choices(positions, cum_weights=position_weights, k=batch)
+        picked_times = rng.choices(clock, k=batch)
+        # Draw each pool's students in one choices() call
+        pool_keys = [
+            department if department in pools and rng.random() < OWN_DEPARTMENT else None
+            for _, department in picked_teachers
+        ]
+        draws = {
+            key: iter(rng.choices(pools.get(key, everyone)[0], cum_weights=pools.get(key, everyone)[1], k=n))
+            for key, n in collections.Counter(pool_keys).items()
+        }
+        for (teacher_id, _), pool_key, day, kind, position, clock_time in zip(
+            picked_teachers, pool_keys, picked_days, picked_types, picked_positions, picked_times
+        ):
+            date = days[day]
+            event, organizer, details = TYPE_DETAILS[kind](rng, date[:4])
+            yield (
+                teacher_id, next(draws[pool_key]), kind, event, date, organizer, position,
+                f"{position} in {event}" if rng.random() < 0.5 else None,
+                *{**blank, **details}.values(),
+                f"{days[min(day + int(rng.expovariate(0.25)), last_day)]} {clock_time}",
+            )
+
+
+def _insert(connection, table, columns, rows):
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    inserted = 0
+    while True:
+        chunk = list(itertools.islice(rows, BATCH_SIZE))
+        if not chunk:
+            return inserted
+        connection.executemany(sql, chunk)
+        inserted += len(chunk)
+
+
+def _derived_objects(connection):
+    """CREATE statements of achievements' secondary indexes and triggers."""
+    return connection.execute("""
+        SELECT type, name, sql FROM sqlite_master
+        WHERE tbl_name = 'achievements' AND type IN ('index', 'trigger') AND sql IS NOT NULL
+        ORDER BY type, name
+    """).fetchall()
+
+
+def populate(connection, students, teachers, achievements, seed=0, until=None, reset=False):
+    """
+    Insert the given numbers of synthetic students, teachers and
+    achievements in one transaction. The schema must be migrated. Raises
+    ValueError if people already exist and reset is false. Returns the
+    seconds spent per phase.
+    """
+    if achievements and (students < 1 or teachers < 1):
+        raise ValueError("achievements need at least one student and one teacher")
+    rng = random.Random(seed)
+    until = until or datetime.date.today()
+    timings = {}
+
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        derived = _derived_objects(connection)
+        for kind, name, _ in derived:
+            connection.execute(f'DROP {kind.upper()} "{name}"')
+
+        if reset:
+            for table in ("achievements", "student", "teacher"):
+                connection.execute(f"DELETE FROM {table}")
+        elif connection.execute("SELECT EXISTS (SELECT 1 FROM student UNION ALL SELECT 1 FROM teacher)").fetchone()[0]:
+            raise ValueError("the database already has students or teachers; use reset")
+
+        started = time.perf_counter()
+        person_columns = ("{0}_name", "{0}_id", "email", "phone_number", "password", "{0}_gender", "{0}_dept")
+        student_rows = list(_people(rng, students, "S", "students.example.edu"))
+        teacher_rows = list(_people(rng, teachers, "T", "faculty.example.edu"))
+        _insert(connection, "student", [c.format("student") for c in person_columns], iter(student_rows))
+        _insert(connection, "teacher", [c.format("teacher") for c in person_columns], iter(teacher_rows))
+        rows = _achievement_rows(
+            rng, achievements,
+            [(row[1], row[6]) for row in teacher_rows], [(row[1], row[6]) for row in student_rows], until,
+        )
+        _insert(connection, "achievements", INSERT_COLUMNS, rows)
+        timings["insert"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _, _, sql in derived:
+            connection.execute(sql)
+        timings["indexes"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        migrations.rebuild_teacher_stats(connection)
+        connection.execute("INSERT INTO achievements_fts (achievements_fts) VALUES ('rebuild')")
+        connection.execute("DELETE FROM student_summary_cache")
+        connection.execute("UPDATE data_version SET version = version + 1")
+        connection.execute("ANALYZE")
+        timings["rebuild"] = time.perf_counter() - started
+        connection.execute("COMMIT")
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    return timings
+
+
+def seed_database(db_path, students, teachers, achievements, seed=0, until=None, reset=False):
+    """Migrate db_path and populate() it with bulk-load PRAGMAs in effect."""
+    migrations.upgrade(db_path)
+    connection = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        journal_mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+        connection.execute("PRAGMA journal_mode = DELETE")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute("PRAGMA cache_size = -262144")
+        connection.execute("PRAGMA temp_store = MEMORY")
+        try:
+            return populate(connection, students, teachers, achievements, seed=seed, until=until, reset=reset)
+        finally:
+            connection.execute(f"PRAGMA journal_mode = {journal_mode}")
+    finally:
+        connection.close()
+
+
+@click.command("seed")
+@click.option("--scale", type=click.Choice(sorted(SCALES)), help="Preset sizes; explicit counts override them.")
+@click.option("--students", type=int, help="Number of students.")
+@click.option("--teachers", type=int, help="Number of teachers.")
+@click.option("--achievements", type=int, help="Number of achievements.")
+@click.option("--seed", default=0, show_default=True, help="Random seed.")
+@click.option("--until", type=click.DateTime(["%Y-%m-%d"]), help="Latest achievement date (default: today).")
+@click.option("--reset", is_flag=True, help="Delete existing students, teachers and achievements first.")
+@with_appcontext
+def seed_command(scale, students, teachers, achievements, seed, until, reset):
+    """Fill the database with seeded synthetic data."""
+    preset = SCALES[scale or "small"]
+    counts = [given if given is not None else default
+              for given, default in zip((students, teachers, achievements), preset)]
+    try:
+        timings = seed_database(current_app.config["DB_PATH"], *counts, seed=seed,
+                                until=until and until.date(), reset=reset)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    click.echo(
+        f"Seeded {counts[0]} students, {counts[1]} teachers and {counts[2]} achievements "
+        f"(insert {timings['insert']:.1f}s, indexes {timings['indexes']:.1f}s, rebuild {timings['rebuild']:.1f}s)."
+    )
+
+
+def init_app(app):
+    app.cli.add_command(seed_command)
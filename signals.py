@@ -0,0 +1,17 @@
+"""
+Application signals (blinker, as used by Flask's own signals).
+
+Modules that measure something send a signal; metrics.py subscribes.
+Senders never import the subscribers, and with nobody connected a send
+costs a dictionary lookup.
+"""
+from blinker import Namespace
+
+_signals = Namespace()
+
+# sender: the app; sql, elapsed (seconds)
+query_executed = _signals.signal("query-executed")
+# sender: the app; size (bytes), elapsed (seconds from first byte to stored blob)
+certificate_stored = _signals.signal("certificate-stored")
+# sender: the app; role ("student" | "teacher"), success (bool)
+login_attempted = _signals.signal("login-attempted")
@@ -0,0 +1,250 @@
+"""
+Content-addressed certificate storage.
+
+Uploads are hashed (SHA-256) while they are streamed to a temporary file,
+then moved to blobs/<aa>/<bb>/<digest>.<ext> under the upload folder. A
+certificate that is already stored is not written again, so re-submitting
+the same file costs no extra disk. achievements.certificate_path keeps a
+static-relative reference ("uploads/blobs/...") to the blob.
+
+UploadRequest hooks Werkzeug's multipart parser so file parts are written
+chunk by chunk straight into a HashingUpload in the store's tmp directory:
+the digest, the leading magic bytes and the size cap (MAX_CONTENT_LENGTH)
+are all checked as the bytes arrive, and save_certificate() only has to
+rename the finished temp file into place.
+
+    flask --app app certificates migrate   # move legacy uploads into the store
+"""
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+
+import click
+from flask import Request, current_app, request
+from flask.cli import AppGroup
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from signals import certificate_stored
+
+CHUNK_SIZE = 64 * 1024
+BLOB_PREFIX = "blobs"
+EXTENSION_ALIASES = {"jpeg": "jpg"}
+
+# Leading bytes of each accepted certificate format
+MAGIC_NUMBERS = {
+    "pdf": b"%PDF-",
+    "png": b"\x89PNG\r\n\x1a\n",
+    "jpg": b"\xff\xd8\xff",
+}
+HEAD_SIZE = max(len(magic) for magic in MAGIC_NUMBERS.values())
+
+
+class InvalidCertificate(ValueError):
+    """The uploaded bytes are not the file type their name claims."""
+
+
+def sniff_extension(head):
+    for ext, magic in MAGIC_NUMBERS.items():
+        if head.startswith(magic):
+            return ext
+    return None
+
+
+def normalise_extension(ext):
+    ext = ext.lower().lstrip(".")
+    return EXTENSION_ALIASES.get(ext, ext)
+
+
+class BlobStore:
+    def __init__(self, root):
+        self.root = root
+        self.tmp_dir = os.path.join(root, "tmp")
+
+    def relpath(self, digest, ext):
+        return "/".join((BLOB_PREFIX, digest[:2], digest[2:4], f"{digest}.{normalise_extension(ext)}"))
+
+    def path(self, relpath):
+        return os.path.join(self.root, *relpath.split("/"))
+
+    def put_stream(self, stream, ext):
+        """Store the bytes read from stream; return the blob's relpath."""
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            return self._commit(tmp_path, digest.hexdigest(), ext)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def put_file(self, path, ext=None):
+        if ext is None:
+            ext = os.path.splitext(path)[1]
+        with open(path, "rb") as f:
+            return self.put_stream(f, ext)
+
+    def commit_upload(self, upload, ext):
+        """Move a finished HashingUpload into the store; return its relpath."""
+        upload.close()
+        relpath = self._commit(upload.name, upload.hexdigest(), ext)
+        upload.committed = True
+        return relpath
+
+    def _commit(self, tmp_path, digest, ext):
+        relpath = self.relpath(digest, ext)
+        final_path = self.path(relpath)
+        if os.path.exists(final_path):
+            os.unlink(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(tmp_path, final_path)
+        return relpath
+
+
+class HashingUpload:
+    """
+    Writable temp file handed to Werkzeug's multipart parser for a file
+    part. Hashes and size-checks each chunk as it is written, so nothing
+    but one parser buffer is ever held in memory.
+    """
+
+    def __init__(self, tmp_dir, max_size=None):
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, self.name = tempfile.mkstemp(dir=tmp_dir)
+        self._file = os.fdopen(fd, "w+b")
+        self._digest = hashlib.sha256()
+        self.max_size = max_size
+        self.size = 0
+        self.started = time.perf_counter()
+        self.head = b""
+        self.committed = False
+
+    def write(self, data):
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            self.discard()
+            raise RequestEntityTooLarge(f"Certificate exceeds the {self.max_size} byte limit.")
+        if len(self.head) < HEAD_SIZE:
+            self.head += data[:HEAD_SIZE - len(self.head)]
+        self._digest.update(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._digest.hexdigest()
+
+    def discard(self):
+        self._file.close()
+        if not self.committed and os.path.exists(self.name):
+            os.unlink(self.name)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+class UploadRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        upload = HashingUpload(get_store().tmp_dir, current_app.config.get("MAX_CONTENT_LENGTH"))
+        self.__dict__.setdefault("spooled_uploads", []).append(upload)
+        return upload
+
+
+def discard_uploads(exception=None):
+    """Remove temp files of uploads the request did not store."""
+    for upload in request.__dict__.get("spooled_uploads", ()):
+        upload.discard()
+
+
+def save_certificate(file):
+    """
+    Validate an uploaded certificate against its magic bytes and store it.
+    Returns the static-relative certificate_path.
+    """
+    ext = normalise_extension(file.filename.rsplit(".", 1)[1])
+    stream = file.stream
+    if isinstance(stream, HashingUpload):
+        head = stream.head
+    else:
+        head = stream.read(HEAD_SIZE)
+        stream.seek(0)
+    if sniff_extension(head) != ext:
+        raise InvalidCertificate(f"The uploaded file is not a valid {ext.upper()} file.")
+
+    store = get_store()
+    if isinstance(stream, HashingUpload):
+        relpath = store.commit_upload(stream, ext)
+        if certificate_stored.receivers:
+            certificate_stored.send(
+                current_app._get_current_object(),
+                size=stream.size, elapsed=time.perf_counter() - stream.started,
+            )
+    else:
+        relpath = store.put_stream(stream, ext)
+    return f"uploads/{relpath}"
+
+
+def get_store(app=None):
+    """Return the blob store rooted at the app's UPLOAD_FOLDER."""
+    app = app or current_app._get_current_object()
+    store = app.extensions.get("blob_store")
+    if store is None or store.root != app.config["UPLOAD_FOLDER"]:
+        store = BlobStore(app.config["UPLOAD_FOLDER"])
+        app.extensions["blob_store"] = store
+    return store
+
+
+def digest_from_path(certificate_path):
+    """Return the SHA-256 of a blob reference, or None for legacy paths."""
+    if not certificate_path or f"/{BLOB_PREFIX}/" not in f"/{certificate_path}":
+        return None
+    return os.path.splitext(certificate_path.rsplit("/", 1)[-1])[0]
+
+
+certificates_cli = AppGroup("certificates", help="Certificate storage maintenance.")
+
+
+@certificates_cli.command("migrate")
+def migrate_command():
+    """Move legacy uploads into the blob store and drop duplicate copies."""
+    store = get_store()
+    static_root = current_app.static_folder
+    connection = sqlite3.connect(current_app.config["DB_PATH"])
+    legacy_files = set()
+    moved = 0
+    try:
+        rows = connection.execute(
+            "SELECT id, certificate_path FROM achievements WHERE certificate_path IS NOT NULL"
+        ).fetchall()
+        for achievement_id, certificate_path in rows:
+            if digest_from_path(certificate_path):
+                continue
+            legacy_path = os.path.join(static_root, *certificate_path.split("/"))
+            if not os.path.isfile(legacy_path):
+                click.echo(f"Missing file for achievement {achievement_id}: {certificate_path}")
+                continue
+            relpath = store.put_file(legacy_path)
+            connection.execute(
+                "UPDATE achievements SET certificate_path = ? WHERE id = ?",
+                (f"uploads/{relpath}", achievement_id),
+            )
+            legacy_files.add(legacy_path)
+            moved += 1
+        connection.commit()
+    finally:
+        connection.close()
+
+    for path in legacy_files:
+        os.unlink(path)
+    click.echo(f"Moved {moved} certificate reference(s); removed {len(legacy_files)} legacy file(s).")
+
+
+def init_app(app):
+    app.request_class = UploadRequest
+    app.teardown_request(discard_uploads)
+    app.cli.add_command(certificates_cli)
@@ -1,5 +1,6 @@
 # tests/conftest.py
 import os
+import shutil
 import tempfile
 import pytest
 from app import app, init_db
@@ -19,8 +20,13 @@ def test_app():
         'DATABASE': db_path,
         'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
         'SECRET_KEY': 'test-secret-key',
+        # Never migrate or write into the ams.db checked into the repo
+        'DB_PATH': db_path,
+        'UPLOAD_FOLDER': tempfile.mkdtemp(),
     })
     app.jinja_env.globals['csrf_token'] = lambda: 'test-token'
+    # Importing app no longer touches the database; bootstrap it explicitly
+    init_db(app)
 
 
     # Create the test database and tables
@@ -80,7 +86,10 @@ def test_app():
 
     # Clean up the test database
     os.close(db_fd)
-    os.unlink(db_path)
+    for path in (db_path, db_path + '-wal', db_path + '-shm'):
+        if os.path.exists(path):
+            os.unlink(path)
+    shutil.rmtree(app.config['UPLOAD_FOLDER'], ignore_errors=True)
 
 @pytest.fixture
 def client(test_app):
@@ -115,4 +124,39 @@ def test_db(test_app):
         conn = sqlite3.connect(test_app.config['DATABASE'])
         yield conn
         conn.close()
-        
\ No newline at end of file
+        
+
+@pytest.fixture
+def app_db(test_app, tmp_path):
+    """Point the app at a freshly migrated database seeded with S001/T001."""
+    import migrations
+
+    db_path = str(tmp_path / "app.db")
+    migrations.upgrade(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        INSERT INTO student (student_name, student_id, email, password, student_dept)
+        VALUES ('Test Student', 'S001', 'student@test.com', 'password', 'CSE')
+    """)
+    conn.execute("""
+        INSERT INTO teacher (teacher_name, teacher_id, email, password, teacher_dept)
+        VALUES ('Test Teacher', 'T001', 'teacher@test.com', 'password', 'CSE')
+    """)
+    conn.commit()
+    conn.close()
+
+    original = test_app.config["DB_PATH"]
+    test_app.config["DB_PATH"] = db_path
+    yield db_path
+    test_app.config["DB_PATH"] = original
+
+
+@pytest.fixture
+def upload_folder(test_app, tmp_path):
+    """Point the blob store at an empty upload folder."""
+    folder = tmp_path / "uploads"
+    folder.mkdir()
+    original = test_app.config["UPLOAD_FOLDER"]
+    test_app.config["UPLOAD_FOLDER"] = str(folder)
+    yield folder
+    test_app.config["UPLOAD_FOLDER"] = original
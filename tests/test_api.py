@@ -0,0 +1,134 @@
+import sqlite3
+
+import pytest
+
+import queries
+
+
+@pytest.fixture
+def achievements(app_db):
+    conn = sqlite3.connect(app_db)
+    conn.executemany(
+        """
+        INSERT INTO achievements (teacher_id, student_id, achievement_type, event_name,
+                                  achievement_date, organizer, position, paper_title)
+        VALUES (?, 'S001', ?, ?, ?, 'Org', '1', ?)
+        """,
+        [
+            ("T001", "paper", "Paper Day", "2025-03-01", "On Indexes"),
+            ("T001", "coding", "Code Sprint", "2025-02-01", None),
+            ("T001", "hackathon", "Hack Night", "2025-01-01", None),
+            ("T002", "coding", "Other Teacher", "2025-01-15", None),
+        ],
+    )
+    conn.commit()
+    conn.close()
+    return app_db
+
+
+def test_api_requires_login(client, app_db):
+    res = client.get("/api/v1/achievements")
+    assert res.status_code == 401
+    assert res.get_json()["error"]
+
+
+def test_teacher_achievements_paginate(auth_teacher_client, achievements):
+    res = auth_teacher_client.get("/api/v1/achievements?limit=2")
+    body = res.get_json()
+
+    assert res.status_code == 200
+    assert [a["event_name"] for a in body["data"]] == ["Paper Day", "Code Sprint"]
+    assert body["prev_cursor"] is None
+
+    res = auth_teacher_client.get(f"/api/v1/achievements?limit=2&after={body['next_cursor']}")
+    body = res.get_json()
+    assert [a["event_name"] for a in body["data"]] == ["Hack Night"]
+    assert body["next_cursor"] is None
+
+
+def test_sparse_fieldsets(auth_teacher_client, achievements):
+    res = auth_teacher_client.get("/api/v1/achievements?fields=paper_title&type=paper")
+
+    assert res.get_json()["data"] == [{"id": 1, "paper_title": "On Indexes"}]
+    assert auth_teacher_client.get("/api/v1/achievements?fields=password").status_code == 400
+    assert auth_teacher_client.get("/api/v1/achievements?fields=thumbnail_path").status_code == 400
+
+
+def test_etag_revalidation(auth_teacher_client, achievements):
+    res = auth_teacher_client.get("/api/v1/achievements")
+    etag = res.headers["ETag"]
+
+    res = auth_teacher_client.get("/api/v1/achievements", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+
+    conn = sqlite3.connect(achievements)
+    conn.execute("UPDATE achievements SET position = '2' WHERE id = 1")
+    conn.commit()
+    conn.close()
+
+    res = auth_teacher_client.get("/api/v1/achievements", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+
+
+def test_teacher_stats_only_for_self(auth_teacher_client, achievements):
+    res = auth_teacher_client.get("/api/v1/teachers/T001/stats")
+    assert res.get_json()["total_achievements"] == 3
+    assert res.get_json()["students_managed"] == 1
+
+    assert auth_teacher_client.get("/api/v1/teachers/T002/stats").status_code == 403
+
+
+def test_student_sees_only_own_achievements(auth_student_client, achievements):
+    res = auth_student_client.get("/api/v1/students/S001/achievements")
+    assert len(res.get_json()["data"]) == 4
+
+    assert auth_student_client.get("/api/v1/students/S002/achievements").status_code == 403
+
+
+def test_search_ranks_prefix_matches_with_snippets(auth_teacher_client, achievements):
+    conn = sqlite3.connect(achievements)
+    conn.execute("""
+        INSERT INTO achievements (teacher_id, student_id, achievement_type, event_name,
+                                  achievement_date, organizer, position, achievement_description)
+        VALUES ('T001', 'S001', 'paper', 'Index <Workshop>', '2025-04-01', 'Org', '2',
+                'Covering indexes and index-only scans')
+    """)
+    conn.commit()
+    conn.close()
+
+    res = auth_teacher_client.get("/api/v1/search?q=index")
+    body = res.get_json()
+
+    assert res.status_code == 200
+    assert [a["event_name"] for a in body["data"]] == ["Index <Workshop>", "Paper Day"]
+    assert "<mark>index</mark>" in body["data"][0]["snippet"].lower()
+    assert queries.highlight("<b>\x02hit\x03") == "&lt;b&gt;<mark>hit</mark>"
+
+    page = auth_teacher_client.get("/api/v1/search?q=ind&limit=1").get_json()
+    assert len(page["data"]) == 1 and page["next_cursor"]
+    rest = auth_teacher_client.get(f"/api/v1/search?q=ind&limit=1&after={page['next_cursor']}").get_json()
+    assert rest["data"][0]["id"] != page["data"][0]["id"]
+
+    assert auth_teacher_client.get("/api/v1/search?q=other").get_json()["data"] == []
+    assert auth_teacher_client.get("/api/v1/search?q=%20").status_code == 400
+
+
+def test_search_index_follows_updates_and_deletes(achievements):
+    conn = sqlite3.connect(achievements)
+    conn.execute("UPDATE achievements SET event_name = 'Renamed Sprint' WHERE event_name = 'Code Sprint'")
+    conn.execute("DELETE FROM achievements WHERE event_name = 'Hack Night'")
+    conn.execute("UPDATE achievements SET thumbnail_path = 'x'")
+    conn.commit()
+
+    def match(term):
+        return [r[0] for r in conn.execute(
+            "SELECT a.event_name FROM achievements_fts JOIN achievements a ON a.id = achievements_fts.rowid "
+            "WHERE achievements_fts MATCH ?", (term,)
+        )]
+
+    assert match("renamed") == ["Renamed Sprint"]
+    assert match("code") == []
+    assert match("hack") == []
+    conn.execute("INSERT INTO achievements_fts (achievements_fts) VALUES ('integrity-check')")
+    conn.close()
@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import importlib.util
+import os
+import threading
+
+from werkzeug.serving import make_server
+
+import seed
+from app import create_app, init_db
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load_benchmark(name):
+    spec = importlib.util.spec_from_file_location(f"{name}_benchmark", os.path.join(ROOT, "benchmarks", f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+bench = _load_benchmark("routes")
+load = _load_benchmark("load")
+
+
+def test_every_scenario_succeeds_on_a_seeded_database():
+    results = bench.run_scale("tiny", list(bench.SCENARIOS), iterations=3, warmup=1, echo=lambda line: None)
+
+    assert set(results) == set(bench.SCENARIOS)
+    for name, result in results.items():
+        assert result["requests"] == 3 and result["errors"] == 0, name
+        assert result["p50_ms"] <= result["p99_ms"]
+
+
+def test_compare_flags_changes_beyond_the_threshold():
+    base = {"tiny": {"a": {"p50_ms": 10, "p99_ms": 20, "rps": 100}, "b": {"p50_ms": 10, "p99_ms": 20, "rps": 100}}}
+    current = {"tiny": {
+        "a": {"p50_ms": 11, "p99_ms": 21, "rps": 95},
+        "b": {"p50_ms": 10, "p99_ms": 30, "rps": 70},
+    }, "large": {"a": {"p50_ms": 1, "p99_ms": 1, "rps": 1}}}
+
+    lines, regressions = bench.compare(current, base, threshold=0.2)
+
+    assert regressions == [("tiny", "b", ["p99", "rps"])]
+    assert any("no baseline" in line for line in lines)
+
+
+def test_load_harness_runs_mixed_sessions(tmp_path):
+    db_path = str(tmp_path / "load.db")
+    seed.seed_database(db_path, 50, 5, 200)
+    app = create_app({"DB_PATH": db_path, "UPLOAD_FOLDER": str(tmp_path / "uploads"), "TESTING": True})
+    init_db(app)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    args = argparse.Namespace(rate=20, duration=1, teacher_share=0.5, think=0, certificate_kb=1, timeout=10, seed=1)
+    try:
+        test = load.LoadTest("127.0.0.1", server.server_port, load.load_users(db_path), args)
+        elapsed = asyncio.run(test.run())
+    finally:
+        server.shutdown()
+        app.extensions["db_pool"].close_all()
+
+    result = load.report(test.stats, elapsed, None, args)
+    assert result["sessions_started"] > 0
+    assert result["sessions_completed"] == result["sessions_started"]
+    assert result["error_rate"] == 0
+    assert {"student_login", "teacher_login"} & set(result["steps"])
@@ -0,0 +1,119 @@
+import sqlite3
+
+import pytest
+
+import migrations
+
+from test_storage import JPEG_BYTES, submit_certificate
+
+
+@pytest.fixture
+def stored(client, app_db, upload_folder):
+    submit_certificate(client, JPEG_BYTES, "cert.jpg")
+    conn = sqlite3.connect(app_db)
+    achievement_id, certificate_path = conn.execute(
+        "SELECT id, certificate_path FROM achievements"
+    ).fetchone()
+    conn.close()
+    return achievement_id, certificate_path.rsplit("/", 1)[-1].split(".")[0]
+
+
+def login(client, **session_values):
+    with client.session_transaction() as sess:
+        sess.clear()
+        sess["logged_in"] = True
+        sess.update(session_values)
+
+
+def test_download_is_immutable_with_content_etag(client, stored):
+    achievement_id, digest = stored
+    login(client, student_id="S001")
+
+    res = client.get(f"/certificates/{achievement_id}")
+
+    assert res.status_code == 200
+    assert res.data == JPEG_BYTES
+    assert res.headers["ETag"] == f'"{digest}"'
+    assert "immutable" in res.headers["Cache-Control"]
+    assert "private" in res.headers["Cache-Control"]
+
+    res = client.get(f"/certificates/{achievement_id}", headers={"If-None-Match": f'"{digest}"'})
+    assert res.status_code == 304
+
+
+def test_download_supports_range_requests(client, stored):
+    achievement_id, _ = stored
+    login(client, teacher_id="T001")
+
+    res = client.get(f"/certificates/{achievement_id}", headers={"Range": "bytes=0-3"})
+
+    assert res.status_code == 206
+    assert res.data == JPEG_BYTES[:4]
+    assert res.headers["Content-Range"] == f"bytes 0-3/{len(JPEG_BYTES)}"
+
+
+def test_download_checks_owner(client, stored):
+    achievement_id, _ = stored
+
+    login(client, student_id="S999")
+    assert client.get(f"/certificates/{achievement_id}").status_code == 403
+    login(client, teacher_id="T999")
+    assert client.get(f"/certificates/{achievement_id}").status_code == 403
+    assert client.get("/static/uploads/anything.jpg").status_code == 404
+
+
+def test_legacy_rows_are_visible_to_every_teacher(client, test_app, stored, app_db, tmp_path):
+    achievement_id, _ = stored
+    conn = sqlite3.connect(app_db)
+    certificate_path = conn.execute("SELECT certificate_path FROM achievements").fetchone()[0]
+    conn.close()
+
+    # A table from before teacher_id existed, migrated
+    legacy_db = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(legacy_db)
+    conn.execute("""
+        CREATE TABLE achievements (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id TEXT NOT NULL,
+            achievement_type TEXT NOT NULL,
+            event_name TEXT NOT NULL,
+            achievement_date DATE NOT NULL,
+            organizer TEXT NOT NULL,
+            position TEXT NOT NULL,
+            achievement_description TEXT,
+            certificate_path TEXT,
+            paper_title TEXT,
+            project_title TEXT,
+            other_description TEXT
+        )
+    """)
+    conn.execute("""
+        INSERT INTO achievements (student_id, achievement_type, event_name,
+                                  achievement_date, organizer, position, certificate_path)
+        VALUES ('S001', 'hackathon', 'Hack', '2020-01-01', 'Org', '1', ?)
+    """, (certificate_path,))
+    conn.commit()
+    conn.close()
+    migrations.upgrade(legacy_db)
+
+    test_app.config["DB_PATH"] = legacy_db
+    login(client, teacher_id="T999")
+    assert client.get("/certificates/1").status_code == 200
+
+
+def test_accel_redirect_leaves_bytes_to_proxy(client, test_app, stored):
+    achievement_id, digest = stored
+    login(client, student_id="S001")
+
+    test_app.config["CERTIFICATE_SENDFILE"] = "x-accel-redirect"
+    try:
+        res = client.get(f"/certificates/{achievement_id}")
+    finally:
+        test_app.config["CERTIFICATE_SENDFILE"] = ""
+
+    assert res.status_code == 200
+    assert res.data == b""
+    assert res.headers["X-Accel-Redirect"] == (
+        f"/protected-uploads/blobs/{digest[:2]}/{digest[2:4]}/{digest}.jpg"
+    )
+    assert "X-Sendfile" not in res.headers
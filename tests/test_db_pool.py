@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from db import (
+    DEFAULTS,
+    ConnectionPool,
+    PoolTimeout,
+    get_db,
+    get_pool,
+    set_journal_mode,
+    sqlite_pragmas,
+)
+
+
+def test_pool_reuses_released_connection(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=2, timeout=0.1)
+
+    first = pool.acquire()
+    pool.release(first)
+    second = pool.acquire()
+
+    assert second is first
+    stats = pool.stats()
+    assert stats["creations"] == 1
+    assert stats["hits"] == 1
+    pool.close_all()
+
+
+def test_pool_is_bounded_and_times_out(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=1, timeout=0.05)
+
+    held = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+    stats = pool.stats()
+    assert stats["waits"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["in_use"] == 1
+    pool.release(held)
+
+
+def test_waiter_gets_released_connection(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=1, timeout=2)
+    held = pool.acquire()
+    got = []
+
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+    waiter.start()
+    pool.release(held)
+    waiter.join()
+
+    assert got == [held]
+    assert pool.stats()["creations"] == 1
+
+
+def test_release_rolls_back_open_transaction(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=1)
+    connection = pool.acquire()
+    connection.execute("CREATE TABLE t (x INTEGER)")
+    connection.commit()
+    connection.execute("INSERT INTO t VALUES (1)")
+
+    pool.release(connection)
+
+    connection = pool.acquire()
+    assert connection.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+
+def test_app_context_returns_connection_to_pool(test_app):
+    with test_app.app_context():
+        connection = get_db()
+        assert get_db() is connection
+        assert get_pool().stats()["in_use"] >= 1
+
+    with test_app.app_context():
+        assert get_pool().stats()["in_use"] == 0
+
+
+def test_pooled_connections_are_tuned(tmp_path):
+    db_path = str(tmp_path / "tuned.db")
+    assert set_journal_mode(db_path, "WAL") == "wal"
+    pool = ConnectionPool(db_path, pragmas=sqlite_pragmas(DEFAULTS))
+
+    connection = pool.acquire()
+
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert connection.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert connection.execute("PRAGMA busy_timeout").fetchone()[0] == DEFAULTS["SQLITE_BUSY_TIMEOUT"]
+    assert connection.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+    pool.release(connection)
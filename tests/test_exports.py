@@ -0,0 +1,203 @@
+import csv
+import io
+import sqlite3
+import zipfile
+
+import pytest
+
+import db
+import exports
+import queries
+
+from test_storage import JPEG_BYTES, submit_certificate
+
+
+def test_certificates_zip_streams_files_and_manifest(client, app_db, upload_folder):
+    submit_certificate(client, JPEG_BYTES, "cert.jpg", event_name="Code Sprint")
+    submit_certificate(client, b"%PDF-1.4 paper", "paper.pdf", achievement_type="paper",
+                       event_name="Paper Day", achievement_date="2024-05-01")
+
+    res = client.get("/exports/certificates.zip")
+
+    assert res.status_code == 200
+    assert res.is_streamed
+    archive = zipfile.ZipFile(io.BytesIO(res.data))
+    names = archive.namelist()
+    assert names[0] == "manifest.csv"
+    manifest = list(csv.DictReader(io.StringIO(archive.read("manifest.csv").decode())))
+    assert [r["event_name"] for r in manifest] == ["Code Sprint", "Paper Day"]
+    assert archive.read(manifest[0]["file"]) == JPEG_BYTES
+    assert archive.read(manifest[1]["file"]) == b"%PDF-1.4 paper"
+    assert sorted(names[1:]) == sorted(r["file"] for r in manifest)
+
+
+def test_certificates_zip_applies_filters(client, app_db, upload_folder):
+    submit_certificate(client, JPEG_BYTES, "cert.jpg")
+    submit_certificate(client, b"%PDF-1.4 paper", "paper.pdf", achievement_date="2024-05-01")
+
+    res = client.get("/exports/certificates.zip?type=coding&from=2025-01-01")
+    archive = zipfile.ZipFile(io.BytesIO(res.data))
+    assert len(archive.namelist()) == 2
+    assert archive.read(archive.namelist()[1]) == JPEG_BYTES
+
+    assert client.get("/exports/certificates.zip?from=yesterday").status_code == 400
+
+
+def test_certificates_zip_holds_its_connection_while_streaming(test_app, client, app_db, upload_folder):
+    submit_certificate(client, JPEG_BYTES, "cert.jpg")
+
+    res = client.get("/exports/certificates.zip", buffered=False)
+    body = iter(res.response)
+    next(body)
+    pool = db.get_pool(test_app)
+    # Still checked out, so the manifest and files read one snapshot
+    assert pool.stats()["in_use"] == 1
+
+    b"".join(body)
+    res.close()
+    assert pool.stats()["in_use"] == 0
+
+
+def test_certificates_zip_is_for_teachers(client, app_db):
+    with client.session_transaction() as sess:
+        sess["logged_in"] = True
+        sess["student_id"] = "S001"
+    assert client.get("/exports/certificates.zip").status_code == 403
+
+
+def seed_export_rows(app_db):
+    conn = sqlite3.connect(app_db)
+    conn.execute("""
+        INSERT INTO student (student_name, student_id, email, password, student_dept)
+        VALUES ('Other Student', 'S002', 'other@test.com', 'password', 'ECE')
+    """)
+    conn.execute("""
+        INSERT INTO teacher (teacher_name, teacher_id, email, password, teacher_dept)
+        VALUES ('Colleague', 'T002', 'colleague@test.com', 'password', 'CSE')
+    """)
+    conn.executemany(
+        """
+        INSERT INTO achievements (teacher_id, student_id, achievement_type, event_name,
+                                  achievement_date, organizer, position, paper_title, team_size)
+        VALUES (?, ?, ?, ?, ?, 'Org', '1', ?, ?)
+        """,
+        [
+            ("T001", "S001", "paper", "Paper Day", "2025-03-01", "On <Graphs> & Trees", None),
+            ("T001", "S001", "hackathon", "Hack Night", "2024-11-02", None, 4),
+            ("T001", "S002", "paper", "Other Dept", "2025-03-02", "Signals", None),
+            ("T002", "S001", "paper", "Colleague Entry", "2025-03-03", "Rings", None),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+def login_teacher(client, dept="CSE"):
+    with client.session_transaction() as sess:
+        sess["logged_in"] = True
+        sess["teacher_id"] = "T001"
+        sess["teacher_dept"] = dept
+
+
+def test_achievements_csv_is_limited_to_own_rows(client, app_db):
+    seed_export_rows(app_db)
+    login_teacher(client)
+
+    res = client.get("/exports/achievements.csv?from=2025-01-01&teacher=T002")
+
+    assert res.is_streamed
+    rows = list(csv.DictReader(io.StringIO(res.data.decode())))
+    assert sorted(r["event_name"] for r in rows) == ["Other Dept", "Paper Day"]
+    paper_day = next(r for r in rows if r["event_name"] == "Paper Day")
+    assert paper_day["paper_title"] == "On <Graphs> & Trees"
+    assert paper_day["student_dept"] == "CSE"
+
+
+def test_department_export_needs_permission(test_app, client, app_db, monkeypatch):
+    seed_export_rows(app_db)
+    login_teacher(client)
+
+    assert client.get("/exports/achievements.csv?scope=department").status_code == 403
+
+    monkeypatch.setitem(test_app.config, "EXPORT_DEPARTMENT_TEACHERS", frozenset({"T001"}))
+    res = client.get("/exports/achievements.csv?scope=department&from=2025-01-01")
+    rows = list(csv.DictReader(io.StringIO(res.data.decode())))
+    assert sorted(r["event_name"] for r in rows) == ["Colleague Entry", "Paper Day"]
+
+
+def test_achievements_csv_holds_its_connection_while_streaming(test_app, client, app_db, monkeypatch):
+    monkeypatch.setattr(exports, "CHUNK_SIZE", 1)
+    seed_export_rows(app_db)
+    login_teacher(client)
+
+    res = client.get("/exports/achievements.csv", buffered=False)
+    body = iter(res.response)
+    next(body)
+    pool = db.get_pool(test_app)
+    assert pool.stats()["in_use"] == 1
+
+    b"".join(body)
+    res.close()
+    assert pool.stats()["in_use"] == 0
+
+
+def test_achievements_xlsx_is_a_valid_workbook(client, app_db):
+    seed_export_rows(app_db)
+    login_teacher(client)
+
+    res = client.get("/exports/achievements.xlsx?type=hackathon")
+
+    archive = zipfile.ZipFile(io.BytesIO(res.data))
+    assert {"[Content_Types].xml", "xl/workbook.xml", "xl/worksheets/sheet1.xml"} <= set(archive.namelist())
+    sheet = archive.read("xl/worksheets/sheet1.xml").decode()
+    assert sheet.count("<row ") == 2
+    assert "Hack Night" in sheet and "<v>4</v>" in sheet
+
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.load_workbook(io.BytesIO(res.data), read_only=True)
+    assert list(workbook.active.values)[1][queries.EXPORT_COLUMNS.index("team_size")] == 4
+
+
+def test_exports_neutralise_formula_cells(client, app_db):
+    conn = sqlite3.connect(app_db)
+    conn.execute("""
+        INSERT INTO achievements (teacher_id, student_id, achievement_type, event_name,
+                                  achievement_date, organizer, position, team_size)
+        VALUES ('T001', 'S001', 'hackathon', '=HYPERLINK("http://evil.example")',
+                '2025-03-01', '@SUM(1)', '-1', 4)
+    """)
+    conn.commit()
+    conn.close()
+    login_teacher(client)
+
+    rows = list(csv.DictReader(io.StringIO(client.get("/exports/achievements.csv").data.decode())))
+    assert rows[0]["event_name"] == "'=HYPERLINK(\"http://evil.example\")"
+    assert rows[0]["organizer"] == "'@SUM(1)"
+    assert rows[0]["position"] == "'-1"
+    assert rows[0]["team_size"] == "4"
+
+    sheet = zipfile.ZipFile(io.BytesIO(client.get("/exports/achievements.xlsx").data)).read("xl/worksheets/sheet1.xml")
+    assert b"'=HYPERLINK(" in sheet and b"'@SUM(1)" in sheet
+    assert exports.spreadsheet_safe(-1) == -1
+
+
+def test_xlsx_rolls_over_to_new_sheet(monkeypatch):
+    monkeypatch.setattr(exports, "XLSX_MAX_ROWS", 3)
+    data = b"".join(exports.xlsx_stream(("n",), [(i,) for i in range(5)]))
+
+    archive = zipfile.ZipFile(io.BytesIO(data))
+    assert archive.read("xl/worksheets/sheet3.xml").count(b"<row ") == 2
+    assert b"Achievements 3" in archive.read("xl/workbook.xml")
+
+
+def test_export_command_writes_csv(test_app, app_db, tmp_path):
+    seed_export_rows(app_db)
+    output = tmp_path / "ece.csv"
+
+    result = test_app.test_cli_runner().invoke(
+        args=["export", "achievements", "--dept", "ECE", "-o", str(output)]
+    )
+
+    assert result.exit_code == 0, result.output
+    rows = list(csv.DictReader(output.open()))
+    assert [r["event_name"] for r in rows] == ["Other Dept"]
@@ -0,0 +1,77 @@
+import io
+import sqlite3
+
+import imports
+
+STUDENTS_CSV = """student_name,student_id,email,password,student_dept
+Asha,S100,asha@test.com,pw,CSE
+Ravi,S101,not-an-email,pw,CSE
+Duplicate,S001,dup@test.com,pw,CSE
+Meena,S102,meena@test.com,pw,ECE
+"""
+
+
+def test_import_reports_bad_rows_and_keeps_the_rest(app_db):
+    conn = sqlite3.connect(app_db)
+    report = imports.import_csv(conn, "students", io.StringIO(STUDENTS_CSV), chunk_rows=2)
+
+    assert report.inserted == 2
+    assert [line for line, _ in report.errors] == [3, 4]
+    assert "UNIQUE" in report.errors[1][1]
+    ids = {r[0] for r in conn.execute("SELECT student_id FROM student")}
+    assert ids == {"S001", "S100", "S102"}
+    conn.close()
+
+
+def test_import_achievements_checks_references(app_db):
+    text = io.StringIO(
+        "teacher_id,student_id,achievement_type,event_name,achievement_date,organizer,position,team_size\n"
+        "T001,S001,hackathon,Hack,2025-01-02,Org,1,4\n"
+        "T001,S999,hackathon,Hack,2025-01-02,Org,1,\n"
+        "T001,S001,hackathon,Hack,02/01/2025,Org,1,\n"
+    )
+    conn = sqlite3.connect(app_db)
+    report = imports.import_csv(conn, "achievements", text)
+
+    assert report.inserted == 1
+    assert [line for line, _ in report.errors] == [3, 4]
+    assert conn.execute("SELECT team_size FROM achievements").fetchall() == [(4,)]
+    # Summary triggers ran for the bulk insert
+    assert conn.execute("SELECT total FROM teacher_stats WHERE teacher_id = 'T001'").fetchone() == (1,)
+    conn.close()
+
+
+def test_teacher_upload_records_achievements_as_uploader(auth_teacher_client, app_db, upload_folder):
+    csv_bytes = (
+        "student_id,achievement_type,event_name,achievement_date,organizer,position\n"
+        "S001,coding,Sprint,2025-03-01,Org,2\n"
+    ).encode()
+
+    res = auth_teacher_client.post(
+        "/imports/",
+        data={"kind": "achievements", "file": (io.BytesIO(csv_bytes), "rows.csv")},
+        content_type="multipart/form-data",
+    )
+
+    assert res.status_code == 200
+    assert b"Imported 1 achievements" in res.data
+    conn = sqlite3.connect(app_db)
+    assert conn.execute("SELECT teacher_id, event_name FROM achievements").fetchall() == [("T001", "Sprint")]
+    conn.close()
+
+
+def test_import_command_rejects_unknown_columns(test_app, app_db, tmp_path):
+    path = tmp_path / "teachers.csv"
+    path.write_text("teacher_name,teacher_id,email,password,salary\nA,T9,a@t.com,pw,1\n")
+
+    result = test_app.test_cli_runner().invoke(args=["import", "teachers", str(path)])
+
+    assert result.exit_code != 0
+    assert "Unknown columns: salary" in result.output
+
+
+def test_dashboard_links_to_import_alongside_manage_students(auth_teacher_client):
+    res = auth_teacher_client.get("/teacher-dashboard")
+
+    assert b"Manage Students" in res.data
+    assert b'href="/imports/"' in res.data
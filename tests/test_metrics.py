@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sample(text, name, **labels):
+    """Value of one sample line in Prometheus text output (0 if absent)."""
+    wanted = ",".join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+    prefix = f"{name}{{{wanted}}} " if labels else f"{name} "
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_metrics_cover_requests_queries_and_logins(client, app_db):
+    before = client.get("/metrics").get_data(as_text=True)
+    client.post("/teacher", data={"tname": "T001", "password": "wrong"})
+    client.get("/")
+    after = client.get("/metrics").get_data(as_text=True)
+
+    assert sample(after, "ams_logins_total", role="teacher", outcome="failure") == \
+        sample(before, "ams_logins_total", role="teacher", outcome="failure") + 1
+    assert sample(after, "ams_requests_total", endpoint="home", method="GET", status="200") >= 1
+    assert sample(after, "ams_request_duration_seconds_count", endpoint="teacher", method="POST") >= 1
+    assert sample(after, "ams_db_query_duration_seconds_count") > sample(before, "ams_db_query_duration_seconds_count")
+    assert "ams_db_pool_connections" in after
+
+
+def test_metrics_token(client, test_app):
+    test_app.config["METRICS_TOKEN"] = "s3cret"
+    try:
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+    finally:
+        test_app.config["METRICS_TOKEN"] = None
+
+
+WORKER = """
+import app
+client = app.app.test_client()
+for _ in range(3):
+    client.get("/")
+print(client.get("/metrics").get_data(as_text=True))
+"""
+
+
+def test_metrics_aggregate_across_processes(tmp_path):
+    env = dict(
+        os.environ,
+        PROMETHEUS_MULTIPROC_DIR=str(tmp_path / "metrics"),
+        DB_PATH=str(tmp_path / "ams.db"),
+        UPLOAD_FOLDER=str(tmp_path / "uploads"),
+    )
+    os.makedirs(env["PROMETHEUS_MULTIPROC_DIR"])
+
+    outputs = [
+        subprocess.run([sys.executable, "-c", WORKER], cwd=ROOT, env=env,
+                       check=True, capture_output=True, text=True).stdout
+        for _ in range(2)
+    ]
+
+    # The second worker's scrape includes the first worker's requests
+    assert sample(outputs[0], "ams_requests_total", endpoint="home", method="GET", status="200") == 3
+    assert sample(outputs[1], "ams_requests_total", endpoint="home", method="GET", status="200") == 6
+
+
+PRELOAD = """
+import runpy
+runpy.run_path("gunicorn.conf.py")
+import metrics
+"""
+
+
+def test_gunicorn_config_prepares_metrics_dir_before_preload(tmp_path):
+    metrics_dir = tmp_path / "missing" / "metrics"
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(metrics_dir))
+
+    # Loading the config then importing the app, as preload_app does
+    subprocess.run([sys.executable, "-c", PRELOAD], cwd=ROOT, env=env, check=True, capture_output=True)
+    assert any(metrics_dir.iterdir())
+
+    stale = metrics_dir / "counter_1.db"
+    stale.write_bytes(b"")
+    subprocess.run([sys.executable, "-c", PRELOAD], cwd=ROOT, env=env, check=True, capture_output=True)
+    assert not stale.exists()
@@ -0,0 +1,66 @@
+import sqlite3
+
+import migrations
+
+
+def test_upgrade_fresh_database(tmp_path):
+    db_path = str(tmp_path / "fresh.db")
+
+    applied = migrations.upgrade(db_path)
+
+    assert applied == [m[0] for m in migrations.MIGRATIONS]
+    conn = sqlite3.connect(db_path)
+    assert migrations.current_version(conn) == migrations.latest_version()
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert {"student", "teacher", "achievements"} <= tables
+    indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    # Superseded by the teacher_stats summary tables
+    assert "idx_achievements_teacher_stats" not in indexes
+    conn.close()
+
+
+def test_upgrade_is_idempotent(tmp_path):
+    db_path = str(tmp_path / "again.db")
+    migrations.upgrade(db_path)
+
+    assert migrations.upgrade(db_path) == []
+
+
+def test_upgrade_adds_missing_columns_to_legacy_table(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE achievements (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id TEXT NOT NULL,
+            achievement_type TEXT NOT NULL,
+            event_name TEXT NOT NULL,
+            achievement_date DATE NOT NULL,
+            organizer TEXT NOT NULL,
+            position TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        INSERT INTO achievements (student_id, achievement_type, event_name,
+                                  achievement_date, organizer, position)
+        VALUES ('S001', 'hackathon', 'Hack', '2025-01-01', 'Org', '1')
+    """)
+    conn.commit()
+    conn.close()
+
+    migrations.upgrade(db_path, target=1)
+
+    conn = sqlite3.connect(db_path)
+    columns = {r[1] for r in conn.execute("PRAGMA table_info(achievements)")}
+    assert {"teacher_id", "created_at"} <= columns
+    assert conn.execute("SELECT created_at FROM achievements").fetchone()[0] is not None
+    conn.close()
+
+
+def test_status_command(test_app):
+    runner = test_app.test_cli_runner()
+
+    result = runner.invoke(args=["db", "status"])
+
+    assert result.exit_code == 0
+    assert "Current version" in result.output
@@ -0,0 +1,63 @@
+import glob
+import os
+import pstats
+
+import pytest
+
+import profiling
+
+
+@pytest.fixture
+def profile_dir(test_app, tmp_path):
+    original = dict(test_app.config)
+    test_app.config["PROFILE_DIR"] = str(tmp_path)
+    yield test_app.config
+    test_app.config.update({k: original[k] for k in profiling.DEFAULTS})
+
+
+def test_requests_are_not_profiled_by_default(auth_teacher_client, profile_dir):
+    auth_teacher_client.get("/teacher-dashboard")
+    assert os.listdir(profile_dir["PROFILE_DIR"]) == []
+
+
+def test_signed_header_forces_cprofile(test_app, auth_teacher_client, profile_dir):
+    profile_dir["PROFILE_MODE"] = "cprofile"
+    auth_teacher_client.get("/teacher-dashboard", headers={"X-Profile": "forged"})
+    assert os.listdir(profile_dir["PROFILE_DIR"]) == []
+
+    res = auth_teacher_client.get("/teacher-dashboard", headers={"X-Profile": profiling.make_token(test_app)})
+    assert res.status_code == 200
+    [path] = glob.glob(os.path.join(profile_dir["PROFILE_DIR"], "teacher-dashboard", "*.prof"))
+    functions = {name for _, _, name in pstats.Stats(path).stats}
+    assert "teacher_dashboard" in functions
+
+
+def test_sampled_stacks_aggregate_into_top_functions(test_app, auth_teacher_client, profile_dir):
+    profile_dir.update(PROFILE_SAMPLE_RATE=1.0, PROFILE_MODE="sample", PROFILE_SAMPLE_INTERVAL=0.0001)
+    for _ in range(3):
+        auth_teacher_client.get("/teacher-dashboard")
+
+    paths = glob.glob(os.path.join(profile_dir["PROFILE_DIR"], "teacher-dashboard", "*.folded"))
+    assert len(paths) == 3
+    self_counts, total_counts, samples = profiling.aggregate_folded(paths)
+    assert samples == sum(self_counts.values())
+    assert all(total_counts[frame] >= count for frame, count in self_counts.items())
+
+    result = test_app.test_cli_runner().invoke(args=["profile", "top", "--endpoint", "teacher-dashboard", "--limit", "5"])
+    assert result.exit_code == 0, result.output
+    assert "3 sampled request(s)" in result.output
+
+
+def test_overlapping_cprofile_request_is_served_unprofiled(test_app, auth_teacher_client, profile_dir):
+    profile_dir["PROFILE_MODE"] = "cprofile"
+    token = profiling.make_token(test_app)
+
+    # As if another thread's request were being profiled right now
+    with profiling._cprofile_lock:
+        res = auth_teacher_client.get("/teacher-dashboard", headers={"X-Profile": token})
+    assert res.status_code == 200
+    assert os.listdir(profile_dir["PROFILE_DIR"]) == []
+
+    auth_teacher_client.get("/teacher-dashboard", headers={"X-Profile": token})
+    assert glob.glob(os.path.join(profile_dir["PROFILE_DIR"], "teacher-dashboard", "*.prof"))
+    assert not profiling._cprofile_lock.locked()
@@ -0,0 +1,151 @@
+import sqlite3
+
+import pytest
+
+import migrations
+import queries
+
+# (query, parameters) for every hot path that filters achievements
+HOT_QUERIES = [
+    (queries.TEACHER_STATS, {"teacher_id": "T001", "since": "2025-01-01"}),
+    (queries.TEACHER_RECENT, ("T001",)),
+]
+PAGE_PARAMS = {"teacher_id": "T001", "achievement_type": "coding", "limit": 26,
+               "cursor_date": "2025-01-01", "cursor_id": 10}
+for filtered in (False, True):
+    for after, before in ((False, False), (True, False), (False, True)):
+        HOT_QUERIES.append((queries.teacher_page_sql(filtered, after, before), PAGE_PARAMS))
+HOT_QUERIES += [
+    (queries.listing_sql(("student_id",)), dict(PAGE_PARAMS, student_id="S001")),
+    (queries.listing_sql(("student_id", "teacher_id"), after=True), dict(PAGE_PARAMS, student_id="S001")),
+    (queries.listing_sql(("teacher_id", "achievement_type"), since=True, until=True),
+     dict(PAGE_PARAMS, date_from="2024-01-01", date_to="2024-12-31")),
+    (queries.export_sql(("teacher_id", "date_from")), {"teacher_id": "T001", "date_from": "2024-01-01"}),
+    (queries.DATA_VERSION, ()),
+    (queries.STUDENT_RECENT, ("S001",)),
+    (queries.STUDENT_ACHIEVEMENTS, ("S001",)),
+]
+
+
+@pytest.fixture
+def migrated_db(tmp_path):
+    db_path = str(tmp_path / "plans.db")
+    migrations.upgrade(db_path)
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+def query_plan(conn, sql, params):
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+@pytest.mark.parametrize("sql, params", HOT_QUERIES)
+def test_hot_query_uses_index(migrated_db, sql, params):
+    plan = query_plan(migrated_db, sql, params)
+
+    assert any(step.startswith("SEARCH") for step in plan), plan
+    for step in plan:
+        if step.startswith("SCAN"):
+            assert "subquery" in step or "CONSTANT ROW" in step, f"full scan in plan: {plan}"
+        assert "TEMP B-TREE" not in step, f"sort not served by index: {plan}"
+
+
+INSERT_ACHIEVEMENT = """
+    INSERT INTO achievements (teacher_id, student_id, achievement_type, event_name,
+                              achievement_date, organizer, position)
+    VALUES (?, ?, 'hackathon', 'Event', ?, 'Org', '1')
+"""
+
+
+def seed_achievements(conn):
+    conn.execute("INSERT INTO student (student_name, student_id, email, password) VALUES ('A', 'S1', 'a@x', 'p')")
+    conn.execute("INSERT INTO student (student_name, student_id, email, password) VALUES ('B', 'S2', 'b@x', 'p')")
+    conn.executemany(
+        INSERT_ACHIEVEMENT,
+        [
+            ("T001", "S1", "2024-12-01"),
+            ("T001", "S1", "2025-02-01"),
+            ("T001", "S2", "2025-03-01"),
+            ("T002", "S2", "2025-03-01"),
+        ],
+    )
+    conn.commit()
+
+
+def test_teacher_dashboard_stats(migrated_db):
+    migrated_db.row_factory = sqlite3.Row
+    seed_achievements(migrated_db)
+
+    stats, recent = queries.teacher_dashboard(migrated_db, "T001", "2025-01-01")
+
+    assert stats == {"total_achievements": 3, "students_managed": 2, "this_week": 2}
+    assert len(recent) == 3
+    assert not migrated_db.in_transaction
+
+    stats, recent = queries.teacher_dashboard(migrated_db, "T999", "2025-01-01")
+    assert stats == {"total_achievements": 0, "students_managed": 0, "this_week": 0}
+    assert recent == []
+
+
+def test_teacher_stats_triggers_track_updates_and_deletes(migrated_db):
+    migrated_db.row_factory = sqlite3.Row
+    seed_achievements(migrated_db)
+
+    # Move S2's T001 entry to S1, then delete one of S1's entries
+    migrated_db.execute("UPDATE achievements SET student_id = 'S1' WHERE teacher_id = 'T001' AND student_id = 'S2'")
+    migrated_db.execute("DELETE FROM achievements WHERE teacher_id = 'T001' AND achievement_date = '2024-12-01'")
+    migrated_db.commit()
+
+    stats, _ = queries.teacher_dashboard(migrated_db, "T001", "2025-01-01")
+    assert stats == {"total_achievements": 2, "students_managed": 1, "this_week": 2}
+    assert migrations.rebuild_teacher_stats(migrated_db) == 0
+
+
+def test_rebuild_teacher_stats_repairs_drift(migrated_db):
+    seed_achievements(migrated_db)
+    migrated_db.execute("UPDATE teacher_stats SET total = 99 WHERE teacher_id = 'T001'")
+
+    assert migrations.rebuild_teacher_stats(migrated_db) == 1
+    assert migrated_db.execute("SELECT total FROM teacher_stats WHERE teacher_id = 'T001'").fetchone()[0] == 3
+
+
+def test_keyset_pages_walk_forward_and_back(migrated_db):
+    migrated_db.row_factory = sqlite3.Row
+    seed_achievements(migrated_db)
+    # Several rows sharing a date so the id tie-breaker matters
+    migrated_db.executemany(INSERT_ACHIEVEMENT, [("T001", "S2", "2025-02-01")] * 4)
+    migrated_db.commit()
+    expected = [r["id"] for r in migrated_db.execute(
+        "SELECT id FROM achievements WHERE teacher_id = 'T001' ORDER BY achievement_date DESC, id DESC")]
+
+    seen, pages, cursor = [], [], None
+    while True:
+        rows, next_cursor, prev_cursor = queries.teacher_achievements_page(
+            migrated_db, "T001", after=cursor, limit=2)
+        assert (prev_cursor is None) == (cursor is None)
+        pages.append([r["id"] for r in rows])
+        seen += pages[-1]
+        if not next_cursor:
+            break
+        cursor = next_cursor
+    assert seen == expected
+
+    rows, _, prev_cursor = queries.teacher_achievements_page(migrated_db, "T001", before=prev_cursor, limit=2)
+    assert [r["id"] for r in rows] == pages[-2]
+
+
+def test_keyset_page_filters_by_type(migrated_db):
+    migrated_db.row_factory = sqlite3.Row
+    seed_achievements(migrated_db)
+    migrated_db.execute("UPDATE achievements SET achievement_type = 'coding' WHERE achievement_date = '2025-02-01'")
+
+    rows, next_cursor, _ = queries.teacher_achievements_page(migrated_db, "T001", achievement_type="coding")
+
+    assert [r["achievement_type"] for r in rows] == ["coding"]
+    assert next_cursor is None
+
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(ValueError):
+        queries.decode_cursor("not-a-cursor")
@@ -1,15 +1,68 @@
-def test_student_dashboard_requires_login(client):
-    res = client.get("/student-dashboard", follow_redirects=False)
-    assert res.status_code == 302
-    assert "/student" in res.location
-
-
-def test_teacher_dashboard_requires_login(client):
-    res = client.get("/teacher-dashboard", follow_redirects=False)
-    assert res.status_code == 302
-    assert "/teacher" in res.location
-
-
-def test_teacher_achievement_requires_login(client):
-    res = client.get("/submit_achievements", follow_redirects=False)
-    assert res.status_code == 302
+import sqlite3
+import threading
+
+import db
+
+
+def test_student_dashboard_requires_login(client):
+    res = client.get("/student-dashboard", follow_redirects=False)
+    assert res.status_code == 302
+    assert "/student" in res.location
+
+
+def test_teacher_dashboard_requires_login(client):
+    res = client.get("/teacher-dashboard", follow_redirects=False)
+    assert res.status_code == 302
+    assert "/teacher" in res.location
+
+
+def test_teacher_achievement_requires_login(client):
+    res = client.get("/submit_achievements", follow_redirects=False)
+    assert res.status_code == 302
+
+
+def test_all_achievements_paginates_with_type_filter(auth_teacher_client):
+    res = auth_teacher_client.get("/all-achievements?type=coding&per_page=5&after=garbage")
+    assert res.status_code == 200
+    assert b'value="coding" selected' in res.data
+
+
+def test_all_achievements_show_all_is_streamed(auth_teacher_client):
+    res = auth_teacher_client.get("/all-achievements?per_page=all")
+    assert res.status_code == 200
+    assert res.is_streamed
+    assert b"All Recorded Achievements" in res.data
+
+
+def test_streamed_all_achievements_keeps_its_connection(test_app, auth_teacher_client, app_db):
+    conn = sqlite3.connect(app_db)
+    conn.executemany(
+        """
+        INSERT INTO achievements (teacher_id, student_id, achievement_type, event_name,
+                                  achievement_date, organizer, position)
+        VALUES ('T001', 'S001', 'coding', ?, '2025-01-01', 'Org', '1')
+        """,
+        [(f"Contest {i}",) for i in range(500)],
+    )
+    conn.commit()
+    conn.close()
+
+    res = auth_teacher_client.get("/all-achievements?per_page=all", buffered=False)
+    body = iter(res.response)
+    next(body)
+    pool = db.get_pool(test_app)
+    assert pool.stats()["in_use"] == 1
+
+    # Another request (its own thread, as under a real server) must not be
+    # handed the streaming connection
+    statuses = []
+    other = threading.Thread(target=lambda: statuses.append(auth_teacher_client.get("/teacher-dashboard").status_code))
+    other.start()
+    other.join()
+    assert statuses == [200]
+    assert pool.stats()["in_use"] == 1
+    assert pool.stats()["creations"] == 2
+
+    b"".join(body)
+    res.close()
+    assert pool.stats()["in_use"] == 0
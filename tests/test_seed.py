@@ -0,0 +1,69 @@
+import datetime
+import sqlite3
+
+import pytest
+
+import migrations
+import queries
+import seed
+
+UNTIL = datetime.date(2025, 6, 30)
+
+
+def _load(db_path, **options):
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    seed.populate(conn, 200, 10, 3000, seed=1, until=UNTIL, **options)
+    return conn
+
+
+def test_populate_refuses_to_mix_with_existing_people(app_db):
+    conn = sqlite3.connect(app_db, isolation_level=None)
+    with pytest.raises(ValueError):
+        seed.populate(conn, 10, 2, 50, until=UNTIL)
+    # Rolled back, triggers and indexes included
+    assert conn.execute("SELECT COUNT(*) FROM student").fetchone() == (1,)
+    assert len(seed._derived_objects(conn)) > 10
+
+
+def test_populate_covers_every_type_and_keeps_summaries_consistent(app_db):
+    conn = _load(app_db, reset=True)
+
+    assert conn.execute("SELECT COUNT(*) FROM achievements").fetchone() == (3000,)
+    by_type = dict(conn.execute("SELECT achievement_type, COUNT(*) FROM achievements GROUP BY 1"))
+    assert set(by_type) == set(queries.ACHIEVEMENT_TYPES)
+    assert conn.execute("""
+        SELECT COUNT(*) FROM achievements
+        WHERE (achievement_type = 'hackathon' AND team_size IS NULL)
+           OR (achievement_type = 'coding' AND coding_platform IS NULL)
+           OR (achievement_type = 'paper' AND paper_title IS NULL)
+           OR (achievement_type <> 'paper' AND paper_title IS NOT NULL)
+    """).fetchone() == (0,)
+    assert conn.execute("SELECT MAX(achievement_date) FROM achievements").fetchone()[0] <= UNTIL.isoformat()
+
+    # Skewed: the busiest teacher has several times the average volume
+    top = conn.execute("SELECT MAX(total) FROM teacher_stats").fetchone()[0]
+    assert top > 3 * 3000 / 10
+
+    # Bulk-rebuilt summaries match, and the triggers are back
+    conn.execute("BEGIN")
+    assert migrations.rebuild_teacher_stats(conn) == 0
+    conn.execute("ROLLBACK")
+    assert conn.execute("SELECT COUNT(*) FROM achievements_fts WHERE achievements_fts MATCH 'hackathon OR symposium'").fetchone()[0] > 0
+    conn.execute("""
+        INSERT INTO achievements (teacher_id, student_id, achievement_type, event_name, achievement_date, organizer, position)
+        VALUES ('T001', 'S001', 'other', 'Extra', '2025-07-01', 'Org', 'Participant')
+    """)
+    assert conn.execute("SELECT total FROM teacher_stats WHERE teacher_id = 'T001'").fetchone()[0] >= 1
+    conn.close()
+
+
+def test_populate_is_reproducible(app_db, tmp_path):
+    first = _load(app_db, reset=True)
+    other = str(tmp_path / "other.db")
+    migrations.upgrade(other)
+    second = _load(other)
+
+    sql = "SELECT * FROM achievements ORDER BY id"
+    assert first.execute(sql).fetchall() == second.execute(sql).fetchall()
+    first.close()
+    second.close()
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import config
+from app import create_app, init_db
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_does_not_touch_database_or_uploads(tmp_path):
+    env = dict(os.environ, DB_PATH=str(tmp_path / "ams.db"), UPLOAD_FOLDER=str(tmp_path / "uploads"))
+    subprocess.run([sys.executable, "-c", "import app"], cwd=ROOT, env=env, check=True)
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_create_app_uses_config_and_bootstrap_prepares_it(tmp_path):
+    app = create_app({"DB_PATH": str(tmp_path / "new.db"), "UPLOAD_FOLDER": str(tmp_path / "up")})
+
+    assert app.config["THUMBNAIL_WORKERS"] == config.Config.THUMBNAIL_WORKERS
+    with app.test_request_context():
+        from flask import url_for
+        assert url_for("teacher-dashboard") == "/teacher-dashboard"
+    assert not (tmp_path / "new.db").exists()
+
+    init_db(app)
+    assert (tmp_path / "new.db").exists() and (tmp_path / "up").is_dir()
+
+
+def test_production_config_requires_secret_key(monkeypatch):
+    monkeypatch.setattr(config.ProductionConfig, "SECRET_KEY", None)
+    with pytest.raises(RuntimeError):
+        create_app(config.ProductionConfig)
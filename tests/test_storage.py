@@ -0,0 +1,183 @@
+import io
+import os
+import sqlite3
+
+import pytest
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import RequestEntityTooLarge
+
+import storage
+
+JPEG_BYTES = b"\xff\xd8\xff\xe0" + b"certificate" * 100
+
+
+def blob_files(folder):
+    return [os.path.join(d, f) for d, _, files in os.walk(folder / "blobs") for f in files]
+
+
+def test_identical_uploads_share_one_blob(tmp_path):
+    store = storage.BlobStore(str(tmp_path))
+
+    first = store.put_stream(io.BytesIO(JPEG_BYTES), "jpeg")
+    second = store.put_stream(io.BytesIO(JPEG_BYTES), "JPG")
+
+    assert first == second
+    digest = storage.digest_from_path(first)
+    assert first == f"blobs/{digest[:2]}/{digest[2:4]}/{digest}.jpg"
+    assert len(blob_files(tmp_path)) == 1
+    assert os.listdir(tmp_path / "tmp") == []
+
+
+def test_submit_stores_certificate_by_content(client, app_db, upload_folder):
+    with client.session_transaction() as sess:
+        sess["logged_in"] = True
+        sess["teacher_id"] = "T001"
+    form = {
+        "student_id": "S001",
+        "achievement_type": "coding",
+        "event_name": "Code Sprint",
+        "achievement_date": "2025-02-01",
+        "organizer": "Org",
+        "position": "1",
+    }
+
+    for name in ("a.jpeg", "b.jpeg"):
+        data = dict(form, certificate=(io.BytesIO(JPEG_BYTES), name))
+        res = client.post("/submit_achievements", data=data, content_type="multipart/form-data")
+        assert b"successfully registered" in res.data
+
+    conn = sqlite3.connect(app_db)
+    paths = {r[0] for r in conn.execute("SELECT certificate_path FROM achievements")}
+    conn.close()
+    assert len(paths) == 1
+    assert paths.pop().startswith("uploads/blobs/")
+    assert len(blob_files(upload_folder)) == 1
+
+
+def test_migrate_command_deduplicates_legacy_uploads(test_app, app_db, tmp_path):
+    static = tmp_path / "static"
+    uploads = static / "uploads"
+    uploads.mkdir(parents=True)
+    for name in ("1_cert.jpeg", "2_cert.jpeg"):
+        (uploads / name).write_bytes(JPEG_BYTES)
+    conn = sqlite3.connect(app_db)
+    for name in ("1_cert.jpeg", "2_cert.jpeg"):
+        conn.execute(
+            """
+            INSERT INTO achievements (teacher_id, student_id, achievement_type, event_name,
+                                      achievement_date, organizer, position, certificate_path)
+            VALUES ('T001', 'S001', 'coding', 'E', '2025-01-01', 'O', '1', ?)
+            """,
+            (f"uploads/{name}",),
+        )
+    conn.commit()
+
+    original = test_app.config["UPLOAD_FOLDER"], test_app.static_folder
+    test_app.config["UPLOAD_FOLDER"], test_app.static_folder = str(uploads), str(static)
+    try:
+        result = test_app.test_cli_runner().invoke(args=["certificates", "migrate"])
+    finally:
+        test_app.config["UPLOAD_FOLDER"], test_app.static_folder = original
+
+    assert result.exit_code == 0, result.output
+    paths = {r[0] for r in conn.execute("SELECT certificate_path FROM achievements")}
+    conn.close()
+    assert len(paths) == 1 and paths.pop().startswith("uploads/blobs/")
+    assert not (uploads / "1_cert.jpeg").exists()
+    assert len(blob_files(uploads)) == 1
+
+
+def submit_certificate(client, content, name, **overrides):
+    with client.session_transaction() as sess:
+        sess["logged_in"] = True
+        sess["teacher_id"] = "T001"
+    data = {
+        "student_id": "S001",
+        "achievement_type": "coding",
+        "event_name": "Code Sprint",
+        "achievement_date": "2025-02-01",
+        "organizer": "Org",
+        "position": "1",
+        "certificate": (io.BytesIO(content), name),
+    }
+    data.update(overrides)
+    return client.post("/submit_achievements", data=data, content_type="multipart/form-data")
+
+
+def test_rejects_content_that_does_not_match_extension(client, app_db, upload_folder):
+    res = submit_certificate(client, b"MZ\x90\x00 not a pdf", "cert.pdf")
+
+    assert b"not a valid PDF file" in res.data
+    assert not (upload_folder / "blobs").exists()
+    assert os.listdir(upload_folder / "tmp") == []
+
+
+def test_rejects_oversized_upload_without_leaving_temp_files(client, test_app, app_db, upload_folder):
+    original = test_app.config["MAX_CONTENT_LENGTH"]
+    test_app.config["MAX_CONTENT_LENGTH"] = 64 * 1024
+    try:
+        res = submit_certificate(client, b"%PDF-" + b"0" * 200 * 1024, "big.pdf")
+    finally:
+        test_app.config["MAX_CONTENT_LENGTH"] = original
+
+    assert res.status_code == 413
+    assert b"too large" in res.data
+    assert not (upload_folder / "blobs").exists()
+    assert not (upload_folder / "tmp").exists() or os.listdir(upload_folder / "tmp") == []
+
+
+def test_hashing_upload_aborts_past_size_cap(tmp_path):
+    upload = storage.HashingUpload(str(tmp_path), max_size=10)
+    upload.write(b"%PDF-")
+
+    with pytest.raises(RequestEntityTooLarge):
+        upload.write(b"0123456789")
+    assert os.listdir(tmp_path) == []
+
+
+def test_hashing_upload_tracks_digest_and_head(tmp_path):
+    upload = storage.HashingUpload(str(tmp_path), max_size=None)
+    upload.write(b"%PD")
+    upload.write(b"F-1.7 rest of file")
+
+    assert upload.head.startswith(b"%PDF-")
+    assert storage.sniff_extension(upload.head) == "pdf"
+    store = storage.BlobStore(str(tmp_path))
+    relpath = store.commit_upload(upload, "pdf")
+    assert storage.digest_from_path(relpath) == upload.hexdigest()
+    with open(store.path(relpath), "rb") as f:
+        assert f.read() == b"%PDF-1.7 rest of file"
+
+
+def test_thumbnails_are_generated_in_background(test_app, app_db, upload_folder):
+    Image = pytest.importorskip("PIL.Image")
+    import thumbnails
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (2000, 1400), "navy").save(buffer, "JPEG")
+    buffer.seek(0)
+    with test_app.app_context():
+        certificate_path = storage.save_certificate(FileStorage(buffer, "cert.jpg"))
+        conn = sqlite3.connect(app_db)
+        achievement_id = conn.execute(
+            """
+            INSERT INTO achievements (teacher_id, student_id, achievement_type, event_name,
+                                      achievement_date, organizer, position, certificate_path)
+            VALUES ('T001', 'S001', 'coding', 'E', '2025-01-01', 'O', '1', ?)
+            """,
+            (certificate_path,),
+        ).lastrowid
+        conn.commit()
+        version = conn.execute("SELECT version FROM data_version").fetchone()[0]
+
+        thumb, preview = thumbnails.schedule(certificate_path, [achievement_id]).result(timeout=30)
+
+    stored = conn.execute("SELECT thumbnail_path, preview_path FROM achievements").fetchone()
+    # Derivative paths are not listing data: no ETag invalidation
+    assert conn.execute("SELECT version FROM data_version").fetchone()[0] == version
+    conn.close()
+    assert stored == (thumb, preview)
+    with Image.open(upload_folder / thumb.split("/", 1)[1]) as image:
+        assert max(image.size) == 320
+    with Image.open(upload_folder / preview.split("/", 1)[1]) as image:
+        assert max(image.size) == 1024
@@ -0,0 +1,59 @@
+import sqlite3
+
+ACHIEVEMENT_FORM = {
+    "student_id": "S001",
+    "achievement_type": "hackathon",
+    "event_name": "Campus Hack",
+    "achievement_date": "2025-03-15",
+    "organizer": "CSE Dept",
+    "position": "First Place",
+}
+
+
+def cached_summary(db_path, student_id="S001"):
+    conn = sqlite3.connect(db_path)
+    row = conn.execute("SELECT summary FROM student_summary_cache WHERE student_id = ?", (student_id,)).fetchone()
+    conn.close()
+    return row
+
+
+def test_dashboard_shows_real_achievements(client, app_db):
+    with client.session_transaction() as sess:
+        sess["logged_in"] = True
+        sess["teacher_id"] = "T001"
+    res = client.post("/submit_achievements", data=ACHIEVEMENT_FORM)
+    assert b"successfully registered" in res.data
+
+    with client.session_transaction() as sess:
+        sess.clear()
+        sess["logged_in"] = True
+        sess["student_id"] = "S001"
+        sess["student_name"] = "Test Student"
+        sess["student_dept"] = "CSE"
+    res = client.get("/student-dashboard")
+
+    assert res.status_code == 200
+    assert b"Campus Hack" in res.data
+    assert b"National Code Challenge" not in res.data
+    assert cached_summary(app_db) is not None
+
+
+def test_submit_invalidates_cached_summary(client, app_db):
+    with client.session_transaction() as sess:
+        sess["logged_in"] = True
+        sess["student_id"] = "S001"
+        sess["student_name"] = "Test Student"
+    client.get("/student-dashboard")
+    assert cached_summary(app_db) is not None
+
+    with client.session_transaction() as sess:
+        sess["teacher_id"] = "T001"
+    client.post("/submit_achievements", data=ACHIEVEMENT_FORM)
+    assert cached_summary(app_db) is None
+
+    with client.session_transaction() as sess:
+        del sess["teacher_id"]
+    res = client.get("/student-achievements")
+    assert res.status_code == 200
+    assert b'data-position="first"' in res.data
+    assert b'<option value="2025">2025</option>' in res.data
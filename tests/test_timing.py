@@ -0,0 +1,34 @@
+import json
+import logging
+import re
+
+import pytest
+
+
+@pytest.fixture
+def slow_threshold(test_app):
+    original = test_app.config["SLOW_REQUEST_MS"]
+    yield test_app.config
+    test_app.config["SLOW_REQUEST_MS"] = original
+
+
+def test_server_timing_counts_queries_and_render(auth_teacher_client, app_db):
+    res = auth_teacher_client.get("/teacher-dashboard")
+
+    header = res.headers["Server-Timing"]
+    assert re.search(r"total;dur=[\d.]+", header)
+    queries = int(re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', header).group(1))
+    assert queries >= 2
+    assert float(re.search(r"render;dur=([\d.]+)", header).group(1)) > 0
+
+
+def test_slow_request_logs_its_statements(auth_teacher_client, app_db, slow_threshold, caplog):
+    slow_threshold["SLOW_REQUEST_MS"] = 0
+    with caplog.at_level(logging.INFO, logger="ams.requests"):
+        auth_teacher_client.get("/api/v1/achievements")
+
+    records = [json.loads(r.getMessage()) for r in caplog.records if r.name == "ams.requests"]
+    info, warning = records
+    assert info["endpoint"] == "api.achievements" and info["status"] == 200
+    assert info["queries"] == len(warning["slow_queries"])
+    assert any("FROM achievements a" in q["sql"] for q in warning["slow_queries"])
@@ -0,0 +1,195 @@
+"""
+Background thumbnail and preview generation for certificates.
+
+After submit_achievements stores a certificate, schedule() hands the blob
+to a small per-process thread pool; the request thread never decodes an
+image. Each worker renders a preview (max 1024px) and a thumbnail (max
+320px), WebP when Pillow supports it, JPEG otherwise. PDFs are rendered
+from their first page with PyMuPDF. Derivatives are content-addressed by
+the source blob's digest under uploads/thumbs/, so a re-submitted
+certificate reuses them, and the paths are recorded on every achievement
+referencing the blob (achievements.thumbnail_path / preview_path).
+
+    flask --app app certificates thumbnails   # backfill missing derivatives
+"""
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+from flask import current_app
+
+import storage
+
+# Pillow and PyMuPDF are imported on first use (load_imaging) rather than
+# at import time, keeping them off the app's startup path
+Image = ImageOps = features = None
+fitz = None  # PyMuPDF, for first-page previews of PDF certificates
+_imaging_loaded = False
+
+log = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = (320, 320)
+PREVIEW_SIZE = (1024, 1024)
+THUMBS_PREFIX = "thumbs"
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def load_imaging():
+    """Import the imaging libraries once; False if Pillow is not installed."""
+    global Image, ImageOps, features, fitz, _imaging_loaded
+    if not _imaging_loaded:
+        try:
+            from PIL import Image, ImageOps, features
+        except ImportError:  # Pillow missing: certificates are listed without thumbnails
+            pass
+        try:
+            import fitz
+        except ImportError:
+            pass
+        _imaging_loaded = True
+    return Image is not None
+
+
+def output_format():
+    if load_imaging() and features.check("webp"):
+        return "WEBP", "webp"
+    return "JPEG", "jpg"
+
+
+def derivative_relpaths(digest):
+    _, ext = output_format()
+    base = "/".join((THUMBS_PREFIX, digest[:2], digest[2:4], digest))
+    return f"{base}-thumb.{ext}", f"{base}-preview.{ext}"
+
+
+def _open_source(path):
+    if path.lower().endswith(".pdf"):
+        if fitz is None:
+            return None
+        with fitz.open(path) as document:
+            pixmap = document[0].get_pixmap(dpi=110, alpha=False)
+            return Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+    image = Image.open(path)
+    # Let the JPEG decoder downscale while decoding instead of afterwards
+    image.draft("RGB", PREVIEW_SIZE)
+    return ImageOps.exif_transpose(image).convert("RGB")
+
+
+def _save_atomic(image, path, image_format):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            image.save(f, image_format, quality=80)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def render_derivatives(store, certificate_path):
+    """
+    Make the thumbnail and preview for a stored certificate. Returns their
+    certificate-style paths ("uploads/thumbs/..."), or None if the source
+    cannot be rendered here.
+    """
+    digest = storage.digest_from_path(certificate_path)
+    if not load_imaging() or digest is None:
+        return None
+    thumb_rel, preview_rel = derivative_relpaths(digest)
+    thumb_path, preview_path = store.path(thumb_rel), store.path(preview_rel)
+
+    if not (os.path.exists(thumb_path) and os.path.exists(preview_path)):
+        source = store.path(certificate_path.split("/", 1)[1])
+        image = _open_source(source)
+        if image is None:
+            return None
+        image_format, _ = output_format()
+        image.thumbnail(PREVIEW_SIZE)
+        _save_atomic(image, preview_path, image_format)
+        image.thumbnail(THUMBNAIL_SIZE)
+        _save_atomic(image, thumb_path, image_format)
+
+    return f"uploads/{thumb_rel}", f"uploads/{preview_rel}"
+
+
+def record_derivatives(db_path, achievement_ids, derivatives):
+    connection = sqlite3.connect(db_path, timeout=30)
+    try:
+        with connection:
+            connection.executemany(
+                """
+                UPDATE achievements SET thumbnail_path = ?, preview_path = ?
+                WHERE id = ? AND thumbnail_path IS NULL
+                """,
+                [(*derivatives, achievement_id) for achievement_id in achievement_ids],
+            )
+    finally:
+        connection.close()
+
+
+def process(db_path, store, certificate_path, achievement_ids):
+    try:
+        derivatives = render_derivatives(store, certificate_path)
+        if derivatives:
+            record_derivatives(db_path, achievement_ids, derivatives)
+        return derivatives
+    except Exception:
+        log.exception("Thumbnail generation failed for %s", certificate_path)
+        raise
+
+
+def get_executor(workers):
+    global _executor, _executor_pid
+    with _executor_lock:
+        # A forked worker must not reuse the parent's (thread-less) pool
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnails")
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def schedule(certificate_path, achievement_ids):
+    """
+    Queue derivative generation for a stored certificate and record it on
+    the given achievements; returns the Future.
+    """
+    if not certificate_path or not load_imaging():
+        return None
+    app = current_app._get_current_object()
+    executor = get_executor(app.config.get("THUMBNAIL_WORKERS", 2))
+    return executor.submit(
+        process, app.config["DB_PATH"], storage.get_store(app), certificate_path, list(achievement_ids),
+    )
+
+
+@storage.certificates_cli.command("thumbnails")
+def thumbnails_command():
+    """Generate missing thumbnails/previews for stored certificates."""
+    if not load_imaging():
+        raise click.ClickException("Pillow is not installed.")
+    db_path = current_app.config["DB_PATH"]
+    connection = sqlite3.connect(db_path)
+    try:
+        pending = {}
+        for achievement_id, certificate_path in connection.execute(
+            "SELECT id, certificate_path FROM achievements "
+            "WHERE certificate_path IS NOT NULL AND thumbnail_path IS NULL"
+        ):
+            pending.setdefault(certificate_path, []).append(achievement_id)
+    finally:
+        connection.close()
+
+    done = 0
+    for certificate_path, achievement_ids in pending.items():
+        if process(db_path, storage.get_store(), certificate_path, achievement_ids):
+            done += 1
+    click.echo(f"Generated derivatives for {done} of {len(pending)} certificate(s).")
@@ -0,0 +1,186 @@
+"""
+Per-request timing.
+
+Every request records its total time, the time spent rendering templates
+and the number and duration of SQL statements run on pooled connections
+(TimedConnection wraps execute/executemany and the fetch calls). The
+numbers are returned in a Server-Timing header, which browser dev tools
+show under the request's Timing tab, and logged as one JSON line per
+request on the "ams.requests" logger. Requests slower than
+SLOW_REQUEST_MS are logged again as warnings listing their statements.
+
+Statement time covers execute() and fetchone/fetchmany/fetchall; rows
+pulled by iterating a cursor are not timed individually.
+"""
+import json
+import logging
+import re
+import sqlite3
+import time
+
+from flask import before_render_template, current_app, g, has_app_context, request, template_rendered
+
+from signals import query_executed
+
+log = logging.getLogger("ams.requests")
+
+DEFAULTS = {
+    "REQUEST_TIMING": True,
+    "SERVER_TIMING_HEADER": True,
+    "SLOW_REQUEST_MS": 500,
+    # Statements kept per request for the slow-request dump
+    "SLOW_REQUEST_QUERY_LIMIT": 50,
+}
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RequestTimer:
+    def __init__(self, query_limit):
+        self.start = time.perf_counter()
+        self.query_limit = query_limit
+        self.db_time = 0.0
+        self.query_count = 0
+        self.queries = []
+        self.render_time = 0.0
+        self._render_start = None
+
+    def record_query(self, sql, elapsed):
+        if query_executed.receivers:
+            query_executed.send(current_app._get_current_object(), sql=sql, elapsed=elapsed)
+        self.query_count += 1
+        self.db_time += elapsed
+        if len(self.queries) < self.query_limit:
+            self.queries.append((sql, elapsed))
+
+    def add_db_time(self, elapsed):
+        self.db_time += elapsed
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+
+def current_timer():
+    if has_app_context():
+        return g.get("request_timer")
+    return None
+
+
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        timer = current_timer()
+        if timer is None:
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            timer.record_query(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        timer = current_timer()
+        if timer is None:
+            return super().executemany(sql, seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            timer.record_query(sql, time.perf_counter() - start)
+
+    def _timed_fetch(self, fetch, *args):
+        timer = current_timer()
+        if timer is None:
+            return fetch(*args)
+        start = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            timer.add_db_time(time.perf_counter() - start)
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, *args):
+        return self._timed_fetch(super().fetchmany, *args)
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose statements are counted and timed per request."""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    # sqlite3.Connection.execute would bypass the cursor subclass
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def start_timer():
+    g.request_timer = RequestTimer(current_app.config["SLOW_REQUEST_QUERY_LIMIT"])
+
+
+def _render_started(sender, template, context, **extra):
+    timer = current_timer()
+    if timer is not None:
+        timer._render_start = time.perf_counter()
+
+
+def _render_finished(sender, template, context, **extra):
+    timer = current_timer()
+    if timer is not None and timer._render_start is not None:
+        timer.render_time += time.perf_counter() - timer._render_start
+        timer._render_start = None
+
+
+def server_timing(timer, total):
+    return (
+        f"total;dur={total * 1000:.1f}, "
+        f'db;dur={timer.db_time * 1000:.1f};desc="{timer.query_count} queries", '
+        f"render;dur={timer.render_time * 1000:.1f}"
+    )
+
+
+def finish_timer(response):
+    timer = g.pop("request_timer", None)
+    if timer is None:
+        return response
+    total = timer.elapsed()
+    if current_app.config["SERVER_TIMING_HEADER"]:
+        response.headers["Server-Timing"] = server_timing(timer, total)
+
+    record = {
+        "method": request.method,
+        "path": request.path,
+        "endpoint": request.endpoint,
+        "status": response.status_code,
+        "total_ms": round(total * 1000, 2),
+        "db_ms": round(timer.db_time * 1000, 2),
+        "queries": timer.query_count,
+        "render_ms": round(timer.render_time * 1000, 2),
+    }
+    log.info(json.dumps(record))
+    if total * 1000 >= current_app.config["SLOW_REQUEST_MS"]:
+        record["slow_queries"] = [
+            {"sql": _WHITESPACE.sub(" ", sql).strip(), "ms": round(elapsed * 1000, 2)}
+            for sql, elapsed in timer.queries
+        ]
+        log.warning(json.dumps(record))
+    return response
+
+
+def init_app(app):
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    if not app.config["REQUEST_TIMING"]:
+        return
+    app.config["DB_CONNECTION_FACTORY"] = TimedConnection
+    app.before_request(start_timer)
+    app.after_request(finish_timer)
+    before_render_template.connect(_render_started, app)
+    template_rendered.connect(_render_finished, app)